@@ -0,0 +1,182 @@
+"""
+Section-aware article text for full-article quizzes.
+
+In full-article mode the extractor keeps the article's h2/h3 structure by
+emitting each heading as its own paragraph in wikitext style (``== History ==``,
+``=== Early years ===``). This module turns that text back into sections,
+packs the sections into token-budgeted chunks for the map step of generation,
+and merges the per-chunk questions back into one quiz (the reduce step) with
+an even spread across the article.
+
+Token counts are estimated at CHARS_PER_TOKEN characters per token, which is
+close enough for English prose to size prompts without a tokenizer.
+"""
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+CHARS_PER_TOKEN = 4
+
+LEAD_SECTION = "Introduction"
+
+# Smallest share of a long article's chunk budget each section is cut down to
+# (see plan_chunks)
+MIN_SECTION_TOKENS = 100
+
+_HEADING = re.compile(r"^(={2,3}) (.+?) \1$")
+
+
+def heading_line(level: int, title: str) -> str:
+    """The paragraph that marks the start of an h2 (level 2) or h3 section."""
+    marks = "=" * level
+    return f"{marks} {title} {marks}"
+
+
+class Section(NamedTuple):
+    title: str  # "History", or "History / Early years" for an h3
+    paragraphs: List[str]
+
+
+class Chunk(NamedTuple):
+    sections: Tuple[str, ...]  # titles of the sections the text comes from
+    text: str
+
+
+def split_sections(text: str) -> List[Section]:
+    """Split extractor output into sections; text before the first heading is
+    the lead. Headings without paragraphs are dropped."""
+    sections: List[Section] = []
+    title, parent = LEAD_SECTION, LEAD_SECTION
+    paragraphs: List[str] = []
+    for paragraph in text.split("\n\n"):
+        match = _HEADING.match(paragraph.strip())
+        if match is None:
+            if paragraph.strip():
+                paragraphs.append(paragraph.strip())
+            continue
+        if paragraphs:
+            sections.append(Section(title, paragraphs))
+        paragraphs = []
+        if len(match[1]) == 2:
+            title = parent = match[2]
+        else:
+            title = f"{parent} / {match[2]}"
+    if paragraphs:
+        sections.append(Section(title, paragraphs))
+    return sections
+
+
+def plain_text(text: str) -> str:
+    """Article text without the section heading paragraphs."""
+    return "\n\n".join(p for s in split_sections(text) for p in s.paragraphs)
+
+
+def _pack(sections: Sequence[Section], budget: int) -> List[Chunk]:
+    chunks: List[Chunk] = []
+    titles: List[str] = []
+    parts: List[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal titles, parts, size
+        if parts:
+            chunks.append(Chunk(tuple(titles), "\n\n".join(parts)))
+        titles, parts, size = [], [], 0
+
+    for section in sections:
+        for paragraph in section.paragraphs:
+            paragraph = paragraph[:budget]
+            if size and size + len(paragraph) > budget:
+                flush()
+            if not titles or titles[-1] != section.title:
+                titles.append(section.title)
+            parts.append(paragraph)
+            size += len(paragraph) + 2
+    flush()
+    return chunks
+
+
+def _lead_paragraphs(section: Section, chars: int) -> Section:
+    """The section's opening paragraphs, at most ``chars`` of them (the first
+    paragraph is cut if it alone is longer)."""
+    kept: List[str] = []
+    size = 0
+    for paragraph in section.paragraphs:
+        if kept and size + len(paragraph) > chars:
+            break
+        kept.append(paragraph[:chars])
+        size += len(kept[-1]) + 2
+    return Section(section.title, kept)
+
+
+def _evenly(items: Sequence, count: int) -> list:
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+def plan_chunks(sections: Sequence[Section], chunk_tokens: int, max_chunks: int) -> List[Chunk]:
+    """Pack sections into chunks of at most ``chunk_tokens`` (estimated).
+
+    A section larger than the budget is split at paragraph boundaries (a single
+    oversized paragraph is cut); consecutive small sections share a chunk. If
+    that gives more than ``max_chunks`` chunks, every section is cut down to
+    its lead paragraphs -- the same share for each, as large as still fits --
+    so every section of a long article is sampled while the number of LLM
+    calls, and therefore latency, stays bounded. Only when even
+    MIN_SECTION_TOKENS per section does not fit is an evenly spaced selection
+    of sections kept.
+    """
+    budget = max(1, chunk_tokens) * CHARS_PER_TOKEN
+    chunks = _pack(sections, budget)
+    if max_chunks <= 0 or len(chunks) <= max_chunks:
+        return chunks
+
+    low = min(budget, MIN_SECTION_TOKENS * CHARS_PER_TOKEN)
+    fits = max(1, max_chunks * budget // low)
+    if len(sections) > fits:
+        sections = _evenly(sections, fits)
+    # Largest per-section share whose packing fits in max_chunks
+    best, high = None, budget
+    while low <= high:
+        share = (low + high) // 2
+        packed = _pack([_lead_paragraphs(section, share) for section in sections], budget)
+        if len(packed) <= max_chunks:
+            best, low = packed, share + 1
+        else:
+            high = share - 1
+    if best is None:  # packing overhead: fall back to sampling chunks
+        best = _evenly(_pack([_lead_paragraphs(section, low) for section in sections], budget), max_chunks)
+    return best
+
+
+def questions_per_chunk(question_count: int, chunk_count: int) -> int:
+    """Questions to request from each chunk: an even share plus headroom for
+    duplicates and failed chunks."""
+    if chunk_count <= 1:
+        return question_count
+    return min(question_count, -(-question_count // chunk_count) + 1)
+
+
+def merge_questions(
+    per_chunk: Sequence[Sequence[Dict[str, Any]]],
+    question_count: int,
+    key: Callable[[Dict[str, Any]], str],
+) -> List[Dict[str, Any]]:
+    """Reduce step: take questions round-robin across chunks (first question of
+    every chunk, then the second, ...) skipping duplicates by ``key``, so the
+    quiz is balanced across sections instead of front-loaded."""
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    depth = max((len(questions) for questions in per_chunk), default=0)
+    for index in range(depth):
+        for questions in per_chunk:
+            if index >= len(questions):
+                continue
+            question = questions[index]
+            question_key = key(question)
+            if not question_key or question_key in seen:
+                continue
+            seen.add(question_key)
+            merged.append(question)
+            if len(merged) >= question_count:
+                return merged
+    return merged
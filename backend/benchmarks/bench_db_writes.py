@@ -0,0 +1,119 @@
+"""
+Benchmark concurrent quiz writes under the "basic" and "production" database
+profiles (see database.py).
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_writes [--writers W] [--readers R] [--quizzes N] [--url DATABASE_URL]
+
+W tasks each persist N quizzes (one row plus its compressed payload per
+transaction, as a generation does) while R tasks keep reading history and
+quiz payloads. Reports committed writes per second, p50/p95 commit latency
+and how many writes failed with "database is locked". Without --url each
+profile gets a fresh SQLite file in a temporary directory; a server database
+given with --url should be a scratch one, as its tables are created and
+filled.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_engine_for
+from models import Quiz
+
+QUIZ_JSON = json.dumps({
+    "title": "Benchmark",
+    "summary": "An article summary. " * 20,
+    "study_summary": ["A study point about the article."] * 5,
+    "questions": [
+        {
+            "question": f"Question {i} about the article?",
+            "options": ["Alpha", "Beta", "Gamma", "Delta"],
+            "answer": "Alpha",
+            "difficulty": "medium",
+            "explanation": "The article says so. " * 5,
+        }
+        for i in range(10)
+    ],
+})
+
+
+async def _writer(Session, worker: int, count: int, latencies: list, errors: dict) -> None:
+    for i in range(count):
+        start = time.perf_counter()
+        try:
+            async with Session() as session:
+                url = f"https://en.wikipedia.org/wiki/Bench_{worker}_{i}"
+                quiz = Quiz(url=url, article_key=url.lower(), question_count=10, title=url.rsplit("/", 1)[1])
+                quiz.full_quiz_data = QUIZ_JSON
+                session.add(quiz)
+                await session.commit()
+        except OperationalError as e:
+            errors["locked" if "locked" in str(e) else "other"] += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def _reader(Session, stop: asyncio.Event, reads: list) -> None:
+    while not stop.is_set():
+        async with Session() as session:
+            rows = (await session.execute(select(Quiz).order_by(Quiz.id.desc()).limit(20))).unique().scalars().all()
+            for row in rows:
+                row.full_quiz_data
+        reads[0] += 1
+        await asyncio.sleep(0)
+
+
+async def _run(url: str, profile: str, writers: int, readers: int, quizzes: int) -> None:
+    engine = create_engine_for(url, profile)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    latencies, errors, reads = [], {"locked": 0, "other": 0}, [0]
+    stop = asyncio.Event()
+    reader_tasks = [asyncio.create_task(_reader(Session, stop, reads)) for _ in range(readers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_writer(Session, w, quizzes, latencies, errors) for w in range(writers)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*reader_tasks)
+    await engine.dispose()
+
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=20)
+        timing = f"p50 {cuts[9] * 1000:6.1f} ms  p95 {cuts[18] * 1000:6.1f} ms"
+    else:
+        timing = "p50      - ms  p95      - ms"
+    print(
+        f"{profile:<12}{len(latencies) / elapsed:>8.0f} writes/s  {timing}  "
+        f"{reads[0] / elapsed:>7.0f} reads/s  locked {errors['locked']}  other errors {errors['other']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--quizzes", type=int, default=50, help="quizzes persisted by each writer")
+    parser.add_argument("--url", help="database URL to use for both profiles")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.quizzes} quizzes, {args.readers} readers\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("basic", "production"):
+            url = args.url or f"sqlite+aiosqlite:///{os.path.join(tmp, profile + '.db')}"
+            asyncio.run(_run(url, profile, args.writers, args.readers, args.quizzes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+End-to-end load benchmark of the API against stub Wikipedia and Gemini servers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_e2e [--scenarios cold,cache_hit,history,burst,mixed]
+        [--concurrency C] [--requests N] [--llm-latency MS] [--llm-jitter MS]
+        [--out results.json] [--baseline previous.json]
+
+Starts benchmarks/stub_servers.py and the app (uvicorn, a fresh SQLite
+database in a temporary directory, GEMINI_API_ENDPOINT pointed at the stub),
+then runs each scenario in turn:
+
+ - cold: N distinct articles, C at a time (scrape + LLM + persist)
+ - cache_hit: N requests, C at a time, over a set of already generated
+   quizzes; one in ten reads GET /quiz/{id}, the rest POST /generate_quiz
+ - history: T tabs polling GET /history?view=slim with If-None-Match every
+   --poll-interval seconds for --duration seconds while new quizzes arrive
+ - burst: B simultaneous requests for one new article (coalesced into a
+   single generation; the stub's LLM call count is reported)
+ - mixed: cache_hit, history and a trickle of cold generations at once
+
+Reports throughput and p50/p95/p99 latency per scenario and endpoint, writes
+them with the run's settings to --out, and with --baseline prints the change
+against an earlier results file. Latencies are measured by the client, so
+run it on an otherwise idle machine; --app-url benchmarks an already running
+server instead (which must itself have GEMINI_API_ENDPOINT set to the stub).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("cold", "cache_hit", "history", "burst", "mixed")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+                await asyncio.sleep(0.2)
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+
+class Recorder:
+    """Per-endpoint latencies and errors for one scenario."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.start = time.perf_counter()
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][resp.status_code] += 1
+        if resp.status_code >= 400:
+            self.errors[endpoint] += 1
+        return resp
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.start
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            ordered = sorted(self.latencies[endpoint])
+            stats: Dict[str, Any] = {
+                "count": len(ordered),
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(ordered) / wall, 2),
+                "statuses": {str(k): v for k, v in sorted(self.statuses[endpoint].items())},
+            }
+            if ordered:
+                stats.update(
+                    p50_ms=round(_percentile(ordered, 50) * 1000, 1),
+                    p95_ms=round(_percentile(ordered, 95) * 1000, 1),
+                    p99_ms=round(_percentile(ordered, 99) * 1000, 1),
+                    mean_ms=round(sum(ordered) / len(ordered) * 1000, 1),
+                )
+            endpoints[endpoint] = stats
+        return {"wall_s": round(wall, 2), "endpoints": endpoints}
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace, app_url: str, stub_url: str) -> None:
+        self.args = args
+        self.app_url = app_url
+        self.stub_url = stub_url
+        self.rng = random.Random(args.seed)
+        self.run_id = f"{args.seed}_{int(time.time())}"  # keeps article URLs new across runs on one DB
+        self.client = httpx.AsyncClient(
+            base_url=app_url,
+            timeout=httpx.Timeout(args.timeout),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        )
+
+    def article_url(self, name: str) -> str:
+        return f"{self.stub_url}/wiki/Bench_{self.run_id}_{name}"
+
+    async def generate(self, rec: Recorder, url: str) -> Optional[httpx.Response]:
+        return await rec.request(self.client, "POST /generate_quiz", "POST", "/generate_quiz", json={"url": url})
+
+    async def _pool(self, jobs: List, concurrency: int) -> None:
+        """Run coroutine factories ``concurrency`` at a time."""
+        queue = list(reversed(jobs))
+
+        async def worker():
+            while queue:
+                await queue.pop()()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def stub_stats(self) -> Dict[str, int]:
+        async with httpx.AsyncClient() as stub:
+            return (await stub.get(f"{self.stub_url}/_stats")).json()
+
+    async def prime(self, count: int) -> List[int]:
+        """Generate ``count`` quizzes for the cache-hit workload; returns their ids."""
+        rec = Recorder()
+        urls = [self.article_url(f"hot_{i}") for i in range(count)]
+        ids = []
+
+        async def one(url):
+            resp = await self.generate(rec, url)
+            if resp is not None and resp.status_code == 200:
+                ids.append(resp.json()["id"])
+
+        await self._pool([lambda u=u: one(u) for u in urls], self.args.concurrency)
+        self.hot_urls = urls
+        return ids
+
+    # -- scenarios -------------------------------------------------------------
+    async def cold(self, rec: Recorder, count: int, concurrency: int, prefix: str = "cold") -> None:
+        urls = [self.article_url(f"{prefix}_{i}") for i in range(count)]
+        await self._pool([lambda u=u: self.generate(rec, u) for u in urls], concurrency)
+
+    async def cache_hit(self, rec: Recorder, count: int, concurrency: int) -> None:
+        jobs = []
+        for i in range(count):
+            if i % 10 == 9 and self.hot_ids:
+                quiz_id = self.rng.choice(self.hot_ids)
+                jobs.append(lambda q=quiz_id: rec.request(self.client, "GET /quiz/{id}", "GET", f"/quiz/{q}"))
+            else:
+                url = self.rng.choice(self.hot_urls)
+                jobs.append(lambda u=url: self.generate(rec, u))
+        await self._pool(jobs, concurrency)
+
+    async def history(self, rec: Recorder, tabs: int, duration: float, writer: bool = True) -> None:
+        stop = time.monotonic() + duration
+
+        async def tab(index: int):
+            etag = None
+            await asyncio.sleep(self.args.poll_interval * index / max(tabs, 1))  # tabs opened at different times
+            while time.monotonic() < stop:
+                headers = {"If-None-Match": etag} if etag else {}
+                resp = await rec.request(self.client, "GET /history", "GET", "/history", params={"view": "slim"}, headers=headers)
+                if resp is not None and resp.status_code == 200:
+                    etag = resp.headers.get("etag")
+                await asyncio.sleep(self.args.poll_interval)
+
+        async def new_quizzes():
+            i = 0
+            while time.monotonic() < stop:
+                await self.generate(rec, self.article_url(f"history_{i}"))
+                i += 1
+                await asyncio.sleep(1.0)
+
+        await asyncio.gather(*(tab(i) for i in range(tabs)), *([new_quizzes()] if writer else []))
+
+    async def burst(self, rec: Recorder, size: int) -> Dict[str, int]:
+        before = await self.stub_stats()
+        url = self.article_url("burst")
+        await asyncio.gather(*(self.generate(rec, url) for _ in range(size)))
+        after = await self.stub_stats()
+        return {key: after.get(key, 0) - before.get(key, 0) for key in ("wiki", "llm_quiz", "llm_summary")}
+
+    async def mixed(self, rec: Recorder) -> None:
+        args = self.args
+        duration = args.duration
+        await asyncio.gather(
+            self.cache_hit(rec, args.requests, args.concurrency),
+            self.history(rec, args.tabs, duration, writer=False),
+            self.cold(rec, max(1, args.requests // 20), max(1, args.concurrency // 4), prefix="mixed"),
+        )
+
+    async def run(self, scenarios: List[str]) -> Dict[str, Any]:
+        args = self.args
+        results: Dict[str, Any] = {}
+        self.hot_urls, self.hot_ids = [], []
+        if {"cache_hit", "mixed"} & set(scenarios):
+            self.hot_ids = await self.prime(args.hot_articles)
+        for name in scenarios:
+            rec = Recorder()
+            extra: Dict[str, Any] = {}
+            if name == "cold":
+                await self.cold(rec, args.requests, args.concurrency)
+            elif name == "cache_hit":
+                await self.cache_hit(rec, args.requests, args.concurrency)
+            elif name == "history":
+                await self.history(rec, args.tabs, args.duration)
+            elif name == "burst":
+                extra["upstream_calls"] = await self.burst(rec, args.burst)
+            elif name == "mixed":
+                await self.mixed(rec)
+            results[name] = {**rec.summary(), **extra}
+            _print_scenario(name, results[name])
+        await self.client.aclose()
+        return results
+
+
+def _print_scenario(name: str, result: Dict[str, Any]) -> None:
+    print(f"\n{name}  ({result['wall_s']}s)")
+    for endpoint, stats in result["endpoints"].items():
+        if not stats["count"]:
+            print(f"  {endpoint:<22} no responses, {stats['errors']} errors")
+            continue
+        print(
+            f"  {endpoint:<22}{stats['count']:>6} req {stats['throughput_rps']:>9.1f} req/s"
+            f"  p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms"
+            f"  errors {stats['errors']}"
+        )
+    if "upstream_calls" in result:
+        print(f"  upstream calls: {result['upstream_calls']}")
+
+
+def _change(new: float, old: float) -> str:
+    if not old:
+        return "    n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print throughput and latency changes against a baseline results file
+    (negative latency / positive throughput changes are improvements)."""
+    print(f"\nvs. baseline {baseline.get('meta', {}).get('git', '?')} ({baseline.get('meta', {}).get('date', '?')})")
+    for name, result in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        for endpoint, stats in result["endpoints"].items():
+            before = old["endpoints"].get(endpoint)
+            if not before or not stats["count"] or not before["count"]:
+                continue
+            print(
+                f"  {name:<10}{endpoint:<22} req/s {_change(stats['throughput_rps'], before['throughput_rps'])}"
+                f"  p50 {_change(stats['p50_ms'], before['p50_ms'])}  p95 {_change(stats['p95_ms'], before['p95_ms'])}"
+                f"  p99 {_change(stats['p99_ms'], before['p99_ms'])}"
+            )
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    processes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            stub_port = _free_port()
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            stub_cmd = [
+                sys.executable, "-m", "benchmarks.stub_servers", "--port", str(stub_port), "--seed", str(args.seed),
+                "--wiki-latency", str(args.wiki_latency), "--wiki-jitter", str(args.wiki_jitter),
+                "--llm-latency", str(args.llm_latency), "--llm-jitter", str(args.llm_jitter),
+            ] + (["--pages", args.pages] if args.pages else [])
+            processes.append(subprocess.Popen(stub_cmd, cwd=BACKEND_DIR))
+            await _wait_until_up(f"{stub_url}/_stats")
+
+            app_url = args.app_url
+            if not app_url:
+                app_port = _free_port()
+                app_url = f"http://127.0.0.1:{app_port}"
+                env = dict(
+                    os.environ,
+                    DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}",
+                    GEMINI_API_KEY="stub",
+                    GEMINI_API_ENDPOINT=stub_url,
+                    LLM_WARMUP="0",
+                )
+                app_cmd = [
+                    sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+                    "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+                ]
+                processes.append(subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=env))
+            await _wait_until_up(f"{app_url}/")
+
+            print(f"app {app_url}, stubs {stub_url}: scenarios {', '.join(scenarios)}")
+            scenario_results = await Bench(args, app_url, stub_url).run(scenarios)
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    settings = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    return {
+        "meta": {
+            "git": _git_revision(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": settings,
+        },
+        "scenarios": scenario_results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, run in order")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="requests per cold / cache_hit scenario")
+    parser.add_argument("--hot-articles", type=int, default=20, help="quizzes generated for the cache-hit workload")
+    parser.add_argument("--tabs", type=int, default=20, help="history polling tabs")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between a tab's history polls")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds for history and mixed")
+    parser.add_argument("--burst", type=int, default=50, help="simultaneous requests in the burst scenario")
+    parser.add_argument("--wiki-latency", type=float, default=80, help="stub Wikipedia latency (ms)")
+    parser.add_argument("--wiki-jitter", type=float, default=30)
+    parser.add_argument("--llm-latency", type=float, default=1500, help="stub LLM latency (ms)")
+    parser.add_argument("--llm-jitter", type=float, default=500)
+    parser.add_argument("--pages", help="directory of saved article HTML files for the Wikipedia stub")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--app-url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = asyncio.run(_main(args))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
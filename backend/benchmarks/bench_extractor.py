@@ -0,0 +1,52 @@
+"""
+Benchmark the streaming extractor against the original BeautifulSoup one.
+
+Usage (from backend/):
+    python -m benchmarks.bench_extractor [--pages DIR] [--repeat N]
+
+DIR holds saved Wikipedia article pages (*.html); without it a synthetic
+corpus is generated.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.pages import load_pages
+from extractor import extract_article_fast
+from scraper import extract_article_soup
+
+
+def _time(fn, html: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html, "https://en.wikipedia.org/wiki/Benchmark")
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="directory of saved article HTML files")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB total, median of {args.repeat} runs\n")
+    print(f"{'page':<32}{'KB':>8}{'soup ms':>10}{'fast ms':>10}{'speedup':>9}  title match")
+
+    soup_total = fast_total = 0.0
+    for name, html in pages:
+        soup_s = _time(extract_article_soup, html, args.repeat)
+        fast_s = _time(extract_article_fast, html, args.repeat)
+        soup_total += soup_s
+        fast_total += fast_s
+        same_title = extract_article_soup(html, "")[0] == extract_article_fast(html, "")[0]
+        print(f"{name[:31]:<32}{len(html) / 1024:>8.0f}{soup_s * 1000:>10.2f}{fast_s * 1000:>10.2f}{soup_s / fast_s:>8.1f}x  {same_title}")
+
+    print(f"\n{'total':<40}{soup_total * 1000:>10.1f}{fast_total * 1000:>10.1f}{soup_total / fast_total:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark the offline fallback quiz engine in quizzes per second.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fallback [--pages DIR] [--count N] [--questions Q] [--workers W]
+
+Article text is extracted from the pages exactly as for a real request (saved
+*.html files in DIR, else a synthetic corpus). "cold" clears the article index
+cache before every quiz, as when each request is for a different article;
+"batch" runs ``generate_quizzes`` over the whole corpus with W processes.
+"""
+import argparse
+import time
+
+import fallback_engine
+from benchmarks.pages import load_pages
+from extractor import extract_article_fast
+
+
+def _rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:>10.0f} quizzes/s  ({seconds * 1000 / count:.3f} ms each)"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="directory of saved article HTML files")
+    parser.add_argument("--count", type=int, default=50, help="synthetic pages to generate")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20, help="passes over the corpus")
+    parser.add_argument("--workers", type=int, default=4, help="processes for the batch run")
+    args = parser.parse_args()
+
+    articles = [extract_article_fast(html, name) for name, html in load_pages(args.pages, args.count)]
+    print(f"{len(articles)} articles, {args.questions} questions each, {args.rounds} rounds\n")
+
+    total = len(articles) * args.rounds
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for title, text in articles:
+            fallback_engine.build_index.cache_clear()
+            fallback_engine.generate_quiz(title, text, args.questions)
+    print(f"{'cold (index per quiz)':<24}{_rate(total, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for title, text in articles:
+            fallback_engine.generate_quiz(title, text, args.questions)
+    print(f"{'warm (cached index)':<24}{_rate(total, time.perf_counter() - start)}")
+
+    corpus = articles * args.rounds
+    start = time.perf_counter()
+    fallback_engine.generate_quizzes(corpus, args.questions, workers=args.workers)
+    print(f"{f'batch ({args.workers} workers)':<24}{_rate(total, time.perf_counter() - start)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark full-article generation latency against article length.
+
+Usage (from backend/):
+    python -m benchmarks.bench_full_article [--paragraphs 12,48,120,480]
+        [--llm-latency MS] [--llm-jitter MS] [--repeat N]
+
+Generates synthetic articles of increasing length, extracts them in the
+default (lead-only) and full-article modes, and times
+QuizGeneratorService.generate for each against the Gemini stub from
+benchmarks/stub_servers.py (started in-process). Reports the extracted text
+size, the chunk count and the LLM calls made per quiz. Full-article latency
+should level off once the chunk count reaches FULL_ARTICLE_MAX_CHUNKS instead
+of growing with the article.
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from article_sections import plan_chunks, split_sections
+from benchmarks.bench_e2e import _free_port, _wait_until_up
+from benchmarks.pages import synthetic_page
+from benchmarks.stub_servers import Latency, create_app
+from llm_quiz_generator import FULL_ARTICLE_CHUNK_TOKENS, FULL_ARTICLE_MAX_CHUNKS, QuizGeneratorService
+from scraper import extract_article
+
+
+async def _run(args: argparse.Namespace) -> None:
+    port = _free_port()
+    stub_url = f"http://127.0.0.1:{port}"
+    stub = create_app(None, Latency(0, 0, args.seed), Latency(args.llm_latency, args.llm_jitter, args.seed + 1))
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    await _wait_until_up(f"{stub_url}/_stats")
+
+    service = QuizGeneratorService(api_key="benchmark", endpoint=stub_url)
+    await service.preload()
+    print(f"chunks of {FULL_ARTICLE_CHUNK_TOKENS} tokens, at most {FULL_ARTICLE_MAX_CHUNKS}; "
+          f"LLM {args.llm_latency:.0f} +/- {args.llm_jitter:.0f} ms\n")
+    print(f"{'paragraphs':>10}  {'mode':<8} {'chars':>8} {'chunks':>6} {'calls':>5} {'median ms':>10}")
+    async with httpx.AsyncClient(base_url=stub_url) as client:
+        for paragraphs in (int(p) for p in args.paragraphs.split(",")):
+            html = synthetic_page("Benchmark topic", paragraphs=paragraphs, seed=paragraphs)
+            for full in (False, True):
+                title, text = extract_article(html, "benchmark", full)
+                chunks = len(plan_chunks(split_sections(text), FULL_ARTICLE_CHUNK_TOKENS, FULL_ARTICLE_MAX_CHUNKS)) if full else 1
+                await client.post("/_reset")
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    await service.generate(title, text, full_article=full)
+                    times.append((time.perf_counter() - start) * 1000)
+                calls = sum((await client.get("/_stats")).json().values()) / args.repeat
+                mode = "full" if full else "default"
+                print(f"{paragraphs:>10}  {mode:<8} {len(text):>8} {chunks:>6} {calls:>5.0f} {statistics.median(times):>10.0f}")
+    server.should_exit = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", default="12,48,120,480", help="comma-separated article lengths")
+    parser.add_argument("--llm-latency", type=float, default=1000, help="stub LLM latency (ms)")
+    parser.add_argument("--llm-jitter", type=float, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="quizzes per length and mode (median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark quiz history search (search_index.py) on a large index.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search [--quizzes N] [--repeat R] [--url DATABASE_URL]
+
+Indexes N synthetic quizzes (titles, summaries and ten questions drawn from a
+Zipf-like vocabulary, so some terms match most quizzes and others a few) in
+batches through the same write path as persisted quizzes, then times
+search_quizzes for rare, common, short-prefix and multi-word queries, and for
+the fifth page of a common query. Reports the number of results and p50/p95
+latency per query. Without --url a fresh SQLite file in a temporary directory
+is used; a server database given with --url should be a scratch one.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import create_engine_for
+from search_index import TABLE, create_search_index, index_quizzes, search_quizzes
+
+SYLLABLES = "ka lo mi ra to ne su vi da pe go ri ha mo ze lu ba ti".split()
+
+
+def _vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _quiz(rng: random.Random, vocabulary, cum_weights) -> dict:
+    def phrase(n: int) -> str:
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=n))
+
+    return {
+        "title": phrase(2).title(),
+        "summary": phrase(40),
+        "questions": [{"question": phrase(14) + "?"} for _ in range(10)],
+    }
+
+
+async def _fill(Session, count: int, seed: int, batch: int = 2000):
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(20000, rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for start in range(0, count, batch):
+        async with Session() as session:
+            await index_quizzes(session, [
+                (quiz_id, _quiz(rng, vocabulary, cum_weights))
+                for quiz_id in range(start + 1, min(start + batch, count) + 1)
+            ])
+            await session.commit()
+    return vocabulary
+
+
+async def _time(Session, query: str, repeat: int, pages: int = 1):
+    latencies = []
+    for _ in range(repeat):
+        cursor = None
+        start = time.perf_counter()
+        async with Session() as session:
+            for _ in range(pages):
+                hits, cursor = await search_quizzes(session, query, 20, cursor)
+                if cursor is None:
+                    break
+        latencies.append((time.perf_counter() - start) * 1000 / pages)
+    async with Session() as session:
+        matches = len((await search_quizzes(session, query, 10 ** 7))[0])
+    return matches, latencies
+
+
+async def _run(args: argparse.Namespace, url: str) -> None:
+    engine = create_engine_for(url)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await conn.run_sync(create_search_index)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    start = time.perf_counter()
+    vocabulary = await _fill(Session, args.quizzes, args.seed)
+    print(f"indexed {args.quizzes} quizzes in {time.perf_counter() - start:.1f}s\n")
+
+    rare, common = vocabulary[-1], vocabulary[0]
+    queries = [
+        ("rare word", rare, 1),
+        ("rare prefix", rare[:5], 1),
+        ("common word", common, 1),
+        ("two words", f"{vocabulary[3]} {vocabulary[40]}", 1),
+        ("2-char prefix", common[:2], 1),
+        ("common, page 5", common, 5),
+    ]
+    print(f"{'query':<16}{'terms':<22}{'results':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for label, query, pages in queries:
+        matches, latencies = await _time(Session, query, args.repeat, pages)
+        cuts = statistics.quantiles(latencies, n=20) if len(latencies) >= 2 else latencies * 19
+        print(f"{label:<16}{query:<22}{matches:>8}{cuts[9]:>9.1f}{cuts[18]:>9.1f}")
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE {TABLE}"))
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_run(args, args.url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'search.db')}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark API cold start: ``import main`` time, with a budget check.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--budget-ms MS] [--repeat N] [--serve]
+
+Imports main in fresh interpreters under ``python -X importtime``, without and
+with a (dummy) GEMINI_API_KEY, and reports the best cumulative time and the
+heaviest direct imports. The LLM SDKs must not load at import time in either
+case (they are loaded in the background once the server is up), so importing
+any of FORBIDDEN_PREFIXES fails the run, as does exceeding --budget-ms.
+--serve also starts uvicorn and measures the time until GET / answers.
+Exits non-zero on failure, so it can guard CI.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+from benchmarks.bench_e2e import BACKEND_DIR, _free_port
+
+FORBIDDEN_PREFIXES = ("google.generativeai", "google.genai", "langchain", "grpc")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def _importtime(env: Dict[str, str]) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """(cumulative ms for main, [(ms, direct import)], forbidden modules imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    total, direct, forbidden = 0.0, [], []
+    for match in _LINE.finditer(proc.stderr):
+        cumulative_us, indent, name = int(match[2]), len(match[3]), match[4]
+        if name.startswith(FORBIDDEN_PREFIXES):
+            forbidden.append(name)
+        if indent == 0 and name == "main":
+            total = cumulative_us / 1000
+        elif indent == 2:
+            direct.append((cumulative_us / 1000, name))
+    return total, sorted(direct, reverse=True), forbidden
+
+
+def _time_to_first_response(env: Dict[str, str]) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+                return (time.perf_counter() - start) * 1000
+            except OSError:
+                if proc.poll() is not None or time.perf_counter() - start > 60:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="maximum import time of main")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per configuration (best is kept)")
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports to list")
+    parser.add_argument("--serve", action="store_true", help="also measure uvicorn start to first response")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        base = dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(tmp, 'startup.db')}", LLM_WARMUP="0")
+        for label, key in (("fallback only (no API key)", ""), ("API key configured", "dummy-key")):
+            env = dict(base, GEMINI_API_KEY=key)
+            runs = [_importtime(env) for _ in range(args.repeat)]
+            total, direct, forbidden = min(runs, key=lambda run: run[0])
+            over = total > args.budget_ms
+            print(f"{label}: import main {total:.0f} ms (budget {args.budget_ms:.0f} ms){'  OVER BUDGET' if over else ''}")
+            for ms, name in direct[:args.top]:
+                print(f"  {ms:>8.1f} ms  {name}")
+            if forbidden:
+                print(f"  imported at startup: {', '.join(sorted(set(forbidden))[:10])}")
+            if args.serve:
+                print(f"  uvicorn start to first response: {_time_to_first_response(env):.0f} ms")
+            failed = failed or over or bool(forbidden)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Article HTML corpus for the benchmarks.
+
+Saved Wikipedia pages (``*.html``) in a directory are used when given;
+otherwise synthetic pages with Wikipedia's layout (large head and navigation,
+infobox, references, navboxes) are generated so the benchmarks run offline.
+"""
+import glob
+import os
+import random
+from typing import List, Tuple
+
+WORDS = (
+    "the of and in to was is for as with by on that from his at an were which "
+    "also university science war computer machine theory history city river "
+    "government language developed published early later research first known "
+    "national between during world system model work century became however"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(12, 28))]
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.5:
+        words.insert(rng.randint(1, len(words) - 1), f'<a href="/wiki/{words[1]}">{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()}</a>')
+    return " ".join(words) + "."
+
+
+def synthetic_page(title: str, paragraphs: int = 120, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    head = "".join(f'<link rel="stylesheet" href="/s/{i}.css"><script>var x{i}={i};</script>' for i in range(60))
+    nav = "".join(f'<li><a href="/wiki/Nav_{i}">Navigation {i}</a></li>' for i in range(400))
+    infobox = "".join(f"<tr><th>Field {i}</th><td>{_sentence(rng)}</td></tr>" for i in range(40))
+    body = []
+    for i in range(paragraphs):
+        if i and i % 12 == 0:
+            body.append(f'<h2><span class="mw-headline">Section {i // 12}</span><span class="mw-editsection">[edit]</span></h2>')
+        text = " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+        body.append(f'<p>{text}<sup class="reference"><a href="#cite_note-{i}">[{i}]</a></sup></p>')
+    refs = "".join(f"<li>Reference {i}. {_sentence(rng)}</li>" for i in range(200))
+    navbox = "".join(f'<div class="navbox"><table><tr><td>{_sentence(rng)}</td></tr></table></div>' for _ in range(20))
+    return (
+        f"<!DOCTYPE html><html><head><title>{title} - Wikipedia</title>{head}</head><body>"
+        f'<div id="mw-navigation"><ul>{nav}</ul></div>'
+        f'<main id="content"><h1 id="firstHeading" class="firstHeading"><span class="mw-page-title-main">{title}</span></h1>'
+        f'<div id="bodyContent"><div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">'
+        f'<div class="shortdescription">Synthetic article</div>'
+        f'<table class="infobox">{infobox}</table>'
+        f'<p class="mw-empty-elt"></p>{"".join(body)}'
+        f'<div class="reflist"><ol class="references">{refs}</ol></div>{navbox}'
+        f"</div></div></main></body></html>"
+    )
+
+
+def load_pages(directory: str = None, count: int = 20) -> List[Tuple[str, str]]:
+    """Return [(name, html)] from ``directory`` or a synthetic corpus."""
+    if directory:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as fh:
+                pages.append((os.path.basename(path), fh.read()))
+        if pages:
+            return pages
+    return [(f"Synthetic_{i}", synthetic_page(f"Synthetic {i}", seed=i)) for i in range(count)]
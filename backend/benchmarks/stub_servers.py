@@ -0,0 +1,167 @@
+"""
+Local stand-ins for Wikipedia and the Gemini API, for load benchmarks.
+
+Usage (from backend/):
+    python -m benchmarks.stub_servers [--port P] [--pages DIR]
+        [--wiki-latency MS] [--wiki-jitter MS] [--llm-latency MS] [--llm-jitter MS]
+
+One server answers both:
+ - ``GET /wiki/<Title>``: article HTML (saved pages from DIR, picked by title,
+   else a synthetic page titled after the URL)
+ - ``POST /v1beta/models/<model>:generateContent`` and
+   ``:streamGenerateContent?alt=sse``: the Gemini REST API. Quiz prompts get
+   a well-formed quiz with the requested number of questions (extension and
+   full-article chunk prompts get just the questions); any other
+   prompt gets a plain-text study summary. Streams are split into chunks
+   spread over the response time. ``:countTokens`` (used by the LLM_WARMUP
+   warm-up) answers with a word count.
+ - ``GET /_stats`` / ``POST /_reset``: request counters
+
+Every response waits latency +/- jitter milliseconds (uniform, seeded), so
+runs are repeatable. Point the app at it with GEMINI_API_ENDPOINT=http://host:P
+and quiz URLs of the form http://host:P/wiki/<Title>; benchmarks/bench_e2e.py
+does both.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+from benchmarks.pages import load_pages, synthetic_page
+
+STREAM_CHUNKS = 8
+
+
+class Latency:
+    def __init__(self, latency_ms: float, jitter_ms: float, seed: int) -> None:
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rng = random.Random(seed)
+
+    def sample(self) -> float:
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+
+def _quiz_text(prompt: str) -> str:
+    count = int((re.search(r"Generate exactly (\d+)", prompt) or [0, 10])[1])
+    title = (re.search(r'about "([^"]*)"', prompt) or [0, "Article"])[1]
+    # Distinct wording per prompt, so extra questions never repeat existing ones
+    salt = zlib.crc32(prompt.encode()) % 10000
+    questions = [
+        {
+            "question": f"Which statement about {title} is supported by the article ({salt}-{i})?",
+            "options": [f"Option {c} for {title}" for c in "ABCD"],
+            "answer": f"Option A for {title}",
+        }
+        for i in range(count)
+    ]
+    if "extending an existing" in prompt or "part of a multiple choice quiz" in prompt:
+        return json.dumps({"questions": questions})
+    return json.dumps({
+        "title": title,
+        "summary": f"{title} is the subject of this benchmark article.",
+        "study_summary": f"Overview: key points about {title}.",
+        "questions": questions,
+    })
+
+
+def _summary_text(prompt: str) -> str:
+    title = (re.search(r'about "([^"]*)"', prompt) or [0, "Article"])[1]
+    return "\n".join(
+        [f"Overview: {title} in brief."]
+        + [f"- Key point {i} about {title}, explained in a sentence or two." for i in range(40)]
+    )
+
+
+def _candidate(text: str) -> dict:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": len(text) // 4, "totalTokenCount": 1 + len(text) // 4},
+    }
+
+
+def create_app(pages: Optional[List[Tuple[str, str]]], wiki: Latency, llm: Latency) -> FastAPI:
+    app = FastAPI(title="Benchmark stubs")
+    counts: Counter = Counter()
+
+    @lru_cache(maxsize=1024)
+    def page(title: str) -> str:
+        if pages:
+            return pages[zlib.crc32(title.encode()) % len(pages)][1]
+        return synthetic_page(title.replace("_", " "), seed=zlib.crc32(title.encode()))
+
+    @app.get("/wiki/{title}")
+    async def article(title: str):
+        counts["wiki"] += 1
+        await asyncio.sleep(wiki.sample())
+        return HTMLResponse(page(title))
+
+    @app.post("/v1beta/models/{model_action}")
+    async def gemini(model_action: str, request: Request):
+        _, _, action = model_action.partition(":")
+        body = await request.json()
+        prompt = "".join(part.get("text", "") for item in body.get("contents", []) for part in item.get("parts", []))
+        if action == "countTokens":
+            counts["llm_count_tokens"] += 1
+            return JSONResponse({"totalTokens": len(prompt.split())})
+        kind = "quiz" if "JSON" in prompt else "summary"  # quiz prompts carry format instructions
+        counts[f"llm_{kind}"] += 1
+        text = _quiz_text(prompt) if kind == "quiz" else _summary_text(prompt)
+        delay = llm.sample()
+
+        if action != "streamGenerateContent":
+            await asyncio.sleep(delay)
+            return JSONResponse(_candidate(text))
+
+        async def events():
+            size = -(-len(text) // STREAM_CHUNKS)
+            for start in range(0, len(text), size):
+                await asyncio.sleep(delay / STREAM_CHUNKS)
+                yield f"data: {json.dumps(_candidate(text[start:start + size]))}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_stats")
+    async def stats():
+        return dict(counts)
+
+    @app.post("/_reset")
+    async def reset():
+        counts.clear()
+        return {}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--pages", help="directory of saved article HTML files")
+    parser.add_argument("--wiki-latency", type=float, default=80, help="ms")
+    parser.add_argument("--wiki-jitter", type=float, default=30, help="ms")
+    parser.add_argument("--llm-latency", type=float, default=1500, help="ms")
+    parser.add_argument("--llm-jitter", type=float, default=500, help="ms")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    pages = load_pages(args.pages) if args.pages else None
+    app = create_app(
+        pages,
+        Latency(args.wiki_latency, args.wiki_jitter, args.seed),
+        Latency(args.llm_latency, args.llm_jitter, args.seed + 1),
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
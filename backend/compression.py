@@ -0,0 +1,55 @@
+"""
+Transparent compression for large text columns.
+
+Values are stored as one codec marker byte followed by the compressed UTF-8
+text, so rows written with different codecs can be read side by side. New
+values use BLOB_CODEC: ``zstd`` when the optional ``zstandard`` package is
+installed, else ``zlib``. Reading a zstd value requires ``zstandard``.
+"""
+import os
+import zlib
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib only
+    zstandard = None
+
+BLOB_CODEC = os.getenv("BLOB_CODEC", "zstd" if zstandard is not None else "zlib")
+
+ZLIB, ZSTD = b"z", b"s"
+
+if zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor(level=9)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+def pack_text(text: str, codec: str = BLOB_CODEC) -> bytes:
+    data = text.encode("utf-8")
+    if codec == "zstd" and zstandard is not None:
+        return ZSTD + _zstd_compressor.compress(data)
+    return ZLIB + zlib.compress(data, 6)
+
+
+def unpack_text(blob: bytes) -> str:
+    marker, data = blob[:1], blob[1:]
+    if marker == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This value is zstd-compressed; install the zstandard package to read it")
+        return _zstd_decompressor.decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed in a binary column."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        return pack_text(value) if value is not None else None
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        return unpack_text(value) if value is not None else None
@@ -0,0 +1,85 @@
+"""
+Article content store.
+
+Scraped article text is kept in ``article_contents``, compressed and addressed
+by the SHA-256 of the text, so identical text is stored once no matter how many
+quizzes are generated from it. The generate path reads a fresh copy from here
+instead of fetching and parsing the page again; entries older than
+CONTENT_TTL_SECONDS (default one week) are re-fetched.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import ArticleContent
+
+CONTENT_TTL_SECONDS = int(os.getenv("CONTENT_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def load_fresh_content(session: AsyncSession, article_key: str) -> Optional[Tuple[str, str, str]]:
+    """Return (title, text, content_hash) of the newest stored copy of an
+    article if it is within the TTL, else None."""
+    result = await session.execute(
+        select(ArticleContent)
+        .where(ArticleContent.article_key == article_key)
+        .order_by(ArticleContent.fetched_at.desc())
+        .limit(1)
+    )
+    row = result.scalar_one_or_none()
+    if row is None or row.fetched_at < utcnow() - timedelta(seconds=CONTENT_TTL_SECONDS):
+        return None
+    return row.title, row.text, row.content_hash
+
+
+async def load_content_text(session: AsyncSession, digest: str) -> Optional[str]:
+    result = await session.execute(
+        select(ArticleContent.text).where(ArticleContent.content_hash == digest)
+    )
+    return result.scalar_one_or_none()
+
+
+async def load_content(session: AsyncSession, digest: str) -> Optional[Tuple[str, str]]:
+    """Return (title, text) of the stored copy with this hash, if any."""
+    result = await session.execute(
+        select(ArticleContent.title, ArticleContent.text).where(ArticleContent.content_hash == digest)
+    )
+    row = result.one_or_none()
+    return (row.title, row.text) if row is not None else None
+
+
+async def save_content(session: AsyncSession, article_key: str, title: str, text: str) -> str:
+    """Store article text (once per distinct text) and return its hash.
+
+    Re-fetching unchanged text only refreshes ``fetched_at``. The caller commits.
+    """
+    digest = content_hash(text)
+    result = await session.execute(
+        select(ArticleContent).options(defer(ArticleContent.text)).where(ArticleContent.content_hash == digest)
+    )
+    row = result.scalar_one_or_none()
+    if row is None:
+        session.add(ArticleContent(
+            content_hash=digest,
+            article_key=article_key,
+            title=title,
+            text=text,
+            fetched_at=utcnow(),
+        ))
+    else:
+        row.article_key = article_key
+        row.title = title
+        row.fetched_at = utcnow()
+    return digest
@@ -1,4 +1,5 @@
 import os
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
@@ -7,7 +8,54 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./quiz.db")
 
-engine: AsyncEngine = create_async_engine(DATABASE_URL, future=True, echo=False)
+# "production" applies the backend-specific settings below; "basic" keeps the
+# driver defaults.
+DB_PROFILE = os.getenv("DB_PROFILE", "production")
+
+# SQLite: WAL lets readers proceed while a quiz is being written, NORMAL sync
+# is durable in WAL mode except on power loss, and writers wait for the lock
+# instead of failing with "database is locked".
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+
+# Server databases (MySQL/PostgreSQL): connection pool per worker process.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # below MySQL's wait_timeout
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def create_engine_for(url: str, profile: str = DB_PROFILE) -> AsyncEngine:
+    """Create an async engine for ``url`` configured for ``profile``."""
+    if profile != "production":
+        return create_async_engine(url, future=True, echo=False)
+    if url.startswith("sqlite"):
+        sqlite_engine = create_async_engine(
+            url, future=True, echo=False,
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        event.listen(sqlite_engine.sync_engine, "connect", _sqlite_pragmas)
+        return sqlite_engine
+    return create_async_engine(
+        url, future=True, echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,  # drop connections the server closed while idle
+    )
+
+
+engine: AsyncEngine = create_engine_for(DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -15,4 +63,4 @@ Base = declarative_base()
 
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -0,0 +1,210 @@
+"""
+Streaming article extractor.
+
+Feeds the page HTML to an incremental ``html.parser.HTMLParser`` in chunks and
+stops as soon as the title and the paragraph-text budget have been collected,
+instead of building a full BeautifulSoup tree of a multi-hundred-KB page.
+Reference markers, edit links, infoboxes/navboxes, tables, scripts and styles
+are skipped while streaming.
+
+Produces the same shape as the original BeautifulSoup extractor
+(``scraper.extract_article_soup``): paragraphs of the ``mw-parser-output``
+container joined by blank lines, cut to ``budget`` characters plus ``...``.
+With ``sections=True`` (full-article mode) the h2/h3 headings are kept as
+marker paragraphs (see article_sections.py) and trailing sections such as
+References or See also are dropped.
+"""
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+from article_sections import heading_line
+
+CHUNK_SIZE = 16 * 1024
+
+# Elements whose content never belongs to article text
+SKIP_TAGS = {"script", "style", "noscript", "table", "figure", "math"}
+SKIP_CLASSES = {
+    "reference", "mw-editsection", "infobox", "navbox", "reflist", "references",
+    "mw-references-wrap", "hatnote", "noprint", "mw-empty-elt", "shortdescription",
+    "metadata", "sidebar", "thumb",
+}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+# Block elements that implicitly close an open <p>
+BLOCK_TAGS = {"p", "div", "table", "ul", "ol", "dl", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre"}
+# Section headings kept in sections mode, and the level of their marker
+SECTION_TAGS = {"h2": 2, "h3": 3}
+# h2 sections that hold no article prose
+END_SECTIONS = {
+    "references", "see also", "external links", "notes", "further reading",
+    "bibliography", "sources", "citations", "footnotes", "notes and references",
+}
+
+
+class _Done(Exception):
+    pass
+
+
+class _ArticleParser(HTMLParser):
+    def __init__(self, budget: int, sections: bool = False) -> None:
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.sections = sections
+        self.title: Optional[str] = None
+        self.page_title: Optional[str] = None
+        self.paragraphs: List[str] = []      # inside mw-parser-output
+        self.loose_paragraphs: List[str] = []  # anywhere, used if no container
+        self.text_size = 0
+        self.all_text: List[str] = []        # visible text for very short pages
+        self.all_text_size = 0
+
+        self._container_depth = 0  # open <div>s since entering mw-parser-output
+        self._container_done = False
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._heading_tag: Optional[str] = None
+        self._heading_depth = 0
+        self._heading_parts: List[str] = []
+        self._section_tag: Optional[str] = None
+        self._section_parts: List[str] = []
+        self._in_end_section = False
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._para: Optional[List[str]] = None
+        self._para_in_container = False
+
+    # -- helpers ---------------------------------------------------------------
+    def _close_paragraph(self) -> None:
+        if self._para is None:
+            return
+        text = " ".join("".join(self._para).split())
+        self._para = None
+        if not text:
+            return
+        if self._para_in_container:
+            if self._in_end_section:
+                return
+            self.paragraphs.append(text)
+            self.text_size += len(text) + 2
+            if self.text_size > self.budget and self.title is not None:
+                raise _Done
+        elif not self._container_done and len(self.loose_paragraphs) < 200:
+            self.loose_paragraphs.append(text)
+
+    def _close_section_heading(self) -> None:
+        level = SECTION_TAGS[self._section_tag]
+        text = " ".join("".join(self._section_parts).split())
+        self._section_tag = None
+        if level == 2:
+            self._in_end_section = text.lower() in END_SECTIONS
+        if not text or self._in_end_section:
+            return
+        marker = heading_line(level, text)
+        self.paragraphs.append(marker)
+        self.text_size += len(marker) + 2
+
+    # -- HTMLParser callbacks ----------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        attributes = dict(attrs)
+        classes = set((attributes.get("class") or "").split())
+
+        if tag in BLOCK_TAGS:
+            self._close_paragraph()
+
+        if tag in SKIP_TAGS or classes & SKIP_CLASSES:
+            if tag not in VOID_TAGS:
+                self._skip_tag, self._skip_depth = tag, 1
+            return
+
+        if tag == "div" and self._container_depth:
+            self._container_depth += 1
+
+        if attributes.get("id") == "firstHeading":
+            self._heading_tag, self._heading_depth = tag, 1
+        elif self._heading_tag == tag:
+            self._heading_depth += 1
+
+        if tag == "title":
+            self._in_title = True
+        elif tag == "div" and "mw-parser-output" in classes and not self._container_depth and not self._container_done:
+            self._container_depth = 1
+        elif tag == "p":
+            self._para = []
+            self._para_in_container = bool(self._container_depth)
+        elif tag in SECTION_TAGS and self.sections and self._container_depth:
+            self._section_tag, self._section_parts = tag, []
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+
+        if tag == "p" or tag in BLOCK_TAGS:
+            self._close_paragraph()
+        if tag == "title":
+            self._in_title = False
+            self.page_title = "".join(self._title_parts).strip() or None
+        if tag == self._section_tag:
+            self._close_section_heading()
+        if self._heading_tag == tag:
+            self._heading_depth -= 1
+            if self._heading_depth == 0:
+                self._heading_tag = None
+                self.title = " ".join("".join(self._heading_parts).split()) or None
+        if tag == "div" and self._container_depth:
+            self._container_depth -= 1
+            if self._container_depth == 0:
+                # Article body finished; nothing after it is article text.
+                self._container_done = True
+                if self.title is not None:
+                    raise _Done
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+        if self._skip_tag is not None:
+            return
+        if self._heading_tag is not None:
+            self._heading_parts.append(data)
+        if self._section_tag is not None:
+            self._section_parts.append(data)
+        if self._para is not None:
+            self._para.append(data)
+        if self.all_text_size < self.budget and data.strip():
+            self.all_text.append(data)
+            self.all_text_size += len(data)
+
+
+def extract_article_fast(html: str, url: str, budget: int = 2000, sections: bool = False) -> Tuple[str, str]:
+    """Return (title, text) for an article, parsing only as much HTML as needed.
+    ``sections`` keeps heading markers in the text (full-article mode)."""
+    parser = _ArticleParser(budget, sections)
+    try:
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+        parser.close()
+        parser._close_paragraph()
+    except _Done:
+        pass
+
+    title = parser.title or parser.page_title or url
+    paragraphs = parser.paragraphs if (parser.paragraphs or parser._container_done) else parser.loose_paragraphs
+    content = "\n\n".join(paragraphs)
+
+    if len(content) > budget:
+        content = content[:budget] + "..."
+    elif len(content) < 200:
+        # fallback to visible text but still limit length
+        content = "\n\n".join(part.strip() for part in parser.all_text)[:budget]
+
+    return title, content
@@ -0,0 +1,349 @@
+"""
+Deterministic quiz engine used when no LLM is configured or the LLM call fails.
+
+The article is tokenized once into an :class:`ArticleIndex` (sentences, their
+content terms, and the document frequency of every term), so building a quiz is
+just a walk over precomputed data. Questions are fill-in-the-blank:
+
+ - sentences are ranked by TF-IDF weight (sentences as documents), and the best
+   ones become questions, in rank order;
+ - the blanked answer is the sentence's most distinctive term: a capitalized
+   name, a number, or a rare content word;
+ - distractors are terms of the same kind from elsewhere in the article with
+   the closest weight, skipping ones that overlap the answer or each other.
+
+Output is a pure function of (title, text): a larger quiz starts with the
+questions of a smaller one, which extra-question generation relies on.
+"""
+import math
+import re
+import zlib
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD = re.compile(r"[a-z][a-z-]+[a-z]")  # lowercased text; three letters or more
+_NAME = re.compile(r"[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_YEAR = re.compile(r"^(1[5-9]|20)\d\d$")
+
+STOPWORDS = frozenset("""
+a about above after again against all also although among an and any are as at be
+became because been before being between both but by can could did do does during
+each either first for from further had has have having he her here his how however
+i if in into is it its itself just many may more most much must not now of on once
+one only or other our out over own same several she should since so some such than
+that the their them then there these they this those through thus to too two under
+until up upon very was we were what when where whether which while who whom whose
+why will with within without would you
+often later still even well like known used made include includes including rather
+""".split())
+
+MIN_SENTENCE = 40
+MAX_SENTENCE = 300
+BLANK = "_____"
+
+# Kinds of answer terms; distractors are drawn from the same kind first
+NAME, NUMBER, WORD = "name", "number", "word"
+KIND_BOOST = {NAME: 1.5, NUMBER: 1.2, WORD: 1.0}
+
+# Questions for slots left when the article has too few usable sentences
+TEMPLATES = [
+    "What is a key characteristic of {title}?",
+    "According to the article, {title} is primarily known for what?",
+    "Which statement best describes {title}?",
+    "What important aspect of {title} is mentioned?",
+    "How is {title} typically defined or characterized?",
+    "What significant feature of {title} does the article highlight?",
+    "Which of the following is associated with {title}?",
+    "What notable information about {title} is provided?",
+    "According to the content, {title} can be described as what?",
+    "What key point about {title} is emphasized in the article?",
+    "What fundamental principle underlies {title}?",
+    "Which aspect makes {title} particularly important?",
+    "How does {title} relate to its field of study?",
+    "What distinguishes {title} from similar concepts?",
+    "What practical application of {title} is discussed?",
+]
+# Past the templates, questions name a key term (or, lacking one, a number)
+# so a quiz never repeats a question
+EXTRA_TEMPLATE = "What does the article say about {term} in relation to {title}?"
+
+
+class ArticleIndex:
+    """Tokenized article: sentences with their terms, term weights, and per kind
+    the terms grouped by weight for distractor lookup."""
+
+    __slots__ = ("title", "paragraphs", "sentences", "sentence_terms", "idf", "ranking", "pools", "surface")
+
+    def __init__(self, title: str, text: str) -> None:
+        self.title = title
+        self.paragraphs = [p.strip() for p in text.split("\n\n") if len(p.strip()) > 50]
+
+        excluded = STOPWORDS | set(_WORD.findall(title.lower()))
+        self.sentences: List[str] = []
+        self.sentence_terms: List[List[Tuple[str, str]]] = []  # (term, kind) per sentence
+        self.surface: Dict[str, str] = {}  # name term -> spelling; others are spelled as stored
+        df: Counter = Counter()
+        kinds: Dict[str, str] = {}
+
+        for paragraph in self.paragraphs:
+            for sentence in _SENTENCE_END.split(paragraph):
+                sentence = sentence.strip()
+                if sentence.endswith("...") or not MIN_SENTENCE <= len(sentence) <= MAX_SENTENCE:
+                    continue  # truncated at the text budget, or unwieldy as a question
+                # dicts keep first-seen order, so output does not depend on hashing
+                terms = dict.fromkeys(_WORD.findall(sentence.lower()), WORD)
+                for word in excluded.intersection(terms):
+                    del terms[word]
+                terms.update(dict.fromkeys(_NUMBER.findall(sentence), NUMBER))
+                for match in _NAME.finditer(sentence):
+                    words = match.group().split()
+                    if match.start() == 0 and len(words) == 1:
+                        continue  # just the capitalized first word, already a word
+                    while words and words[0].lower() in STOPWORDS:
+                        words.pop(0)  # "The Netherlands" -> "Netherlands"
+                    phrase = " ".join(words)
+                    if len(phrase) > 3 and not {w.lower() for w in words} <= excluded:
+                        terms[phrase.lower()] = NAME
+                        self.surface.setdefault(phrase.lower(), phrase)
+                if not terms:
+                    continue
+                self.sentences.append(sentence)
+                self.sentence_terms.append(list(terms.items()))
+                df.update(terms.keys())
+                kinds.update(terms)
+
+        n = len(self.sentences)
+        idf = self.idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+
+        # Sentences by TF-IDF weight, best first (ties: article order)
+        scores = [
+            (-sum(idf[term] for term, _ in terms) / math.sqrt(len(terms)), i)
+            for i, terms in enumerate(self.sentence_terms)
+        ]
+        self.ranking = [i for _, i in sorted(scores)]
+
+        # kind -> (sorted distinct weights, weight -> (terms, terms by 2-letter ending))
+        groups: Dict[str, Dict[float, Tuple[List[str], Dict[str, List[str]]]]] = {NAME: {}, NUMBER: {}, WORD: {}}
+        for term in sorted(kinds):
+            kind = kinds[term]
+            if kind == WORD and len(term) < 5:
+                continue
+            group = groups[kind].get(idf[term])
+            if group is None:
+                group = groups[kind][idf[term]] = ([], {})
+            group[0].append(term)
+            same_ending = group[1].get(term[-2:])
+            if same_ending is None:
+                group[1][term[-2:]] = [term]
+            else:
+                same_ending.append(term)
+        self.pools = {kind: (sorted(group), group) for kind, group in groups.items()}
+
+    def answer_term(self, i: int, used: set) -> Optional[Tuple[str, str]]:
+        """The most distinctive not-yet-used term of sentence ``i``."""
+        best, best_weight = None, 0.0
+        for term, kind in self.sentence_terms[i]:
+            if term in used or (kind == WORD and len(term) < 5):
+                continue
+            weight = self.idf[term] * KIND_BOOST[kind]
+            if weight > best_weight:
+                best, best_weight = (term, kind), weight
+        return best
+
+    def _candidates(self, term: str, kind: str) -> Iterable[str]:
+        """Terms of ``kind`` nearest in weight to ``term`` first; within a weight,
+        the same word ending (e.g. -ly, -ed) first. Each question starts at a
+        different point of a group, so questions do not share one set of options."""
+        weights, groups = self.pools[kind]
+        target = self.idf[term]
+        ending = term[-2:]
+        salt = zlib.crc32(term.encode())
+        hi = bisect_left(weights, target)
+        lo = hi - 1
+        while lo >= 0 or hi < len(weights):
+            if hi < len(weights) and (lo < 0 or weights[hi] - target <= target - weights[lo]):
+                terms, by_ending = groups[weights[hi]]
+                hi += 1
+            else:
+                terms, by_ending = groups[weights[lo]]
+                lo -= 1
+            same = by_ending.get(ending, ())
+            start = salt % len(same) if same else 0
+            yield from same[start:]
+            yield from same[:start]
+            start = salt % len(terms)
+            for candidate in terms[start:] + terms[:start]:
+                if candidate[-2:] != ending:
+                    yield candidate
+
+    def distractors(self, term: str, kind: str, sentence: str, count: int = 3) -> List[str]:
+        """Terms of the same kind with the closest weight that are not in the
+        sentence and do not overlap the answer or each other."""
+        lower_sentence = sentence.lower()
+        chosen: List[str] = []
+
+        for pool_kind in (kind, NAME, WORD) if kind != WORD else (WORD, NAME):
+            for candidate in self._candidates(term, pool_kind) if self.pools[pool_kind][0] else ():
+                if candidate in lower_sentence:
+                    continue
+                for other in chosen + [term]:
+                    if candidate in other or other in candidate or candidate[:5] == other[:5]:
+                        break  # near-identical options give the answer away
+                else:
+                    chosen.append(candidate)
+                    if len(chosen) == count:
+                        return [self.surface.get(c, c) for c in chosen]
+            if kind == NUMBER:
+                chosen.extend(_number_distractors(term, lower_sentence, chosen, count - len(chosen)))
+                if len(chosen) == count:
+                    break
+        return [self.surface.get(c, c) for c in chosen[:count]]
+
+    def key_terms(self, limit: int = 15) -> List[str]:
+        """Highest-weighted names, for the template questions."""
+        weights, groups = self.pools[NAME]
+        names = [name for weight in reversed(weights) for name in groups[weight][0]]
+        return [self.surface[name] for name in names[:limit]]
+
+
+def _number_distractors(number: str, sentence: str, taken: List[str], count: int) -> List[str]:
+    if count <= 0 or not number.isdigit():
+        return []
+    value = int(number)
+    offsets = (-10, 7, 23, -35, 4, -2) if _YEAR.match(number) else (value or 1, -(value // 2) or 2, value * 2 or 3)
+    out = []
+    for offset in offsets:
+        candidate = str(abs(value + offset))
+        if candidate != number and candidate not in sentence and candidate not in taken and candidate not in out:
+            out.append(candidate)
+        if len(out) == count:
+            break
+    return out
+
+
+@lru_cache(maxsize=64)
+def build_index(title: str, text: str) -> ArticleIndex:
+    """Index an article; cached, since a cache miss and a later extension of the
+    same quiz index the same text."""
+    return ArticleIndex(title, text)
+
+
+def _summaries(index: ArticleIndex) -> Tuple[str, str]:
+    """(summary, study_summary): overview paragraph plus first-sentence key points."""
+    paras = index.paragraphs
+    summary_parts = []
+    if paras:
+        summary_parts.append(f"**Overview**: {paras[0][:400]}...")
+        key_points = []
+        for para in paras[1:4]:
+            if len(para) > 100:
+                first_sentence = para.split('.')[0].strip()
+                if len(first_sentence) > 20:
+                    key_points.append(first_sentence)
+        if key_points:
+            summary_parts.append("**Key Points**: " + " | ".join(key_points[:3]))
+    study_summary = "\n\n".join(summary_parts) if summary_parts else f"This article provides comprehensive information about {index.title}."
+    summary = summary_parts[0] if summary_parts else f"Information about {index.title}"
+    return summary, study_summary
+
+
+def _blank_out(sentence: str, surface: str) -> str:
+    """Blank the whole-word occurrence of ``surface`` ("cat" not inside
+    "category"); a substring only if it never stands alone (e.g. "1990s")."""
+    match = re.search(r"(?<!\w)" + re.escape(surface) + r"(?!\w)", sentence, re.IGNORECASE)
+    if match is not None:
+        start = match.start()
+    else:
+        start = sentence.lower().find(surface.lower())
+    return sentence[:start] + BLANK + sentence[start + len(surface):]
+
+
+def _template_question(index: ArticleIndex, i: int, key_terms: Sequence[str]) -> Dict[str, Any]:
+    title = index.title
+    fillers = ["technical aspects", "practical applications", "innovative approaches"]
+    # Each question starts at a different key term, so options vary per question
+    shift = i % len(key_terms) if key_terms else 0
+    rotated = list(key_terms[shift:]) + list(key_terms[:shift])
+    terms = rotated[:4] + fillers[max(0, len(key_terms) - 1):]
+    if key_terms:
+        options = [
+            f"It involves {terms[0]} and related processes",
+            f"It focuses on {terms[1]}",
+            f"It emphasizes {terms[2]}",
+            f"It represents {terms[3]}",
+        ]
+    else:
+        options = [
+            f"A fundamental aspect of {title}",
+            f"An advanced feature of {title}",
+            f"A basic component of {title}",
+            f"A specialized area of {title}",
+        ]
+    if i < len(TEMPLATES):
+        question = TEMPLATES[i].format(title=title)
+    else:
+        extra = i - len(TEMPLATES)
+        term = key_terms[extra] if extra < len(key_terms) else f"point {extra + 1}"
+        question = EXTRA_TEMPLATE.format(term=term, title=title)
+    return {"question": question, "options": options, "answer": options[0]}
+
+
+def generate_quiz(title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
+    """Build a quiz dict (title, summary, study_summary, questions) from article text."""
+    index = build_index(title, text)
+    summary, study_summary = _summaries(index)
+
+    questions: List[Dict[str, Any]] = []
+    used: set = set()
+    for i in index.ranking:
+        if len(questions) == question_count:
+            break
+        picked = index.answer_term(i, used)
+        if picked is None:
+            continue
+        term, kind = picked
+        sentence = index.sentences[i]
+        wrong = index.distractors(term, kind, sentence)
+        if len(wrong) < 3:
+            continue
+        used.add(term)
+        answer = index.surface.get(term, term)
+        options = list(wrong)
+        options.insert(zlib.crc32(sentence.encode()) % 4, answer)
+        questions.append({
+            "question": f"Fill in the blank: {_blank_out(sentence, answer)}",
+            "options": options,
+            "answer": answer,
+        })
+
+    key_terms = index.key_terms() if len(questions) < question_count else []
+    while len(questions) < question_count:
+        questions.append(_template_question(index, len(questions), key_terms))
+
+    return {"title": title, "summary": summary, "study_summary": study_summary, "questions": questions}
+
+
+def _generate_packed(args: Tuple[str, str, int]) -> Dict[str, Any]:
+    return generate_quiz(*args)
+
+
+def generate_quizzes(
+    articles: Iterable[Tuple[str, str]],
+    question_count: int = 10,
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """Generate quizzes for many (title, text) articles, in input order.
+
+    ``workers > 1`` spreads the articles over that many processes, which pays
+    off for large batches since generation is pure CPU work.
+    """
+    jobs = [(title, text, question_count) for title, text in articles]
+    if workers <= 1 or len(jobs) < 2:
+        return [_generate_packed(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_generate_packed, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
@@ -0,0 +1,165 @@
+"""
+Native asyncio Wikipedia fetcher.
+
+One long-lived httpx.AsyncClient keeps TCP/TLS connections alive across
+requests, a per-host semaphore bounds concurrency, transient failures are
+retried with exponential backoff, and pages are revalidated with conditional
+requests (ETag / Last-Modified) so an unchanged article costs a 304.
+
+Only the validators and the hash of what the caller stored from a page are
+kept per URL, not the page itself: the caller records that hash with
+``remember`` once it has stored the page's text, and a later 304 raises
+:class:`NotModified` carrying it. Malformed or non-HTTP URLs fail at once
+instead of being retried.
+
+Works against any base URL, so it can be pointed at a local stub server
+(see tests/test_fetcher.py).
+"""
+import asyncio
+import os
+import random
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class NotModified(Exception):
+    """The page is unchanged since the fetch whose stored result is ``digest``."""
+
+    def __init__(self, url: str, digest: str) -> None:
+        super().__init__(f"{url} not modified")
+        self.url = url
+        self.digest = digest
+
+
+class WikipediaFetcher:
+    """Fetch article HTML over a shared keep-alive connection pool.
+
+    Errors are raised as plain ``Exception`` with user-facing messages, matching
+    ``scraper.scrape_wikipedia``.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = int(os.getenv("FETCH_MAX_PER_HOST", "8")),
+        retries: int = int(os.getenv("FETCH_RETRIES", "2")),
+        backoff: float = float(os.getenv("FETCH_BACKOFF", "0.5")),
+        max_delay: float = float(os.getenv("FETCH_MAX_DELAY", "10")),
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        validator_cache_size: int = int(os.getenv("FETCH_VALIDATOR_CACHE", "256")),
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.validator_cache_size = validator_cache_size
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_per_host * 8, max_keepalive_connections=max_per_host * 4),
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # key -> (etag, last_modified, digest of the stored result or None)
+        self._validators: "OrderedDict[str, tuple]" = OrderedDict()
+        self.not_modified = 0
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        sem = self._host_limits.get(host)
+        if sem is None:
+            sem = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return sem
+
+    def _validate(self, key: str, resp: httpx.Response) -> None:
+        etag = resp.headers.get("etag")
+        last_modified = resp.headers.get("last-modified")
+        if not (etag or last_modified) or self.validator_cache_size <= 0:
+            self._validators.pop(key, None)
+            return
+        self._validators[key] = (etag, last_modified, None)
+        self._validators.move_to_end(key)
+        while len(self._validators) > self.validator_cache_size:
+            self._validators.popitem(last=False)
+
+    def remember(self, key: str, digest: str) -> None:
+        """Record the hash of what the caller stored from the page last fetched
+        under ``key``; the next fetch of it is then conditional."""
+        entry = self._validators.get(key)
+        if entry is not None:
+            self._validators[key] = (entry[0], entry[1], digest)
+
+    def forget(self, key: str) -> None:
+        self._validators.pop(key, None)
+
+    def _retry_delay(self, attempt: int, resp: Optional[httpx.Response]) -> float:
+        if resp is not None:
+            retry_after = resp.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_delay)
+        return min(self.backoff * (2 ** attempt) * (0.5 + random.random()), self.max_delay)
+
+    async def fetch(self, url: str, key: Optional[str] = None) -> str:
+        """Return the HTML body of ``url``.
+
+        ``key`` (default: the URL) names the result the caller derives from the
+        page; raises NotModified if the page has not changed since the fetch
+        under the same key whose result was recorded with ``remember``.
+        """
+        key = key or url
+        headers = {}
+        cached = self._validators.get(key)
+        if cached and cached[2] is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        else:
+            cached = None
+
+        try:
+            host_limit = self._host_limit(url)
+        except ValueError as e:
+            raise Exception(f"Invalid article URL: {str(e)}")
+        for attempt in range(self.retries + 1):
+            resp = None
+            # Hold the host slot only for the request itself, not the backoff
+            async with host_limit:
+                try:
+                    resp = await self._client.get(url, headers=headers)
+                except (httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+                    raise Exception(f"Invalid article URL: {str(e)}")
+                except httpx.TimeoutException:
+                    if attempt == self.retries:
+                        raise Exception("Wikipedia request timed out. Please try again or use a different article.")
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise Exception("Failed to connect to Wikipedia. Please check your internet connection.")
+            if resp is not None:
+                if resp.status_code == 304 and cached:
+                    self.not_modified += 1
+                    self._validators.move_to_end(key)
+                    raise NotModified(url, cached[2])
+                if resp.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    break
+            await asyncio.sleep(self._retry_delay(attempt, resp))
+
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Error accessing Wikipedia: {str(e)}")
+        self._validate(key, resp)
+        return resp.text
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,42 @@
+"""
+In-process fan-out of newly persisted quizzes to history subscribers (SSE).
+
+Each subscriber owns a small bounded queue. A subscriber that falls behind is
+dropped rather than allowed to grow memory; its stream ends and the browser's
+EventSource reconnects with Last-Event-ID, resuming from the database.
+``last_id`` is the highest quiz id published so far, which lets one poller per
+process pick up quizzes persisted by other processes for all subscribers.
+"""
+import asyncio
+from typing import Any, Dict, Set
+
+
+class HistoryBroadcaster:
+    def __init__(self, queue_size: int = 100) -> None:
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, item: Dict[str, Any]) -> None:
+        """Deliver a history item to every subscriber without blocking."""
+        self.last_id = max(self.last_id, item["id"])
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Too slow: close its stream so it resumes from the DB instead.
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
@@ -0,0 +1,377 @@
+"""
+Bounded, database-backed generation job queue.
+
+Jobs are rows in ``generation_jobs`` so they survive a restart: a clean shutdown
+puts its in-flight jobs back in the queue, and a sweep at startup and every
+JOB_SWEEP_INTERVAL seconds requeues jobs left ``running`` for longer than
+JOB_STALE_SECONDS (by a process that died) and deletes finished jobs older than
+JOB_RETENTION_SECONDS. A fixed pool of worker tasks claims queued jobs in priority
+order (higher first, then oldest) with a conditional UPDATE, so several server
+processes can share one queue. Idle workers sleep until a submit in this
+process wakes them; a single poller per process checks every JOB_POLL_INTERVAL
+seconds for jobs queued by other processes. When JOB_QUEUE_SIZE jobs are already waiting,
+``submit`` raises :class:`QueueFull` with a Retry-After estimate. Generations
+that run outside the queue (streamed ones) take a slot through ``admitted``.
+
+Waiters in the submitting process are woken directly; otherwise ``wait`` falls
+back to polling the job row. A job submitted in this process runs in a copy of
+the submitter's context, so context variables such as the request's stage
+timings (see metrics.py) follow it into the worker.
+"""
+import asyncio
+import contextlib
+import contextvars
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, or_, select, update
+
+from content_store import utcnow
+from database import AsyncSessionLocal
+from models import GenerationJob
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+JOB_SWEEP_INTERVAL = float(os.getenv("JOB_SWEEP_INTERVAL", "60"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Generation queue is full")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    def __init__(
+        self,
+        handler: Callable[[GenerationJob], Awaitable[Dict[str, Any]]],
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_SIZE,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        stale_after: int = JOB_STALE_SECONDS,
+        sweep_interval: float = JOB_SWEEP_INTERVAL,
+        retention: int = JOB_RETENTION_SECONDS,
+    ) -> None:
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.sweep_interval = sweep_interval
+        self.retention = retention
+        self._tasks = []
+        self._active = set()  # ids of jobs this process is running
+        self._wakeup = asyncio.Event()
+        self._idle = 0  # workers waiting on _wakeup
+        # Serializes the count-then-insert in submit so a burst cannot overshoot
+        self._submit_lock = asyncio.Lock()
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._contexts: Dict[str, contextvars.Context] = {}
+        self._avg_seconds = 10.0  # moving average job duration for Retry-After
+        self.queued = 0
+        self.running = 0
+        self.outside = 0  # admitted work running outside the queue
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    # -- lifecycle ----------------------------------------------------------
+    async def start(self) -> None:
+        await self.sweep()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._sweeper()))
+        self._tasks.append(loop.create_task(self._poller()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs cut off mid-run go back in the queue for the next process
+        if self._active:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(GenerationJob)
+                    .where(GenerationJob.id.in_(self._active), GenerationJob.status == "running")
+                    .values(status="queued", started_at=None)
+                )
+                await session.commit()
+            self._active.clear()
+
+    async def sweep(self) -> Tuple[int, int]:
+        """Requeue stale running jobs, delete expired finished ones and forget
+        local waiters of jobs that finished elsewhere; returns (requeued, deleted)."""
+        now = utcnow()
+        stale = now - timedelta(seconds=self.stale_after)
+        expired = now - timedelta(seconds=self.retention)
+        async with AsyncSessionLocal() as session:
+            requeued = await session.execute(
+                update(GenerationJob)
+                .where(
+                    GenerationJob.status == "running",
+                    or_(GenerationJob.started_at.is_(None), GenerationJob.started_at < stale),
+                )
+                .values(status="queued", started_at=None)
+            )
+            deleted = await session.execute(
+                delete(GenerationJob)
+                .where(GenerationJob.status.in_(TERMINAL_STATUSES), GenerationJob.finished_at < expired)
+            )
+            await session.commit()
+            # Jobs submitted here but run by another process (or deleted)
+            # would otherwise keep their waiter until the next restart
+            pending = list(self._waiters)
+            if pending:
+                open_ids = set((await session.execute(
+                    select(GenerationJob.id)
+                    .where(GenerationJob.id.in_(pending), GenerationJob.status.notin_(TERMINAL_STATUSES))
+                )).scalars())
+                for job_id in pending:
+                    if job_id not in open_ids and job_id not in self._active:
+                        self._waiters.pop(job_id, None)
+                        self._contexts.pop(job_id, None)
+        if requeued.rowcount:
+            self._wakeup.set()
+        return requeued.rowcount, deleted.rowcount
+
+    async def _sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Generation job sweep failed")
+
+    async def _poller(self) -> None:
+        """Wake the idle workers when another process queued a job; one
+        query per interval instead of one per idle worker."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._idle:
+                continue
+            try:
+                async with AsyncSessionLocal() as session:
+                    queued = (await session.execute(
+                        select(GenerationJob.id).where(GenerationJob.status == "queued").limit(1)
+                    )).first()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Polling for generation jobs failed")
+                continue
+            if queued is not None:
+                self._wakeup.set()
+
+    # -- producer side --------------------------------------------------------
+    async def submit(
+        self, url: str, extra_questions: bool = False, refresh: bool = False, priority: int = 0, full_article: bool = False,
+    ) -> str:
+        """Queue a job and return its id; raises QueueFull when the queue is full."""
+        async with self._submit_lock, AsyncSessionLocal() as session:
+            await self._check_capacity(session)
+            job_id = uuid.uuid4().hex
+            # Register before committing so a worker cannot finish it unseen
+            self._waiters[job_id] = asyncio.get_running_loop().create_future()
+            self._contexts[job_id] = contextvars.copy_context()
+            job = GenerationJob(
+                id=job_id,
+                status="queued",
+                priority=priority,
+                url=url,
+                extra_questions=extra_questions,
+                refresh=refresh,
+                full_article=full_article,
+                created_at=utcnow(),
+            )
+            session.add(job)
+            try:
+                await session.commit()
+            except Exception:
+                self._waiters.pop(job_id, None)
+                self._contexts.pop(job_id, None)
+                raise
+        self.queued += 1
+        self._wakeup.set()
+        return job_id
+
+    @contextlib.asynccontextmanager
+    async def admitted(self) -> AsyncIterator[None]:
+        """Hold a queue slot for work run outside the queue; raises QueueFull
+        like ``submit`` when the queue is full."""
+        async with self._submit_lock, AsyncSessionLocal() as session:
+            await self._check_capacity(session)
+            self.outside += 1
+        try:
+            yield
+        finally:
+            self.outside -= 1
+
+    async def _check_capacity(self, session) -> None:
+        self.queued = (await session.execute(
+            select(func.count()).select_from(GenerationJob).where(GenerationJob.status == "queued")
+        )).scalar_one()
+        if self.queued + self.outside >= self.max_queued:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    def retry_after(self) -> int:
+        """Seconds until roughly one queue slot frees up."""
+        return max(1, math.ceil(self._avg_seconds / max(self.workers, 1)))
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as session:
+            job = await session.get(GenerationJob, job_id)
+            return job.to_dict() if job else None
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Wait for a job to finish. Returns (job, result): ``result`` is the
+        handler's return value when the job ran in this process, else None.
+        ``job`` is the current row, which is not terminal on timeout. A job that
+        failed in this process re-raises the handler's exception."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        future = self._waiters.get(job_id)
+        while True:
+            remaining = self.poll_interval if deadline is None else min(self.poll_interval, deadline - time.monotonic())
+            if future is not None and remaining > 0:
+                try:
+                    result = await asyncio.wait_for(asyncio.shield(future), remaining)
+                    return await self.get(job_id), result
+                except asyncio.TimeoutError:
+                    pass
+            elif remaining > 0:
+                await asyncio.sleep(remaining)
+            job = await self.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                self._waiters.pop(job_id, None)
+                self._contexts.pop(job_id, None)
+                return job, None
+            if deadline is not None and time.monotonic() >= deadline:
+                # Nobody waits on it any more; a local run needs neither
+                self._waiters.pop(job_id, None)
+                self._contexts.pop(job_id, None)
+                return job, None
+
+    # -- consumer side --------------------------------------------------------
+    async def _claim(self) -> Optional[GenerationJob]:
+        async with AsyncSessionLocal() as session:
+            while True:
+                job = (await session.execute(
+                    select(GenerationJob)
+                    .where(GenerationJob.status == "queued")
+                    .order_by(GenerationJob.priority.desc(), GenerationJob.created_at)
+                    .limit(1)
+                )).scalar_one_or_none()
+                if job is None:
+                    return None
+                claimed = await session.execute(
+                    update(GenerationJob)
+                    .where(GenerationJob.id == job.id, GenerationJob.status == "queued")
+                    .values(status="running", started_at=utcnow())
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    await session.refresh(job)
+                    return job
+
+    async def _finish(self, job_id: str, quiz_id: Optional[int], error: Optional[str]) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(
+                    status="failed" if error else "succeeded",
+                    quiz_id=quiz_id,
+                    error=error,
+                    finished_at=utcnow(),
+                )
+            )
+            await session.commit()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # e.g. "database is locked": keep the worker alive and retry
+                logger.exception("Claiming a generation job failed")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if job is None:
+                # Woken by submit, a sweep that requeued jobs, or the poller
+                self._wakeup.clear()
+                self._idle += 1
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    self._idle -= 1
+                continue
+            await self._run(job)
+
+    async def _run(self, job: GenerationJob) -> None:
+        self.queued = max(0, self.queued - 1)
+        self.running += 1
+        start = time.monotonic()
+        future = self._waiters.pop(job.id, None)
+        context = self._contexts.pop(job.id, None)
+        quiz_id, error = None, None
+        self._active.add(job.id)
+        try:
+            if context is None:
+                result = await self.handler(job)
+            else:
+                # A task copies the context current at its creation (the
+                # context= argument needs Python 3.11)
+                result = await context.run(asyncio.get_running_loop().create_task, self.handler(job))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            # Wake the waiter first: it must not depend on the row update below
+            if future is not None and not future.done():
+                future.set_exception(e)
+                future.exception()  # mark retrieved if nobody is waiting
+        else:
+            self.completed += 1
+            quiz_id = result.get("id")
+            if future is not None and not future.done():
+                future.set_result(result)
+        finally:
+            self.running -= 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - start)
+        try:
+            await self._finish(job.id, quiz_id, error)
+        except Exception:
+            # The row stays "running" until the stale sweep requeues it; the
+            # rerun then finds the persisted quiz in the cache
+            logger.exception("Recording the outcome of generation job %s failed", job.id)
+        self._active.discard(job.id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "outside": self.outside,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "max_queued": self.max_queued,
+        }
@@ -1,197 +1,54 @@
 """
 LLM integration to convert scraped text into a JSON quiz.
 Tries to use LangChain + Google Gemini if configured; otherwise falls back to a deterministic generator.
+
+The Google SDK and LangChain are imported only when an API key is configured,
+and then off the event loop (see QuizGeneratorService.preload), so importing
+this module stays cheap and fallback-only deployments never load them.
 """
 import os
 import json
-from typing import Dict, Any
+import logging
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+import fallback_engine
+import metrics
+from article_sections import Chunk, merge_questions, plan_chunks, questions_per_chunk, split_sections
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+# "parallel": quiz and study summary are two concurrent LLM calls.
+# "single": one call returns both (the quiz prompt already asks for a study_summary).
+GENERATION_MODE = os.getenv("GENERATION_MODE", "parallel")
+# Base URL of a Gemini-compatible REST API (e.g. a proxy, or the stub server
+# in benchmarks/stub_servers.py); empty for Google's endpoint.
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+# Full-article mode (see QuizGeneratorService.generate): article chunk size in
+# estimated tokens, chunk calls in flight per quiz, and the most chunks used
+# per article -- with 8 chunks and 4 in flight, any article costs at most two
+# rounds of chunk calls, however long it is.
+FULL_ARTICLE_CHUNK_TOKENS = int(os.getenv("FULL_ARTICLE_CHUNK_TOKENS", "1000"))
+FULL_ARTICLE_CONCURRENCY = int(os.getenv("FULL_ARTICLE_CONCURRENCY", "4"))
+FULL_ARTICLE_MAX_CHUNKS = int(os.getenv("FULL_ARTICLE_MAX_CHUNKS", "8"))
 
 
 def _fallback_generate(title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
-    """Enhanced generator for content-relevant quiz creation.
+    """Deterministic quiz built from the article text itself (see fallback_engine)."""
+    metrics.GENERATIONS.inc(generator="fallback")
+    with metrics.stage("fallback"):
+        return fallback_engine.generate_quiz(title, text, question_count)
 
-    Creates questions based on actual webpage content with detailed study summary.
-    """
-    # Enhanced summary: multiple paragraphs for comprehensive overview
-    paras = [p.strip() for p in text.split("\n\n") if p.strip() and len(p.strip()) > 50]
-    
-    # Create comprehensive summary
-    summary_parts = []
-    if paras:
-        # Main overview from first paragraph
-        summary_parts.append(f"**Overview**: {paras[0][:400]}...")
-        
-        # Key points from other paragraphs
-        if len(paras) > 1:
-            key_points = []
-            for para in paras[1:4]:  # Use up to 3 more paragraphs
-                if len(para) > 100:
-                    # Extract first sentence as key point
-                    first_sentence = para.split('.')[0].strip()
-                    if len(first_sentence) > 20:
-                        key_points.append(first_sentence)
-            
-            if key_points:
-                summary_parts.append(f"**Key Points**: " + " | ".join(key_points[:3]))
-    
-    # Create study summary
-    study_summary = "\n\n".join(summary_parts) if summary_parts else f"This article provides comprehensive information about {title}."
 
-    # Enhanced question generation with content analysis
-    questions = []
-    qcount = question_count
-    
-    # Extract meaningful sentences and key terms
-    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 20 and len(s.strip()) < 200]
-    
-    # Extract key terms (nouns, important words)
-    import re
-    key_terms = []
-    for sentence in sentences[:8]:
-        # Simple keyword extraction - look for capitalized words and important terms
-        words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', sentence)
-        key_terms.extend([w for w in words if len(w) > 3 and w.lower() != title.lower()])
-    
-    # Remove duplicates and limit
-    key_terms = list(dict.fromkeys(key_terms))[:15]
-    
-    # Question templates for variety and speed - expanded for 15+ questions
-    templates = [
-        "What is a key characteristic of {title}?",
-        "According to the article, {title} is primarily known for what?", 
-        "Which statement best describes {title}?",
-        "What important aspect of {title} is mentioned?",
-        "How is {title} typically defined or characterized?",
-        "What significant feature of {title} does the article highlight?",
-        "Which of the following is associated with {title}?",
-        "What notable information about {title} is provided?",
-        "According to the content, {title} can be described as what?",
-        "What key point about {title} is emphasized in the article?",
-        "What fundamental principle underlies {title}?",
-        "Which aspect makes {title} particularly important?",
-        "How does {title} relate to its field of study?",
-        "What distinguishes {title} from similar concepts?",
-        "What practical application of {title} is discussed?"
-    ]
-    
-    for i in range(qcount):
-        # Create content-specific questions
-        if i < len(sentences):
-            sentence = sentences[i]
-            
-            # Extract content-based question
-            if any(word in sentence.lower() for word in ['is', 'was', 'are', 'were']):
-                # Definition/description type question
-                q_text = f"According to the article, what is true about {title}?"
-            elif any(word in sentence.lower() for word in ['used', 'apply', 'application']):
-                # Usage/application type question  
-                q_text = f"How is {title} typically used or applied?"
-            elif any(word in sentence.lower() for word in ['develop', 'create', 'invent']):
-                # Development/history type question
-                q_text = f"Regarding the development of {title}, what does the article mention?"
-            else:
-                # General knowledge question
-                template_index = i % len(templates)
-                q_text = templates[template_index].format(title=title)
-            
-            # Create realistic answer options based on actual content
-            # Correct answer from actual content
-            correct_parts = sentence.split()[:12]  # First part of sentence
-            correct_answer = " ".join(correct_parts) + ("..." if len(sentence.split()) > 12 else "")
-            
-            # Generate plausible distractors
-            if i < len(key_terms) and len(key_terms) > 3:
-                # Use key terms to create plausible wrong answers
-                wrong_options = [
-                    f"It primarily focuses on {key_terms[i % len(key_terms)]} and related technologies",
-                    f"It is mainly associated with {key_terms[(i+1) % len(key_terms)]} research",
-                    f"It represents advances in {key_terms[(i+2) % len(key_terms)]} methodology"
-                ]
-            else:
-                # Generic but topic-relevant wrong answers
-                wrong_options = [
-                    f"It is an outdated approach to {title.lower()} implementation",
-                    f"It represents theoretical concepts not yet practically applied",
-                    f"It focuses solely on commercial applications of {title.lower()}"
-                ]
-            
-            # Combine correct and wrong answers
-            options = [correct_answer] + wrong_options
-            answer = correct_answer
-            
-        else:
-            # Fallback to template-based questions for remaining slots
-            template_index = i % len(templates)
-            q_text = templates[template_index].format(title=title)
-            
-            # Use key terms if available for better options
-            if key_terms:
-                options = [
-                    f"It involves {key_terms[0]} and related processes",
-                    f"It focuses on {key_terms[1] if len(key_terms) > 1 else 'technical aspects'}",
-                    f"It emphasizes {key_terms[2] if len(key_terms) > 2 else 'practical applications'}",
-                    f"It represents {key_terms[3] if len(key_terms) > 3 else 'innovative approaches'}"
-                ]
-            else:
-                # Generic options as last resort
-                options = [
-                    f"A fundamental aspect of {title}",
-                    f"An advanced feature of {title}",
-                    f"A basic component of {title}",
-                    f"A specialized area of {title}"
-                ]
-            
-            answer = options[0]
-        
-        questions.append({"question": q_text, "options": options, "answer": answer})
-
-    return {
-        "title": title, 
-        "summary": summary_parts[0] if summary_parts else f"Information about {title}",
-        "study_summary": study_summary,
-        "questions": questions
-    }
-
-
-def generate_quiz_with_llm(title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
-    """Attempt to generate a quiz using LangChain + Gemini. Falls back to deterministic generator.
-
-    Returns a dict matching the schema in the spec.
-    """
-    # Try to import LangChain and call Gemini
-    try:
-        if not GEMINI_API_KEY:
-            return _fallback_generate(title, text, question_count)
-            
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        from langchain.prompts import ChatPromptTemplate
-        from langchain_core.output_parsers import JsonOutputParser
-        from langchain_core.pydantic_v1 import BaseModel, Field
-        from typing import List
-
-        # Define the expected structure
-        class QuizQuestion(BaseModel):
-            question: str = Field(description="The quiz question")
-            options: List[str] = Field(description="Four answer options")
-            answer: str = Field(description="The correct answer from options")
-
-        class QuizOutput(BaseModel):
-            title: str = Field(description="Article title")
-            summary: str = Field(description="Brief summary of the article")
-            study_summary: str = Field(description="Detailed study summary for learning")
-            questions: List[QuizQuestion] = Field(description="List of quiz questions")
-
-        parser = JsonOutputParser(pydantic_object=QuizOutput)
-
-        prompt = ChatPromptTemplate.from_template(
-            """You are an educational AI that converts Wikipedia content into a JSON-structured quiz.
+QUIZ_PROMPT = """You are an educational AI that converts Wikipedia content into a JSON-structured quiz.
             
             Create a quiz from the following article about "{title}":
             
@@ -209,42 +66,35 @@ def generate_quiz_with_llm(title: str, text: str, question_count: int = 10) -> D
             
             {format_instructions}
             """
-        )
-
-        llm = ChatGoogleGenerativeAI(
-            model=GEMINI_MODEL,
-            google_api_key=GEMINI_API_KEY,
-            temperature=0.7
-        )
-
-        chain = prompt | llm | parser
-
-        result = chain.invoke({
-            "title": title,
-            "article_text": text[:1500],  # Shorter text for faster processing
-            "question_count": question_count,
-            "format_instructions": parser.get_format_instructions()
-        })
-
-        return result
 
-    except Exception as e:
-        # If any import/configuration error happens, fall back to deterministic generator
-        print(f"LLM generation failed: {e}, using fallback")
-        return _fallback_generate(title, text, question_count)
+EXTRA_QUESTIONS_PROMPT = """You are an educational AI extending an existing multiple choice quiz about "{title}".
+            
+            Article:
+            
+            {article_text}
+            
+            The quiz already contains these questions:
+            {existing_questions}
+            
+            Generate exactly {question_count} NEW multiple choice questions with 4 options each.
+            Do not repeat or rephrase any existing question; cover other facts from the article.
+            
+            {format_instructions}
+            """
 
+CHUNK_QUESTIONS_PROMPT = """You are an educational AI writing part of a multiple choice quiz about "{title}".
+            
+            This excerpt covers the article's sections: {sections}
+            
+            {article_text}
+            
+            Generate exactly {question_count} multiple choice questions with 4 options each.
+            Ask only about facts stated in this excerpt, covering different parts of it.
+            
+            {format_instructions}
+            """
 
-def _generate_study_summary_with_ai(title: str, text: str) -> str:
-    """Generate enhanced study summary using Gemini AI based on topic name."""
-    print(f"Generating study summary for: {title}")
-    print(f"API Key available: {bool(GEMINI_API_KEY)}")
-    
-    if not GEMINI_API_KEY:
-        return f"**Study Material**: This article provides comprehensive information about {title}."
-    
-    genai.configure(api_key=GEMINI_API_KEY)
-    
-    prompt = f"""
+STUDY_SUMMARY_PROMPT = """
     Create a comprehensive study summary about "{title}". Generate educational content based on your knowledge of this topic.
 
     IMPORTANT: DO NOT use any ** asterisks, markdown formatting, or special characters. Use only plain text.
@@ -262,15 +112,11 @@ def _generate_study_summary_with_ai(title: str, text: str) -> str:
     Make it completely clean and readable as plain text only.
     """
 
-    # Initialize the model
-    model = genai.GenerativeModel(model_name="gemini-2.0-flash-exp")
+GEMINI_SUMMARY_MODEL = os.getenv("GEMINI_SUMMARY_MODEL", "gemini-2.0-flash-exp")
 
-    # Generate content
-    response = model.generate_content(prompt)
-    
-    # Clean up the response to remove ALL ** formatting and unwanted characters
-    clean_text = response.text
-    
+
+def _clean_study_summary(clean_text: str) -> str:
+    """Remove markdown the model adds despite being asked not to."""
     # Remove all ** (double asterisks) formatting
     clean_text = clean_text.replace('**', '')
     
@@ -283,16 +129,498 @@ def _generate_study_summary_with_ai(title: str, text: str) -> str:
             line = '- ' + line[2:]  # Replace * with -
         cleaned_lines.append(line)
     
-    clean_text = '\n'.join(cleaned_lines)
-    
-    print(f"Generated summary length: {len(clean_text)}")
-    
-    # Return the cleaned text
-    return clean_text
+    return '\n'.join(cleaned_lines)
+
+
+def _finalize_quiz(quiz: Dict[str, Any], title: str, text: str, study_summary: Optional[str] = None) -> Dict[str, Any]:
+    """Ensure the minimal schema; ``study_summary`` (from the dedicated call)
+    wins over one produced by the quiz call."""
+    if "title" not in quiz:
+        quiz["title"] = title
+    if "summary" not in quiz:
+        quiz["summary"] = (text.split("\n\n")[0][:400]) if text else ""
+    if study_summary:
+        quiz["study_summary"] = study_summary
+    elif not quiz.get("study_summary"):
+        quiz["study_summary"] = f"This article provides comprehensive information about {title}."
+    if "questions" not in quiz or not isinstance(quiz["questions"], list):
+        quiz["questions"] = []
+    return quiz
+
+
+async def _timed(timings: Dict[str, float], stage: str, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        seconds = time.perf_counter() - start
+        timings[stage] = round(seconds * 1000, 1)
+        metrics.record_stage(stage, seconds)
+
+
+class _ChatSummaryModel:
+    """The slice of ``genai.GenerativeModel`` used for study summaries, backed
+    by a LangChain chat model. Used with GEMINI_API_ENDPOINT, since the
+    google.generativeai SDK has no async calls over its REST transport."""
+
+    def __init__(self, llm) -> None:
+        self.llm = llm
+
+    def generate_content(self, prompt: str):
+        return SimpleNamespace(text=self.llm.invoke(prompt).content)
+
+    async def generate_content_async(self, prompt: str):
+        return SimpleNamespace(text=(await self.llm.ainvoke(prompt)).content)
+
+    async def count_tokens_async(self, prompt: str):
+        return await asyncio.to_thread(self.llm.get_num_tokens, prompt)
+
+
+def _question_key(question: Dict[str, Any]) -> str:
+    return " ".join(str(question.get("question", "")).lower().split())
+
+
+class QuizGeneratorService:
+    """Long-lived quiz generator.
+
+    The LangChain prompt | model | parser chain, its format instructions and the
+    Gemini study-summary model are built once and reused, keeping their HTTP
+    connection pools warm. The objects hold no per-request state, so one
+    instance is shared by all concurrent requests. Without an API key (or if the
+    LangChain stack cannot be loaded) every call uses the deterministic fallback.
+
+    Building imports the SDKs, so it is deferred: ``preload()`` runs it in a
+    worker thread (the API starts it in the background at startup), and every
+    call waits for it to finish first, building on demand if nobody preloaded.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GEMINI_API_KEY,
+        model: str = GEMINI_MODEL,
+        summary_model: str = GEMINI_SUMMARY_MODEL,
+        mode: str = GENERATION_MODE,
+        endpoint: str = GEMINI_API_ENDPOINT,
+    ) -> None:
+        self.api_key = api_key
+        self.model = model
+        self.summary_model_name = summary_model
+        self.mode = mode
+        self.endpoint = endpoint
+        self.llm = None
+        self.chain = None
+        self.format_instructions = ""
+        self.extra_chain = None
+        self.extra_format_instructions = ""
+        self.chunk_chain = None
+        self.summary_model = None
+        self.built = not api_key
+        self._build_lock = threading.Lock()
+        self._build_task: Optional[asyncio.Future] = None
+
+    def ensure_built(self) -> None:
+        """Build the LLM clients if that has not happened yet (blocking)."""
+        if self.built:
+            return
+        with self._build_lock:
+            if not self.built:
+                start = time.perf_counter()
+                self._build()
+                self.built = True
+                logger.info("LLM clients loaded in %.0f ms", (time.perf_counter() - start) * 1000)
+
+    async def preload(self) -> None:
+        """Build the LLM clients in a worker thread; concurrent callers share one build."""
+        if self.built:
+            return
+        if self._build_task is None:
+            self._build_task = asyncio.ensure_future(asyncio.to_thread(self.ensure_built))
+        await asyncio.shield(self._build_task)
+
+    def _build(self) -> None:
+        try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            from langchain_core.prompts import ChatPromptTemplate
+            from langchain_core.output_parsers import JsonOutputParser
+            from pydantic import BaseModel, Field
+            from typing import List
+
+            # Define the expected structure
+            class QuizQuestion(BaseModel):
+                question: str = Field(description="The quiz question")
+                options: List[str] = Field(description="Four answer options")
+                answer: str = Field(description="The correct answer from options")
+
+            class QuizOutput(BaseModel):
+                title: str = Field(description="Article title")
+                summary: str = Field(description="Brief summary of the article")
+                study_summary: str = Field(description="Detailed study summary for learning")
+                questions: List[QuizQuestion] = Field(description="List of quiz questions")
+
+            class ExtraQuestionsOutput(BaseModel):
+                questions: List[QuizQuestion] = Field(description="List of new quiz questions")
+
+            parser = JsonOutputParser(pydantic_object=QuizOutput)
+            prompt = ChatPromptTemplate.from_template(QUIZ_PROMPT)
+            llm = ChatGoogleGenerativeAI(
+                model=self.model,
+                google_api_key=self.api_key,
+                temperature=0.7,
+                **({"base_url": self.endpoint} if self.endpoint else {}),
+            )
+            self.format_instructions = parser.get_format_instructions()
+            self.llm = llm
+            self.chain = prompt | llm | parser
+
+            extra_parser = JsonOutputParser(pydantic_object=ExtraQuestionsOutput)
+            self.extra_format_instructions = extra_parser.get_format_instructions()
+            self.extra_chain = ChatPromptTemplate.from_template(EXTRA_QUESTIONS_PROMPT) | llm | extra_parser
+            self.chunk_chain = ChatPromptTemplate.from_template(CHUNK_QUESTIONS_PROMPT) | llm | extra_parser
+        except Exception as e:
+            logger.warning("LLM chain unavailable: %s, using fallback", e)
+
+        try:
+            if self.endpoint:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                self.summary_model = _ChatSummaryModel(ChatGoogleGenerativeAI(
+                    model=self.summary_model_name, google_api_key=self.api_key, base_url=self.endpoint,
+                ))
+            else:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self.api_key)
+                self.summary_model = genai.GenerativeModel(model_name=self.summary_model_name)
+        except Exception as e:
+            logger.warning("Study summary model unavailable: %s", e)
+
+    def _chain_input(self, title: str, text: str, question_count: int) -> Dict[str, Any]:
+        return {
+            "title": title,
+            "article_text": text[:1500],  # Shorter text for faster processing
+            "question_count": question_count,
+            "format_instructions": self.format_instructions,
+        }
+
+    # -- quiz ----------------------------------------------------------------
+    def generate_quiz_with_llm(self, title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
+        self.ensure_built()
+        if self.chain is None:
+            return _fallback_generate(title, text, question_count)
+        try:
+            quiz = self.chain.invoke(self._chain_input(title, text, question_count))
+            metrics.GENERATIONS.inc(generator="llm")
+            return quiz
+        except Exception as e:
+            logger.warning("LLM generation failed: %s, using fallback", e)
+            return _fallback_generate(title, text, question_count)
+
+    async def agenerate_quiz_with_llm(self, title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
+        await self.preload()
+        if self.chain is None:
+            return _fallback_generate(title, text, question_count)
+        try:
+            quiz = await self.chain.ainvoke(self._chain_input(title, text, question_count))
+            metrics.GENERATIONS.inc(generator="llm")
+            return quiz
+        except Exception as e:
+            logger.warning("LLM generation failed: %s, using fallback", e)
+            return _fallback_generate(title, text, question_count)
+
+    # -- study summary -------------------------------------------------------
+    def generate_study_summary(self, title: str, text: str) -> str:
+        self.ensure_built()
+        if self.summary_model is None:
+            return f"**Study Material**: This article provides comprehensive information about {title}."
+        response = self.summary_model.generate_content(STUDY_SUMMARY_PROMPT.format(title=title))
+        return _clean_study_summary(response.text)
+
+    async def agenerate_study_summary(self, title: str, text: str) -> str:
+        await self.preload()
+        if self.summary_model is None:
+            return f"**Study Material**: This article provides comprehensive information about {title}."
+        response = await self.summary_model.generate_content_async(STUDY_SUMMARY_PROMPT.format(title=title))
+        return _clean_study_summary(response.text)
+
+    # -- full article ----------------------------------------------------------
+    async def _chunk_questions(self, title: str, chunk: Chunk, question_count: int) -> List[Dict[str, Any]]:
+        """Map step: questions about one chunk, from the fallback (in a worker
+        thread) if the call fails."""
+        if self.chunk_chain is not None:
+            try:
+                result = await self.chunk_chain.ainvoke({
+                    "title": title,
+                    "sections": ", ".join(chunk.sections),
+                    "article_text": chunk.text,
+                    "question_count": question_count,
+                    "format_instructions": self.extra_format_instructions,
+                })
+                questions = [q for q in result.get("questions", []) if isinstance(q, dict)]
+                if questions:
+                    metrics.GENERATIONS.inc(generator="llm")
+                    return questions
+            except Exception as e:
+                logger.warning("LLM chunk generation failed: %s, using fallback", e)
+        return (await asyncio.to_thread(_fallback_generate, title, chunk.text, question_count))["questions"]
+
+    async def agenerate_full_article_quiz(self, title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
+        """Quiz covering a whole article (text with section markers, see
+        article_sections.py) by map-reduce: the article is packed into
+        FULL_ARTICLE_CHUNK_TOKENS chunks, each chunk gets its own questions call
+        (FULL_ARTICLE_CONCURRENCY at a time), and the answers are merged
+        round-robin across chunks without duplicates. Chunk count is capped at
+        FULL_ARTICLE_MAX_CHUNKS, so latency stays flat as articles grow. The
+        offline engine's work on the article (fallbacks, top-up, header fields)
+        runs in worker threads: on a whole article it takes tens of ms."""
+        await self.preload()
+        chunks = plan_chunks(split_sections(text), FULL_ARTICLE_CHUNK_TOKENS, FULL_ARTICLE_MAX_CHUNKS)
+        if not chunks:
+            return await asyncio.to_thread(_fallback_generate, title, text, question_count)
+        per_chunk = questions_per_chunk(question_count, len(chunks))
+        slots = asyncio.Semaphore(FULL_ARTICLE_CONCURRENCY)
+
+        async def map_chunk(chunk: Chunk) -> List[Dict[str, Any]]:
+            async with slots:
+                return await self._chunk_questions(title, chunk, per_chunk)
+
+        results = await asyncio.gather(*(map_chunk(chunk) for chunk in chunks))
+        questions = merge_questions(results, question_count, _question_key)
+        if len(questions) < question_count:
+            # Chunks overlapped too much; top up from the whole article
+            seen = {_question_key(q) for q in questions}
+            plain = "\n\n".join(chunk.text for chunk in chunks)
+            extra = (await asyncio.to_thread(_fallback_generate, title, plain, question_count * 2))["questions"]
+            questions += [q for q in extra if _question_key(q) not in seen][:question_count - len(questions)]
+
+        # Header fields from the lead, as the fallback writes them; the summary
+        # call (or _finalize_quiz) supplies the rest.
+        lead = await asyncio.to_thread(fallback_engine.generate_quiz, title, chunks[0].text, 0)
+        logger.debug("Full-article quiz %r: %d chunk(s), %d question(s) each", title, len(chunks), per_chunk)
+        return {"title": title, "summary": chunks[0].text.split("\n\n")[0][:400],
+                "study_summary": lead["study_summary"], "questions": questions}
+
+    # -- entrypoints ---------------------------------------------------------
+    async def generate(self, title: str, text: str, extra_questions: bool = False, full_article: bool = False) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Generate a quiz and its study summary without serial LLM round trips.
+
+        In "parallel" mode the quiz and study-summary calls run concurrently, so
+        a cache miss costs max(quiz, summary) instead of their sum; in "single"
+        mode only the quiz call is made and its own study_summary is kept. A
+        failed summary call keeps whatever summary the quiz call produced.
+        ``full_article`` quizzes the whole article (see
+        agenerate_full_article_quiz) instead of its opening text.
+
+        Returns (quiz, timings) where timings maps stage name to milliseconds.
+        """
+        await self.preload()
+        question_count = 15 if extra_questions else 10
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        if full_article:
+            quiz_call = _timed(timings, "full_article_llm", self.agenerate_full_article_quiz(title, text, question_count))
+        else:
+            quiz_call = _timed(timings, "quiz_llm", self.agenerate_quiz_with_llm(title, text, question_count))
+        study_summary = None
+        if self.summary_model is not None and self.mode != "single":
+            quiz, summary = await asyncio.gather(
+                quiz_call,
+                _timed(timings, "study_summary_llm", self.agenerate_study_summary(title, text)),
+                return_exceptions=True,
+            )
+            if isinstance(quiz, BaseException):
+                raise quiz
+            if isinstance(summary, BaseException):
+                logger.warning("Study summary generation failed: %s, keeping quiz summary", summary)
+            else:
+                study_summary = summary
+        else:
+            quiz = await quiz_call
+
+        timings["generate_total"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.debug("Generation timings for %r (%s): %s", title, self.mode, timings)
+        return _finalize_quiz(quiz, title, text, study_summary), timings
+
+    async def astream(self, title: str, text: str, extra_questions: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a quiz as it is generated.
+
+        Yields ``{"type": "meta", "title", "summary"}`` once the header fields are
+        complete, ``{"type": "question", "index", "question"}`` as soon as each
+        question is complete in the LLM's token stream (parsed incrementally by
+        the JSON output parser), ``{"type": "study_summary", ...}`` and finally
+        ``{"type": "quiz", "quiz", "timings"}`` with the finished quiz. If the
+        stream fails part-way, the remaining questions come from the fallback
+        generator.
+        """
+        await self.preload()
+        question_count = 15 if extra_questions else 10
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        def elapsed() -> float:
+            return round((time.perf_counter() - start) * 1000, 1)
+
+        summary_task = None
+        if self.summary_model is not None and self.mode != "single":
+            summary_task = asyncio.ensure_future(
+                _timed(timings, "study_summary_llm", self.agenerate_study_summary(title, text))
+            )
+
+        partial: Dict[str, Any] = {}
+        questions: List[Dict[str, Any]] = []
+        meta_sent = False
+        try:
+            try:
+                if self.chain is None:
+                    raise RuntimeError("LLM not configured")
+                async for partial in self.chain.astream(self._chain_input(title, text, question_count)):
+                    if not isinstance(partial, dict):
+                        continue
+                    streamed = partial.get("questions") or []
+                    if not meta_sent and "questions" in partial:
+                        meta_sent = True
+                        timings["meta"] = elapsed()
+                        yield {"type": "meta", "title": partial.get("title", title), "summary": partial.get("summary", "")}
+                    # A question is complete once the next one has started
+                    while len(questions) < len(streamed) - 1:
+                        questions.append(streamed[len(questions)])
+                        timings.setdefault("first_question", elapsed())
+                        yield {"type": "question", "index": len(questions) - 1, "question": questions[-1]}
+                quiz = dict(partial)
+                metrics.GENERATIONS.inc(generator="llm")
+            except Exception as e:
+                if self.chain is not None:
+                    logger.warning("LLM streaming failed: %s, using fallback", e)
+                quiz = _fallback_generate(title, text, question_count)
+
+            if not meta_sent:
+                yield {"type": "meta", "title": quiz.get("title", title), "summary": quiz.get("summary", "")}
+            for q in (quiz.get("questions") or [])[len(questions):]:
+                questions.append(q)
+                yield {"type": "question", "index": len(questions) - 1, "question": q}
+            timings["quiz_llm"] = elapsed()
+            metrics.record_stage("quiz_llm", timings["quiz_llm"] / 1000)
+            quiz["questions"] = questions
+
+            study_summary = None
+            if summary_task is not None:
+                try:
+                    study_summary = await summary_task
+                except Exception as e:
+                    logger.warning("Study summary generation failed: %s, keeping quiz summary", e)
+        finally:
+            # Client went away mid-stream: do not leave the summary call running
+            if summary_task is not None and not summary_task.done():
+                summary_task.cancel()
+
+        quiz = _finalize_quiz(quiz, title, text, study_summary)
+        yield {"type": "study_summary", "study_summary": quiz["study_summary"]}
+
+        timings["generate_total"] = elapsed()
+        yield {"type": "quiz", "quiz": quiz, "timings": timings}
+
+    async def agenerate_extra_questions(self, title: str, text: str, existing: List[Dict[str, Any]], question_count: int) -> List[Dict[str, Any]]:
+        """Generate ``question_count`` questions that do not duplicate ``existing``.
+
+        When the LLM returns fewer new questions than asked (for instance after
+        repeats of existing ones are dropped), the fallback generator tops them
+        up. It is deterministic, so its next questions are the ones a larger
+        fallback quiz would have had after the existing ones. Fewer than
+        ``question_count`` come back only if even the fallback runs out of
+        distinct questions.
+        """
+        await self.preload()
+        seen = {_question_key(q) for q in existing}
+        fresh: List[Dict[str, Any]] = []
+        if self.extra_chain is not None:
+            try:
+                result = await self.extra_chain.ainvoke({
+                    "title": title,
+                    "article_text": text[:1500],
+                    "existing_questions": "\n".join(f"- {q.get('question', '')}" for q in existing),
+                    "question_count": question_count,
+                    "format_instructions": self.extra_format_instructions,
+                })
+                for q in result.get("questions", []):
+                    if _question_key(q) not in seen:
+                        seen.add(_question_key(q))
+                        fresh.append(q)
+                if fresh:
+                    metrics.GENERATIONS.inc(generator="llm")
+            except Exception as e:
+                logger.warning("LLM extra question generation failed: %s, using fallback", e)
+        if len(fresh) < question_count:
+            # Too few new questions survived de-duplication: top up from the
+            # fallback, skipping questions already in the quiz
+            total = len(existing) + question_count
+            extra = _fallback_generate(title, text, total + len(fresh))["questions"]
+            fresh += [q for q in extra if _question_key(q) not in seen]
+        return fresh[:question_count]
+
+    async def extend(self, base_quiz: Dict[str, Any], text: str, question_count: int) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Grow a cached quiz to ``question_count`` questions, generating only the
+        missing ones; title, summary and study summary are reused."""
+        timings: Dict[str, float] = {}
+        existing = list(base_quiz.get("questions", []))
+        title = base_quiz.get("title", "")
+        new_questions = await _timed(
+            timings, "extra_questions_llm",
+            self.agenerate_extra_questions(title, text, existing, question_count - len(existing)),
+        )
+        quiz = dict(base_quiz, questions=existing + new_questions)
+        logger.debug("Extended quiz %r by %d questions: %s", title, len(new_questions), timings)
+        return quiz, timings
+
+    async def warm_up(self) -> None:
+        """Open each client's connection so the first user after a deploy does
+        not pay for connection setup and lazy SDK initialization. Uses
+        countTokens requests, which are not billed, rather than generating."""
+        await self.preload()
+        start = time.perf_counter()
+        calls = []
+        if self.llm is not None:
+            calls.append(asyncio.to_thread(self.llm.get_num_tokens, "ping"))
+        if self.summary_model is not None:
+            calls.append(self.summary_model.count_tokens_async("ping"))
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        failures = [r for r in results if isinstance(r, BaseException)]
+        logger.info("LLM warm-up: %d call(s), %d failed, %.0f ms", len(calls), len(failures), (time.perf_counter() - start) * 1000)
+
+
+_service: Optional[QuizGeneratorService] = None
+
+
+def get_generator() -> QuizGeneratorService:
+    """Return the process-wide generator service, creating it on first use.
+    The API creates it during startup (see main.startup_event)."""
+    global _service
+    if _service is None:
+        _service = QuizGeneratorService()
+    return _service
+
+
+def init_generator(**kwargs) -> QuizGeneratorService:
+    """(Re)create the process-wide generator service; called at API startup."""
+    global _service
+    _service = QuizGeneratorService(**kwargs)
+    return _service
+
+
+def generate_quiz_with_llm(title: str, text: str, question_count: int = 10) -> Dict[str, Any]:
+    """Attempt to generate a quiz using LangChain + Gemini. Falls back to deterministic generator.
+
+    Returns a dict matching the schema in the spec.
+    """
+    return get_generator().generate_quiz_with_llm(title, text, question_count)
+
+
+def _generate_study_summary_with_ai(title: str, text: str) -> str:
+    """Generate enhanced study summary using Gemini AI based on topic name."""
+    return get_generator().generate_study_summary(title, text)
 
 
 def generate_quiz(title: str, text: str, extra_questions: bool = False) -> Dict[str, Any]:
-    """Main entrypoint used by the API.
+    """Main synchronous entrypoint (scripts/tools; the API uses generate_quiz_async).
     Returns a JSON-serializable dict.
     
     Args:
@@ -300,19 +628,23 @@ def generate_quiz(title: str, text: str, extra_questions: bool = False) -> Dict[
         text: Article content
         extra_questions: If True, generates 15 questions instead of 10
     """
+    service = get_generator()
+    service.ensure_built()
     # Determine question count
     question_count = 15 if extra_questions else 10
     
-    quiz = generate_quiz_with_llm(title, text, question_count)
+    quiz = service.generate_quiz_with_llm(title, text, question_count)
+    study_summary = None
+    if service.summary_model is not None and service.mode != "single":
+        study_summary = service.generate_study_summary(title, text)
+    return _finalize_quiz(quiz, title, text, study_summary)
+
+
+async def generate_quiz_async(title: str, text: str, extra_questions: bool = False, full_article: bool = False) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Async entrypoint used by the API; see QuizGeneratorService.generate."""
+    return await get_generator().generate(title, text, extra_questions, full_article)
 
-    # Ensure minimal schema
-    if "title" not in quiz:
-        quiz["title"] = title
-    if "summary" not in quiz:
-        quiz["summary"] = (text.split("\n\n")[0][:400]) if text else ""
-    # Always generate enhanced study summary using AI (override any existing one)
-    quiz["study_summary"] = _generate_study_summary_with_ai(title, text)
-    if "questions" not in quiz or not isinstance(quiz["questions"], list):
-        quiz["questions"] = []
 
-    return quiz
\ No newline at end of file
+async def extend_quiz_async(base_quiz: Dict[str, Any], text: str, question_count: int) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Async entrypoint for incremental extra questions; see QuizGeneratorService.extend."""
+    return await get_generator().extend(base_quiz, text, question_count)
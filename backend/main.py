@@ -3,33 +3,59 @@ FastAPI application exposing endpoints per spec.
 
 Endpoints:
  - POST /generate_quiz  { url }
- - GET /history
+ - POST /generate_quiz/stream  (same body; NDJSON events as questions are generated)
+ - POST /generate_quiz/batch  { urls: [...] }  (NDJSON, one line per URL as it completes)
+ - POST /jobs  (queue a generation; optionally wait) / GET /jobs/{job_id}
+ - GET /history  (?view=slim&cursor=<id> for the keyset-paginated projection)
+ - GET /history/stream  (server-sent events of newly persisted quizzes)
+ - GET /history/search?q=...  (ranked full-text search, keyset-paginated)
  - GET /quiz/{quiz_id}
+ - GET /metrics  (Prometheus text format)
+
+Every response carries a ``Server-Timing`` header with the time spent in each
+generation stage (see metrics.py).
 
 Uses async SQLAlchemy sessions and stores quizzes in DB.
 """
 import os
 import json
-from typing import Any, Dict
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional
 import asyncio
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+import metrics
 from database import engine, Base, get_db, AsyncSessionLocal
-from models import Quiz
-from scraper import scrape_wikipedia
-from llm_quiz_generator import generate_quiz
+from models import Quiz, QuizPayload, ArticleContent, ArticleAlias, HistoryRevision
+from content_store import load_fresh_content, load_content, load_content_text, save_content
+from migrations import run_migrations
+from singleflight import ReplayBuffer, SingleFlight
+from history_events import HistoryBroadcaster
+from jobs import TERMINAL_STATUSES, JobQueue, QueueFull
+from quiz_cache import CachedQuiz, create_quiz_cache
+from search_index import index_quizzes, search_quizzes
+from payloads import ORJSONResponse, body_key, compressed_bodies, dumps, envelope, is_servable, json_bytes_response
+from fetcher import NotModified, WikipediaFetcher
+from scraper import scrape_wikipedia_async, canonical_article_key, fetch_key, resolved_article_key, quiz_key
+from llm_quiz_generator import init_generator, get_generator, generate_quiz_async, extend_quiz_async
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, func, or_, and_
+
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Wiki Quiz Generator")
+app = FastAPI(title="AI Wiki Quiz Generator", default_response_class=ORJSONResponse)
 
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
 
@@ -39,12 +65,98 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+
+# Opt-in: open the LLM connections right after startup (see warm_up)
+LLM_WARMUP = os.getenv("LLM_WARMUP", "0") not in ("0", "false", "False")
+# Load the LLM SDKs in the background right after startup; otherwise the first
+# generation request loads them.
+LLM_PRELOAD = os.getenv("LLM_PRELOAD", "1") not in ("0", "false", "False")
+
+# Shared keep-alive HTTP client for Wikipedia; closed on shutdown.
+fetcher = WikipediaFetcher()
+
+# Concurrent cache misses for the same (article_key, question_count) share one
+# scrape + generation instead of each paying for their own.
+generate_flights = SingleFlight()
+# Event buffers of flights that stream tokens live (POST /generate_quiz/stream
+# leaders), so later streams for the same key follow along from the start.
+stream_buffers: Dict[Any, ReplayBuffer] = {}
+
+# Separate caps on concurrent Wikipedia fetches and LLM generations, shared by
+# every path (queued jobs, streaming) so spikes cannot stampede either.
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+scrape_slots = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# POST /generate_quiz/batch: stage worker counts bound one batch (the shared
+# slots above still cap the process), and finished quizzes are written up to
+# BATCH_PERSIST_SIZE per transaction.
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "100"))
+BATCH_SCRAPE_WORKERS = int(os.getenv("BATCH_SCRAPE_WORKERS", "4"))
+BATCH_LLM_WORKERS = int(os.getenv("BATCH_LLM_WORKERS", "2"))
+BATCH_PERSIST_SIZE = int(os.getenv("BATCH_PERSIST_SIZE", "20"))
+
+# Bounded, DB-persisted queue that cache misses go through (see jobs.py).
+generation_jobs = JobQueue(lambda job: _run_job(job))
+
+# Interactive requests jump ahead of background (POST /jobs) work.
+INTERACTIVE_PRIORITY = 10
+# POST /generate_quiz gives up waiting after this long and answers 504 with the
+# job id; the job keeps running and can be polled at GET /jobs/{job_id}.
+GENERATE_WAIT_TIMEOUT = float(os.getenv("GENERATE_WAIT_TIMEOUT", "300"))
+
+# Quiz payloads and cache-key -> id lookups kept in front of the database
+# (memory LRU by default, or shared via QUIZ_CACHE_URL; see quiz_cache.py).
+quiz_cache = create_quiz_cache()
+
+# Pushes newly persisted quizzes to /history/stream subscribers.
+history_events = HistoryBroadcaster()
+
+# Idle SSE connections send a keep-alive this often; while anyone is subscribed,
+# one poller per process checks the DB for quizzes persisted by other worker
+# processes at the same interval.
+HISTORY_STREAM_HEARTBEAT = float(os.getenv("HISTORY_STREAM_HEARTBEAT", "15"))
+
+# Read from the components' own counters whenever /metrics is scraped
+metrics.CallbackMetric("quiz_jobs", "Generation jobs by state (queue depth and in progress).",
+                       lambda: {"queued": generation_jobs.queued, "running": generation_jobs.running}, ["state"])
+metrics.CallbackMetric("quiz_jobs_finished_total", "Generation jobs finished in this process, by outcome.",
+                       lambda: {"succeeded": generation_jobs.completed, "failed": generation_jobs.failed,
+                                "rejected": generation_jobs.rejected}, ["outcome"], kind="counter")
+metrics.CallbackMetric("quiz_generations_in_flight", "Distinct quizzes being generated right now.", lambda: len(generate_flights))
+metrics.CallbackMetric("quiz_coalesced_requests_total", "Requests that joined an in-flight generation instead of starting one.",
+                       lambda: generate_flights.coalesced, kind="counter")
+metrics.CallbackMetric("quiz_read_cache_total", "quiz_cache lookups by result.",
+                       lambda: {"hit": quiz_cache.stats().get("hits", 0), "miss": quiz_cache.stats().get("misses", 0)},
+                       ["result"], kind="counter")
+metrics.CallbackMetric("compressed_bodies_total", "Compressed response body lookups by result.",
+                       lambda: {"hit": compressed_bodies.hits, "miss": compressed_bodies.misses}, ["result"], kind="counter")
 
 
 class GenerateRequest(BaseModel):
     url: str  # Changed from HttpUrl to str for more flexibility
     extra_questions: bool = False  # Add 5 extra questions if True
+    refresh: bool = False  # Ignore cached quiz and stored article text; re-fetch
+    full_article: bool = False  # Cover every section, not just the opening text (slower)
+
+
+class JobRequest(GenerateRequest):
+    priority: int = 0  # higher runs first
+    wait: bool = False  # block until the job finishes (up to timeout seconds)
+    timeout: float = 60.0
+
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+    extra_questions: bool = False
+    refresh: bool = False
+    full_article: bool = False
+    include_quiz: bool = False  # put each quiz in its result line, not just the id
 
 
 @app.on_event("startup")
@@ -52,6 +164,27 @@ async def startup_event():
     # Create tables if they don't exist
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
+
+    # The LLM chain and clients are built once, in the background (importing
+    # the SDKs takes a while) so the server starts accepting traffic
+    # immediately; requests that need them meanwhile wait for the build.
+    generator = init_generator()
+    if generator.api_key and (LLM_PRELOAD or LLM_WARMUP):
+        asyncio.get_running_loop().create_task(generator.warm_up() if LLM_WARMUP else generator.preload())
+
+    await generation_jobs.start()
+
+    async with AsyncSessionLocal() as session:
+        history_events.last_id = (await session.execute(select(func.max(Quiz.id)))).scalar() or 0
+    asyncio.get_running_loop().create_task(_poll_history())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await generation_jobs.stop()
+    await fetcher.aclose()
+    await quiz_cache.aclose()
 
 
 @app.get("/")
@@ -59,81 +192,1032 @@ async def root():
     return {"message": "AI Wiki Quiz Generator API"}
 
 
+async def _find_cached_quiz(session: AsyncSession, article_key: str, question_count: int):
+    """Return (row, quiz) for a usable cached quiz, or (row, None) if the row for
+    this cache key exists but cannot be served as-is. One unique-index probe."""
+    result = await session.execute(
+        select(Quiz).where(Quiz.article_key == article_key, Quiz.question_count == question_count)
+    )
+    existing = result.scalar_one_or_none()
+    return existing, _cached_quiz_data(existing)
+
+
+def _cached_quiz_data(row: Optional[Quiz]) -> Optional[Dict[str, Any]]:
+    """The stored quiz of a row if it can be served from cache, else None."""
+    # Only serve rows that also carry a study_summary
+    if row and is_servable(row.full_quiz_data):
+        try:
+            return json.loads(row.full_quiz_data)
+        except Exception:
+            pass  # If cached data is invalid, regenerate and overwrite it
+    return None
+
+
+def _cached_quiz_entry(row) -> CachedQuiz:
+    """A row's quiz_cache entry. Cache hits splice the stored JSON into
+    responses unparsed, so it is checked here, once per fill: a corrupt row is
+    served as ``{"title": ...}`` like before splicing (and, lacking a
+    study_summary, is regenerated by generate_quiz)."""
+    quiz_json = row.full_quiz_data
+    if quiz_json:
+        try:
+            json.loads(quiz_json)
+        except ValueError:
+            quiz_json = dumps({"title": row.title})
+    return CachedQuiz(
+        row.id,
+        row.url,
+        row.title,
+        row.date_generated.isoformat() if row.date_generated else None,
+        quiz_json,
+    )
+
+
+def _select_quiz_json():
+    """The columns of a CachedQuiz, with the quiz JSON from quiz_payloads."""
+    return (
+        select(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated, QuizPayload.quiz_data.label("full_quiz_data"))
+        .select_from(Quiz)
+        .outerjoin(QuizPayload, QuizPayload.quiz_id == Quiz.id)
+    )
+
+
+async def _resolve_aliases(keys: List[str]) -> Dict[str, str]:
+    """Map canonical article keys to the key of the article each redirects to
+    (itself unless a fetch has shown it to be a redirect; see _load_article)."""
+    resolved: Dict[str, str] = {}
+    for key in keys:
+        target = await quiz_cache.get_alias(key)
+        if target is not None:
+            resolved[key] = target
+    missing = [key for key in keys if key not in resolved]
+    if missing:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(ArticleAlias.alias_key, ArticleAlias.article_key).where(ArticleAlias.alias_key.in_(missing))
+            )
+            found = dict(result.all())
+        for key in missing:
+            resolved[key] = found.get(key, key)
+            await quiz_cache.put_alias(key, resolved[key])
+    return resolved
+
+
+async def _article_key(url: str, full_article: bool = False) -> str:
+    """Cache key for a quiz on ``url``, with known redirects resolved."""
+    key = canonical_article_key(url)
+    return quiz_key((await _resolve_aliases([key]))[key], full_article)
+
+
+async def _find_cached_quiz_json(article_key: str, question_count: int) -> Optional[CachedQuiz]:
+    """A servable cached quiz with its JSON undecoded, or None. Served from
+    quiz_cache when possible; otherwise loads only the needed columns."""
+    quiz_id, generation = await quiz_cache.get_quiz_id(article_key, question_count)
+    if quiz_id is None:
+        # Each entry is filled from a read made after its cache lookup (see
+        # quiz_cache.py), so the id and the quiz are looked up separately
+        async with AsyncSessionLocal() as session:
+            quiz_id = (await session.execute(
+                select(Quiz.id).where(Quiz.article_key == article_key, Quiz.question_count == question_count)
+            )).scalar_one_or_none()
+        if quiz_id is None:
+            return None
+        await quiz_cache.put_quiz_id(article_key, question_count, quiz_id, generation)
+    cached = await _load_quiz_json(quiz_id)
+    if cached is None or not is_servable(cached.quiz_json):
+        return None
+    return cached
+
+
+async def _load_quiz_json(quiz_id: int) -> Optional[CachedQuiz]:
+    """A quiz by id with its JSON undecoded, via quiz_cache."""
+    cached, generation = await quiz_cache.get_quiz(quiz_id)
+    if cached is not None:
+        return cached
+    async with AsyncSessionLocal() as session:
+        row = (await session.execute(_select_quiz_json().where(Quiz.id == quiz_id))).one_or_none()
+    if row is None:
+        return None
+    cached = _cached_quiz_entry(row)
+    await quiz_cache.put_quiz(cached, generation)
+    return cached
+
+
+def _cached_quiz_body(quiz_id: int, quiz_json: str) -> bytes:
+    """POST /generate_quiz cache-hit body, spliced from the stored JSON."""
+    return envelope(quiz_json, id=quiz_id, cached=True)
+
+
+def _precompress_cached_quiz(quiz_id: int, quiz_json: str) -> None:
+    """Compress a newly stored quiz's cache-hit body before its first hit."""
+    compressed_bodies.precompress(body_key("generate", quiz_id, quiz_json), _cached_quiz_body(quiz_id, quiz_json))
+
+
 @app.post("/generate_quiz")
-async def generate_quiz_endpoint(payload: GenerateRequest):
+async def generate_quiz_endpoint(payload: GenerateRequest, request: Request):
     url = payload.url
+    question_count = 15 if payload.extra_questions else 10
+
+    # Check if we already have this quiz cached in database for speed; the
+    # stored JSON is sent as-is, without decoding and re-encoding it.
+    with metrics.stage("cache_lookup"):
+        article_key = await _article_key(url, payload.full_article)
+        cached = None if payload.refresh else await _find_cached_quiz_json(article_key, question_count)
+    if not payload.refresh:
+        metrics.CACHE_LOOKUPS.inc(endpoint="generate_quiz", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return json_bytes_response(
+                request,
+                _cached_quiz_body(cached.id, cached.quiz_json),
+                key=body_key("generate", cached.id, cached.quiz_json),
+            )
+
+    if (article_key, question_count, payload.refresh) in generate_flights:
+        metrics.mark("coalesced")
+    result = await generate_flights.do(
+        (article_key, question_count, payload.refresh),
+        lambda: _submit_and_wait(payload, INTERACTIVE_PRIORITY),
+    )
+    return dict(result)
+
+
+def _queue_full(e: QueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many quizzes are being generated. Please retry shortly.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 
-    # Check if we already have this quiz cached in database for speed
-    # Include extra_questions in cache logic to avoid returning wrong question count
+async def _submit_job(payload: GenerateRequest, priority: int) -> str:
+    try:
+        return await generation_jobs.submit(payload.url, payload.extra_questions, payload.refresh, priority, payload.full_article)
+    except QueueFull as e:
+        raise _queue_full(e)
+
+
+async def _job_response(job: Dict[str, Any], result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Response body for a finished job, loading the quiz if it ran elsewhere."""
+    if result is not None:
+        return result
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"] or "Failed to generate quiz")
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Quiz).where(Quiz.url == url).limit(1))
-        existing = result.scalar_one_or_none()
-        if existing and existing.full_quiz_data:
-            try:
-                cached_quiz = json.loads(existing.full_quiz_data)
-                # Only use cache if question count matches what user requested AND has study_summary
-                expected_count = 15 if payload.extra_questions else 10
-                if (len(cached_quiz.get('questions', [])) == expected_count and 
-                    'study_summary' in cached_quiz):
-                    return {"quiz": cached_quiz, "id": existing.id, "cached": True}
-            except:
-                pass  # If cached data is invalid, continue with fresh generation
+        row = await session.get(Quiz, job["quiz_id"])
+        return {"quiz": json.loads(row.full_quiz_data), "id": row.id, "cached": False}
+
+
+async def _submit_and_wait(payload: GenerateRequest, priority: int) -> Dict[str, Any]:
+    """Queue a generation and wait for it; used by POST /generate_quiz."""
+    job_id = await _submit_job(payload, priority)
+    job, result = await generation_jobs.wait(job_id, GENERATE_WAIT_TIMEOUT)
+    if result is None and (job is None or job["status"] not in TERMINAL_STATUSES):
+        raise HTTPException(
+            status_code=504,
+            detail=f"Quiz generation is taking longer than expected; poll /jobs/{job_id} for the result",
+            headers={"Location": f"/jobs/{job_id}"},
+        )
+    return await _job_response(job, result)
+
+
+async def _run_job(job) -> Dict[str, Any]:
+    """Job handler: serve from cache if another job already produced the quiz,
+    otherwise generate and persist it."""
+    question_count = 15 if job.extra_questions else 10
+    article_key = await _article_key(job.url, job.full_article)
+    if job.started_at is not None:
+        metrics.record_stage("queue_wait", max(0.0, (job.started_at - job.created_at).total_seconds()))
+    if not job.refresh:
+        with metrics.stage("cache_lookup"):
+            async with AsyncSessionLocal() as session:
+                existing, cached_quiz = await _find_cached_quiz(session, article_key, question_count)
+        if cached_quiz is not None:
+            return {"quiz": cached_quiz, "id": existing.id, "cached": True}
+    return await _generate_and_persist(job.url, article_key, question_count, job.extra_questions, job.refresh, job.full_article)
+
+
+async def _scrape(url: str, full_article: bool):
+    """Scrape (title, text) of a page; when the page answers 304 the stored
+    copy of its text is returned instead."""
+    try:
+        return await scrape_wikipedia_async(url, fetcher, full_article)
+    except NotModified as e:
+        async with AsyncSessionLocal() as session:
+            stored = await load_content(session, e.digest)
+        if stored is not None:
+            return stored
+        # The stored copy is gone: fetch it unconditionally
+        fetcher.forget(fetch_key(url, full_article))
+        return await scrape_wikipedia_async(url, fetcher, full_article)
+
+
+async def _load_article(url: str, article_key: str, refresh: bool, full_article: bool = False):
+    """Return (title, text, content_hash, article_key) for a URL, reading the
+    content store when a fresh copy exists and scraping otherwise. The returned
+    key is the redirect-resolved one when the page was scraped. Full-article
+    text is stored under its own (suffixed) key."""
+    if not refresh:
+        with metrics.stage("content_lookup"):
+            async with AsyncSessionLocal() as session:
+                stored = await load_fresh_content(session, article_key)
+        if stored is not None:
+            title, text, digest = stored
+            return title, text, digest, article_key
 
     # Scrape with better error handling
     try:
-        title, text = await asyncio.get_event_loop().run_in_executor(None, scrape_wikipedia, url)
+        async with scrape_slots:
+            title, text = await _scrape(url, full_article)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    requested, resolved = canonical_article_key(url), resolved_article_key(url, title)
+    article_key = quiz_key(resolved, full_article)
+    async with AsyncSessionLocal() as session:
+        digest = await save_content(session, article_key, title, text)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()  # same text stored concurrently
+    fetcher.remember(fetch_key(url, full_article), digest)
+    if resolved != requested:
+        # Remember the redirect so the next request for this URL finds the
+        # resolved article's quiz and text without fetching
+        async with AsyncSessionLocal() as session:
+            await session.merge(ArticleAlias(alias_key=requested, article_key=resolved))
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()  # recorded concurrently
+        await quiz_cache.put_alias(requested, resolved)
+    return title, text, digest, article_key
+
+
+async def _generate_and_persist(
+    url: str,
+    article_key: str,
+    question_count: int,
+    extra_questions: bool,
+    refresh: bool = False,
+    full_article: bool = False,
+) -> Dict[str, Any]:
+    """Cache-miss path: load article, generate and store a quiz. Runs once per in-flight key."""
+    if extra_questions and not refresh and not full_article:
+        # Most common upgrade path: extend the cached 10-question quiz
+        extended = await _extend_cached_quiz(url, article_key, question_count)
+        if extended is not None:
+            return extended
+
+    requested_key = article_key
+    load_start = time.perf_counter()
+    title, text, digest, article_key = await _load_article(url, article_key, refresh, full_article)
+    article_ms = round((time.perf_counter() - load_start) * 1000, 1)
+
+    # A redirect (e.g. /wiki/AI) resolves to the canonical article; re-check the
+    # cache under the resolved key before paying for generation.
+    if article_key != requested_key and not refresh:
+        async with AsyncSessionLocal() as session:
+            existing, cached_quiz = await _find_cached_quiz(session, article_key, question_count)
+            if cached_quiz is not None:
+                return {"quiz": cached_quiz, "id": existing.id, "cached": True}
+
     # Generate quiz via LLM wrapper (faster processing)
     try:
-        quiz_obj = await asyncio.get_event_loop().run_in_executor(
-            None, generate_quiz, title, text, payload.extra_questions
-        )
+        async with llm_slots:
+            quiz_obj, timings = await generate_quiz_async(title, text, extra_questions, full_article)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
 
-    # Persist
+    result = await _persist_quiz(url, article_key, question_count, quiz_obj, title, digest)
+    if "timings" in result:
+        result["timings"] = {"article": article_ms, **timings}
+    return result
+
+
+async def _bump_history_revision(session: AsyncSession) -> None:
+    """Raise the history revision in the transaction that writes quizzes. The
+    row lock it takes is held until commit, so run it just before."""
+    await session.execute(
+        update(HistoryRevision).where(HistoryRevision.id == 1).values(revision=HistoryRevision.revision + 1)
+    )
+
+
+def _quiz_fields(url: str, quiz_obj: Dict[str, Any], title: str, digest: Optional[str], parent_id: Optional[int] = None) -> Dict[str, Any]:
+    return dict(
+        url=url,
+        title=quiz_obj.get("title", title),
+        scraped_content=None,
+        content_hash=digest,
+        parent_id=parent_id,
+        full_quiz_data=json.dumps(quiz_obj),
+    )
+
+
+async def _persist_quiz(
+    url: str,
+    article_key: str,
+    question_count: int,
+    quiz_obj: Dict[str, Any],
+    title: str,
+    digest: Optional[str],
+    parent_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Store a generated quiz and return the response body.
+
+    One row per (article_key, question_count); a stale row is replaced in place
+    so the table does not fill with duplicates.
+    """
+    with metrics.stage("persist"):
+        return await _persist_quiz_row(url, article_key, question_count, quiz_obj, title, digest, parent_id)
+
+
+async def _persist_quiz_row(
+    url: str,
+    article_key: str,
+    question_count: int,
+    quiz_obj: Dict[str, Any],
+    title: str,
+    digest: Optional[str],
+    parent_id: Optional[int],
+) -> Dict[str, Any]:
+    fields = _quiz_fields(url, quiz_obj, title, digest, parent_id)
     async with AsyncSessionLocal() as session:
-        new = Quiz(
-            url=url, 
-            title=quiz_obj.get("title", title), 
-            scraped_content=text, 
-            full_quiz_data=json.dumps(quiz_obj)
+        existing, _ = await _find_cached_quiz(session, article_key, question_count)
+        if existing is None:
+            existing = Quiz(article_key=article_key, question_count=question_count, **fields)
+            session.add(existing)
+        else:
+            for name, value in fields.items():
+                setattr(existing, name, value)
+            existing.date_generated = func.now()
+        try:
+            await session.flush()
+            await index_quizzes(session, [(existing.id, quiz_obj)])
+            await _bump_history_revision(session)
+            await session.commit()
+        except IntegrityError:
+            # Another request persisted the same key first; serve its row.
+            await session.rollback()
+            existing, cached_quiz = await _find_cached_quiz(session, article_key, question_count)
+            if cached_quiz is not None:
+                return {"quiz": cached_quiz, "id": existing.id, "cached": True}
+            raise HTTPException(status_code=500, detail="Failed to persist quiz")
+        await session.refresh(existing)
+
+    await quiz_cache.invalidate(existing.id, article_key, question_count)
+    history_events.publish(_history_item(existing))
+    _precompress_cached_quiz(existing.id, fields["full_quiz_data"])
+    return {"quiz": quiz_obj, "id": existing.id, "cached": False, "timings": {}}
+
+
+async def _extend_cached_quiz(url: str, article_key: str, question_count: int) -> Optional[Dict[str, Any]]:
+    """Build a larger quiz from the cached standard one by generating only the
+    missing questions, reusing its study summary and stored article text.
+    Returns None when there is no usable base quiz or it could not be extended
+    to ``question_count`` distinct questions."""
+    async with AsyncSessionLocal() as session:
+        base, base_quiz = await _find_cached_quiz(session, article_key, 10)
+        if base_quiz is None or len(base_quiz.get("questions", [])) >= question_count:
+            return None
+        text = base.scraped_content
+        if base.content_hash:
+            text = await load_content_text(session, base.content_hash)
+    if not text:
+        return None
+
+    try:
+        async with llm_slots:
+            quiz_obj, timings = await extend_quiz_async(base_quiz, text, question_count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+    if len(quiz_obj.get("questions", [])) < question_count:
+        # Not enough distinct new questions: never cache a short quiz under
+        # this count; generate the larger quiz from scratch instead
+        return None
+    result = await _persist_quiz(url, article_key, question_count, quiz_obj, base.title, base.content_hash, parent_id=base.id)
+    if "timings" in result:
+        result["timings"] = timings
+        result["extended_from"] = base.id
+    return result
+
+
+def _ndjson(event: Dict[str, Any]) -> str:
+    return dumps(event) + "\n"
+
+
+def _quiz_events(result: Dict[str, Any]):
+    """Replay a finished generate_quiz result as stream events."""
+    quiz = result["quiz"]
+    yield _ndjson({"type": "meta", "title": quiz.get("title"), "summary": quiz.get("summary", "")})
+    for index, question in enumerate(quiz.get("questions", [])):
+        yield _ndjson({"type": "question", "index": index, "question": question})
+    yield _ndjson({"type": "study_summary", "study_summary": quiz.get("study_summary", "")})
+    yield _ndjson({"type": "done", "id": result["id"], "cached": result["cached"], "timings": result.get("timings", {})})
+
+
+@app.post("/generate_quiz/stream")
+async def generate_quiz_stream(payload: GenerateRequest):
+    """Streaming variant of POST /generate_quiz (newline-delimited JSON).
+
+    Events, in order: ``meta`` (title, summary), one ``question`` per question
+    as soon as the LLM has finished it, ``study_summary``, then ``done`` with the
+    persisted quiz id. Cache hits, in-flight duplicates and incremental extra
+    questions are replayed in the same format; a request for a quiz another
+    stream is generating follows that stream's events from the start. A live
+    generation is the single flight for its key and takes a job queue slot
+    (429 when the queue is full). Errors before generation starts
+    are ordinary HTTP errors; later ones arrive as an ``error`` event.
+    Full-article quizzes are assembled from several calls, so they are replayed
+    once complete.
+    """
+    url = payload.url
+    question_count = 15 if payload.extra_questions else 10
+    media_type = "application/x-ndjson"
+
+    with metrics.stage("cache_lookup"):
+        article_key = await _article_key(url, payload.full_article)
+        existing, cached_quiz = None, None
+        if not payload.refresh:
+            async with AsyncSessionLocal() as session:
+                existing, cached_quiz = await _find_cached_quiz(session, article_key, question_count)
+    flight_key = (article_key, question_count, payload.refresh)
+    if not payload.refresh:
+        metrics.CACHE_LOOKUPS.inc(endpoint="generate_quiz_stream", result="miss" if cached_quiz is None else "hit")
+        if cached_quiz is not None:
+            return StreamingResponse(_quiz_events({"quiz": cached_quiz, "id": existing.id, "cached": True}), media_type=media_type)
+
+    extendable = False
+    if payload.extra_questions and not payload.refresh and not payload.full_article:
+        async with AsyncSessionLocal() as session:
+            extendable = (await _find_cached_quiz(session, article_key, 10))[1] is not None
+
+    buffer = stream_buffers.get(flight_key)
+    if buffer is not None:
+        # Another stream is generating this quiz: follow its events
+        metrics.mark("coalesced")
+        generate_flights.coalesced += 1
+        return StreamingResponse(buffer.follow(), media_type=media_type, headers={"X-Accel-Buffering": "no"})
+    if flight_key in generate_flights or extendable or payload.full_article:
+        if flight_key in generate_flights:
+            metrics.mark("coalesced")
+        # Someone is already generating this quiz, it can be extended from the
+        # cached standard quiz, or it covers the full article: none of these
+        # stream tokens, so replay the result.
+        result = await generate_flights.do(
+            flight_key,
+            lambda: _generate_and_persist(
+                url, article_key, question_count, payload.extra_questions, payload.refresh, payload.full_article,
+            ),
+        )
+        return StreamingResponse(_quiz_events(result), media_type=media_type)
+
+    # Lead the flight: POST /generate_quiz and other streams for the same key
+    # share this generation, and it takes a job queue slot like a queued job.
+    buffer = stream_buffers[flight_key] = ReplayBuffer()
+    started = asyncio.get_running_loop().create_future()
+    flight = generate_flights.start(
+        flight_key, lambda: _stream_and_persist(url, article_key, question_count, payload, buffer, started),
+    )
+    await asyncio.wait({started, flight}, return_when=asyncio.FIRST_COMPLETED)
+    if not started.done():
+        # Failed (or found the quiz) before generating: an ordinary response
+        try:
+            result = await asyncio.shield(flight)
+        except QueueFull as e:
+            raise _queue_full(e)
+        return StreamingResponse(_quiz_events(result), media_type=media_type)
+    return StreamingResponse(buffer.follow(), media_type=media_type, headers={"X-Accel-Buffering": "no"})
+
+
+async def _stream_and_persist(
+    url: str, article_key: str, question_count: int, payload: GenerateRequest, buffer: ReplayBuffer, started: asyncio.Future,
+) -> Dict[str, Any]:
+    """Stream leader: generate token by token into ``buffer`` (as NDJSON lines),
+    persist, and return the generate_quiz result. ``started`` is set once the
+    article is loaded and generation begins."""
+    flight_key = (article_key, question_count, payload.refresh)
+    try:
+        async with generation_jobs.admitted():
+            requested_key = article_key
+            title, text, digest, article_key = await _load_article(url, article_key, payload.refresh)
+            if article_key != requested_key and not payload.refresh:
+                async with AsyncSessionLocal() as session:
+                    existing, cached_quiz = await _find_cached_quiz(session, article_key, question_count)
+                if cached_quiz is not None:
+                    return {"quiz": cached_quiz, "id": existing.id, "cached": True}
+            started.set_result(None)
+            async with llm_slots:
+                async for event in get_generator().astream(title, text, payload.extra_questions):
+                    if event["type"] == "quiz":
+                        final = event
+                    else:
+                        buffer.append(_ndjson(event))
+            result = await _persist_quiz(url, article_key, question_count, final["quiz"], title, digest)
+            buffer.append(_ndjson({"type": "done", "id": result["id"], "cached": result["cached"], "timings": final["timings"]}))
+            if "timings" in result:
+                result["timings"] = final["timings"]
+            return result
+    except Exception as e:
+        if started.done():
+            detail = e.detail if isinstance(e, HTTPException) else f"Failed to generate quiz: {str(e)}"
+            buffer.append(_ndjson({"type": "error", "detail": detail}))
+        raise
+    finally:
+        buffer.close()
+        if stream_buffers.get(flight_key) is buffer:
+            del stream_buffers[flight_key]
+
+
+async def _persist_quizzes(items: List[Dict[str, Any]], question_count: int) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Store several generated quizzes (dicts with key, url, title, digest and
+    quiz) in one transaction and return their results by article key.
+
+    Returns None without writing anything if a concurrent request persisted one
+    of the keys first; the caller then falls back to ``_persist_quiz``.
+    """
+    by_key = {item["key"]: item for item in items}
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Quiz).where(Quiz.article_key.in_(list(by_key)), Quiz.question_count == question_count)
+        )
+        rows = {row.article_key: row for row in result.scalars()}
+        for key, item in by_key.items():
+            fields = _quiz_fields(item["url"], item["quiz"], item["title"], item["digest"])
+            row = rows.get(key)
+            if row is None:
+                rows[key] = Quiz(article_key=key, question_count=question_count, **fields)
+                session.add(rows[key])
+            else:
+                for name, value in fields.items():
+                    setattr(row, name, value)
+                row.date_generated = func.now()
+        try:
+            await session.flush()
+            await index_quizzes(session, [(rows[key].id, item["quiz"]) for key, item in by_key.items()])
+            await _bump_history_revision(session)
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return None
+
+        ids = {key: row.id for key, row in rows.items()}
+        result = await session.execute(
+            select(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated).where(Quiz.id.in_(list(ids.values())))
         )
-        session.add(new)
-        await session.commit()
-        await session.refresh(new)
+        for row in result.all():
+            history_events.publish(_history_item(row))
+    for key, item in by_key.items():
+        await quiz_cache.invalidate(ids[key], key, question_count)
+        _precompress_cached_quiz(ids[key], rows[key].full_quiz_data)
+    return {key: {"quiz": item["quiz"], "id": ids[key], "cached": False} for key, item in by_key.items()}
+
+
+def _batch_line(url: str, outcome, include_quiz: bool) -> Dict[str, Any]:
+    """Result line for one requested URL; ``outcome`` is a result dict or an error message."""
+    if isinstance(outcome, str):
+        return {"type": "result", "url": url, "status": "error", "detail": outcome}
+    line = {
+        "type": "result",
+        "url": url,
+        "status": "cached" if outcome["cached"] else "generated",
+        "id": outcome["id"],
+        "title": outcome["quiz"].get("title"),
+    }
+    if include_quiz:
+        line["quiz"] = outcome["quiz"]
+    return line
+
+
+@app.post("/generate_quiz/batch")
+async def generate_quiz_batch(payload: BatchRequest):
+    """Generate quizzes for many URLs, streaming one NDJSON line per URL.
+
+    URLs naming the same article are generated once, and all cached quizzes are
+    looked up with a single query and returned first. The rest flow through
+    overlapping stages -- scrape (BATCH_SCRAPE_WORKERS), generate
+    (BATCH_LLM_WORKERS) and persist (several quizzes per transaction) -- so the
+    next article is fetched while the previous one is being generated.
+
+    Each ``result`` line has the url and a status of ``cached``, ``generated``
+    (with id and title, plus the quiz if ``include_quiz``) or ``error`` (with
+    detail), in completion order. A final ``done`` line carries the totals.
+    """
+    urls = list(dict.fromkeys(payload.urls))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_URLS} URLs can be generated per batch")
+    question_count = 15 if payload.extra_questions else 10
+
+    # article key -> requested URLs that name it
+    articles: Dict[str, List[str]] = {}
+    aliases = await _resolve_aliases(list(dict.fromkeys(canonical_article_key(url) for url in urls)))
+    for url in urls:
+        articles.setdefault(quiz_key(aliases[canonical_article_key(url)], payload.full_article), []).append(url)
+
+    cached: Dict[str, Dict[str, Any]] = {}
+    if not payload.refresh:
+        with metrics.stage("cache_lookup"):
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(Quiz).where(Quiz.article_key.in_(list(articles)), Quiz.question_count == question_count)
+                )
+                for row in result.scalars():
+                    cached_quiz = _cached_quiz_data(row)
+                    if cached_quiz is not None:
+                        cached[row.article_key] = {"quiz": cached_quiz, "id": row.id, "cached": True}
+        metrics.CACHE_LOOKUPS.inc(len(cached), endpoint="generate_quiz_batch", result="hit")
+        metrics.CACHE_LOOKUPS.inc(len(articles) - len(cached), endpoint="generate_quiz_batch", result="miss")
+
+    return StreamingResponse(
+        _batch_events(payload, question_count, articles, cached),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+async def _batch_events(payload: BatchRequest, question_count: int, articles: Dict[str, List[str]], cached: Dict[str, Dict[str, Any]]):
+    loop = asyncio.get_running_loop()
+    lines: asyncio.Queue = asyncio.Queue()
+    finished: Dict[str, Any] = {}  # article key -> result dict or error message
+    totals = {"cached": 0, "generated": 0, "error": 0}
+
+    def finish(key: str, outcome) -> None:
+        finished[key] = outcome
+        for url in articles.pop(key, []):
+            line = _batch_line(url, outcome, payload.include_quiz)
+            totals[line["status"]] += 1
+            lines.put_nowait(_ndjson(line))
+
+    def error_detail(e: Exception, prefix: str = "") -> str:
+        return e.detail if isinstance(e, HTTPException) else f"{prefix}{str(e)}"
+
+    for key, result in cached.items():
+        finish(key, result)
+
+    scrape_queue: asyncio.Queue = asyncio.Queue()
+    for key in articles:
+        scrape_queue.put_nowait(key)
+    # Bounded so scraping runs only a little ahead of generation
+    generate_queue: asyncio.Queue = asyncio.Queue(maxsize=BATCH_LLM_WORKERS)
+    persist_queue: asyncio.Queue = asyncio.Queue()
+
+    async def scrape_worker():
+        while not scrape_queue.empty():
+            key = scrape_queue.get_nowait()
+            if key not in articles:
+                continue
+            url = articles[key][0]
+            try:
+                title, text, digest, resolved = await _load_article(url, key, payload.refresh, payload.full_article)
+                if resolved != key:
+                    # A redirect: fold into the resolved article if this batch
+                    # already has it, otherwise carry on under the resolved key.
+                    if resolved in finished:
+                        finish(key, finished[resolved])
+                        continue
+                    if resolved in articles:
+                        articles[resolved].extend(articles.pop(key))
+                        continue
+                    articles[resolved] = articles.pop(key)
+                    key = resolved
+                    if not payload.refresh:
+                        async with AsyncSessionLocal() as session:
+                            existing, cached_quiz = await _find_cached_quiz(session, key, question_count)
+                        if cached_quiz is not None:
+                            finish(key, {"quiz": cached_quiz, "id": existing.id, "cached": True})
+                            continue
+            except Exception as e:
+                finish(key, error_detail(e))
+                continue
+            await generate_queue.put((key, url, title, text, digest))
+
+    async def generate_worker():
+        while True:
+            item = await generate_queue.get()
+            if item is None:
+                return
+            key, url, title, text, digest = item
+            try:
+                async with llm_slots:
+                    quiz_obj, _ = await generate_quiz_async(title, text, payload.extra_questions, payload.full_article)
+            except Exception as e:
+                finish(key, error_detail(e, "Failed to generate quiz: "))
+                continue
+            persist_queue.put_nowait({"key": key, "url": url, "title": title, "digest": digest, "quiz": quiz_obj})
+
+    async def persist_worker():
+        closing = False
+        while not closing:
+            items = []
+            item = await persist_queue.get()
+            # Write everything that finished meanwhile in the same transaction
+            while item is not None:
+                items.append(item)
+                if len(items) >= BATCH_PERSIST_SIZE or persist_queue.empty():
+                    break
+                item = persist_queue.get_nowait()
+            closing = item is None
+            if not items:
+                continue
+            try:
+                with metrics.stage("persist"):
+                    results = await _persist_quizzes(items, question_count)
+            except Exception:
+                results = None
+            if results is not None:
+                for key, result in results.items():
+                    finish(key, result)
+                continue
+            for item in items:
+                try:
+                    finish(item["key"], await _persist_quiz(item["url"], item["key"], question_count, item["quiz"], item["title"], item["digest"]))
+                except Exception as e:
+                    finish(item["key"], error_detail(e, "Failed to persist quiz: "))
+
+    scrapers = [loop.create_task(scrape_worker()) for _ in range(min(BATCH_SCRAPE_WORKERS, len(articles)))]
+    generators = [loop.create_task(generate_worker()) for _ in range(BATCH_LLM_WORKERS)]
+    persister = loop.create_task(persist_worker())
+
+    async def run_stages():
+        try:
+            await asyncio.gather(*scrapers)
+            for _ in generators:
+                await generate_queue.put(None)
+            await asyncio.gather(*generators)
+            persist_queue.put_nowait(None)
+            await persister
+        finally:
+            lines.put_nowait(None)
 
-        return {"quiz": quiz_obj, "id": new.id, "cached": False}
+    pipeline = loop.create_task(run_stages())
+    try:
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            yield line
+        for key in list(articles):
+            finish(key, "Batch generation stopped before this article was processed")
+        while not lines.empty():
+            yield lines.get_nowait()
+        yield _ndjson({"type": "done", **totals})
+    finally:
+        # Client went away (or a stage failed): stop the remaining work.
+        for task in (pipeline, *scrapers, *generators, persister):
+            task.cancel()
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(payload: JobRequest):
+    """Queue a quiz generation and return its job id (202), or with
+    ``wait=true`` block up to ``timeout`` seconds and return the quiz (200)."""
+    job_id = await _submit_job(payload, payload.priority)
+    if not payload.wait:
+        return {"job": await generation_jobs.get(job_id)}
+    try:
+        job, result = await generation_jobs.wait(job_id, payload.timeout)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+    if result is None and job["status"] not in TERMINAL_STATUSES:
+        return {"job": job}
+    body = await _job_response(job, result)
+    return JSONResponse({**body, "job": await generation_jobs.get(job_id)})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await generation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job": job}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Counters and latency histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "generate_quiz": generate_flights.stats(),
+        "jobs": generation_jobs.stats(),
+        "compressed_bodies": compressed_bodies.stats(),
+        "quiz_cache": quiz_cache.stats(),
+    }
+
+
+def _history_item(row) -> Dict[str, Any]:
+    """Slim history projection: just what the history table displays."""
+    return {
+        "id": row.id,
+        "url": row.url,
+        "title": row.title,
+        "date_generated": row.date_generated.isoformat() if row.date_generated else None,
+    }
+
+
+async def _history_etag(session: AsyncSession, *params: Any) -> str:
+    """Change token for the history list: the history revision, which every
+    quiz insert or regeneration raises (date_generated has one-second
+    resolution). One primary-key lookup."""
+    revision = (await session.execute(
+        select(HistoryRevision.revision).where(HistoryRevision.id == 1)
+    )).scalar()
+    token = f"{revision}:" + ":".join(str(p) for p in params)
+    return '"' + hashlib.sha1(token.encode()).hexdigest() + '"'
 
 
 @app.get("/history")
-async def history(skip: int = 0, limit: int = 100):
+async def history(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    view: str = "full",
+    cursor: Optional[int] = None,
+):
+    """List generated quizzes, newest first.
+
+    ``view=full`` (default) returns whole rows with offset pagination.
+    ``view=slim`` returns only id/url/title/date_generated and pages by keyset on
+    (date_generated, id): pass the returned ``next_cursor`` as ``cursor``.
+    Both honor ``If-None-Match`` and answer 304 when nothing has changed.
+    """
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Quiz).offset(skip).limit(limit).order_by(Quiz.date_generated.desc()))
-        rows = result.scalars().all()
-        return {"quizzes": [r.to_dict() for r in rows]}
+        etag = await _history_etag(session, view, skip, limit, cursor)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
 
+        if view != "slim":
+            result = await session.execute(
+                select(Quiz, ArticleContent.text)
+                .outerjoin(ArticleContent, ArticleContent.content_hash == Quiz.content_hash)
+                .offset(skip).limit(limit).order_by(Quiz.date_generated.desc())
+            )
+            return {"quizzes": [
+                quiz.to_dict(scraped_content=scraped)
+                for quiz, scraped in result.all()
+            ]}
 
-@app.get("/quiz/{quiz_id}")
-async def get_quiz(quiz_id: int):
+        limit = max(1, min(limit, 100))
+        query = select(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated)
+        if cursor is not None:
+            # Compare against the cursor row's stored date so both sides use the
+            # same representation (SQLite stores dates as text).
+            cursor_date = select(Quiz.date_generated).where(Quiz.id == cursor).scalar_subquery()
+            query = query.where(or_(
+                Quiz.date_generated < cursor_date,
+                and_(Quiz.date_generated == cursor_date, Quiz.id < cursor),
+            ))
+        query = query.order_by(Quiz.date_generated.desc(), Quiz.id.desc()).limit(limit + 1)
+        rows = (await session.execute(query)).all()
+
+        items = [_history_item(r) for r in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"quizzes": items, "next_cursor": next_cursor}
+
+
+@app.get("/history/search")
+async def history_search(q: str, limit: int = 20, cursor: Optional[str] = None):
+    """Full-text search over quiz titles, summaries and questions (see
+    search_index.py), best match first.
+
+    Every word must match and the last one matches as a prefix (``python
+    mach`` finds "Python" quizzes that mention "machine"). Each result is a
+    history item plus its ``score`` and a text ``snippet``; pass the returned
+    ``next_cursor`` as ``cursor`` for the next page.
+    """
+    limit = max(1, min(limit, 100))
+    with metrics.stage("search"):
+        async with AsyncSessionLocal() as session:
+            try:
+                hits, next_cursor = await search_quizzes(session, q, limit, cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            rows = {}
+            if hits:
+                result = await session.execute(
+                    select(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated)
+                    .where(Quiz.id.in_([quiz_id for quiz_id, _, _ in hits]))
+                )
+                rows = {row.id: row for row in result.all()}
+    items = [
+        {**_history_item(rows[quiz_id]), "score": score, "snippet": snippet}
+        for quiz_id, score, snippet in hits if quiz_id in rows
+    ]
+    return {"quizzes": items, "next_cursor": next_cursor}
+
+
+async def _history_since(last_id: int, limit: int = 100):
     async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Quiz).where(Quiz.id == quiz_id))
-        row = result.scalar_one_or_none()
-        if not row:
-            raise HTTPException(status_code=404, detail="Quiz not found")
-        # parse JSON field
+        result = await session.execute(
+            select(Quiz.id, Quiz.url, Quiz.title, Quiz.date_generated)
+            .where(Quiz.id > last_id)
+            .order_by(Quiz.id)
+            .limit(limit)
+        )
+        return [_history_item(r) for r in result.all()]
+
+
+def _sse_event(item: Dict[str, Any], new: bool = True) -> str:
+    # Only new quizzes carry an event id: re-sending a regenerated quiz under
+    # its old id would rewind the client's Last-Event-ID
+    event_id = f"id: {item['id']}\n" if new else ""
+    return f"{event_id}event: quiz\ndata: {json.dumps(item)}\n\n"
+
+
+async def _poll_history() -> None:
+    """Publish quizzes other worker processes persisted, for this process's
+    subscribers: one query per heartbeat while anyone is subscribed."""
+    while True:
+        await asyncio.sleep(HISTORY_STREAM_HEARTBEAT)
+        if not len(history_events):
+            continue
         try:
-            quiz_data = json.loads(row.full_quiz_data) if row.full_quiz_data else {}
-        except Exception:
-            quiz_data = {"title": row.title}
-        return {
-            "quiz": quiz_data, 
-            "meta": {
-                "id": row.id, 
-                "url": row.url, 
-                "title": row.title, 
-                "date_generated": row.date_generated.isoformat() if row.date_generated else None
-            }
-        }
\ No newline at end of file
+            for item in await _history_since(history_events.last_id):
+                history_events.publish(item)
+        except Exception as e:
+            logger.warning("History poll failed: %s", e)
+
+
+@app.get("/history/stream")
+async def history_stream(request: Request, cursor: Optional[int] = None):
+    """Server-sent events for quizzes persisted after ``cursor`` (a quiz id).
+
+    On reconnect the browser sends ``Last-Event-ID`` and the stream resumes from
+    the database, so no quiz is missed. Without a cursor only new quizzes are
+    streamed. A regenerated quiz is re-sent as an event without an id. After
+    the initial catch-up a connection does not query the database itself.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+    if cursor is None:
+        async with AsyncSessionLocal() as session:
+            cursor = (await session.execute(select(func.max(Quiz.id)))).scalar() or 0
+
+    async def events():
+        last_id = cursor
+        # Subscribe before catching up so nothing published meanwhile is lost
+        queue = history_events.subscribe()
+        caught_up: Dict[int, Dict[str, Any]] = {}
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                items = await _history_since(last_id)
+                for item in items:
+                    last_id = max(last_id, item["id"])
+                    caught_up[item["id"]] = item
+                    yield _sse_event(item)
+                if len(items) < 100:
+                    break
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), HISTORY_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    caught_up.clear()
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return  # dropped for falling behind; client reconnects and resumes
+                if caught_up.pop(item["id"], None) == item:
+                    continue  # published while catching up; already sent
+                new = item["id"] > last_id
+                last_id = max(last_id, item["id"])
+                yield _sse_event(item, new)
+        finally:
+            history_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/quiz/{quiz_id}")
+async def get_quiz(quiz_id: int, request: Request):
+    quiz = await _load_quiz_json(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    # The stored JSON is spliced into the response as-is (no parse round trip)
+    meta = {
+        "id": quiz.id,
+        "url": quiz.url,
+        "title": quiz.title,
+        "date_generated": quiz.date_generated,
+    }
+    return json_bytes_response(
+        request,
+        envelope(quiz.quiz_json, meta=meta),
+        key=body_key("quiz", quiz.id, quiz.quiz_json),
+    )
@@ -0,0 +1,247 @@
+"""
+Per-stage latency instrumentation.
+
+Code paths wrap their expensive steps in ``stage(name)`` (or report a
+duration with ``record_stage``). Every stage is observed in the
+``quiz_stage_duration_seconds`` histogram and, when it runs on behalf of a
+request, appended to that request's timings, which the API returns as a
+``Server-Timing`` header. Request timings live in a context
+variable, so tasks spawned while handling a request (asyncio.gather,
+single-flight leaders, queued jobs) report into the same request.
+
+The registry below is a minimal Prometheus client: counters and histograms
+with labels, and gauges read from a callback at scrape time. ``render()``
+produces the text exposition format served on GET /metrics.
+:class:`RequestMetricsMiddleware` ties it to the app: request latency, the
+``Server-Timing`` header and the opt-in request profiler (see profiler.py).
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, QueryParams
+
+from profiler import SamplingProfiler, wants_profile
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers a cache hit (sub-millisecond) through a slow LLM call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, +Inf included; sum)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self):
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _format_labels(self.labelnames + ("le",), key + (le,)), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CallbackMetric(_Metric):
+    """Gauge (or counter kept elsewhere) read from ``fn`` at scrape time;
+    ``fn`` returns a number, or a dict of label values -> number."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], object], labelnames: Sequence[str] = (), kind: str = "gauge") -> None:
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def samples(self):
+        value = self.fn()
+        if isinstance(value, dict):
+            for key, item in sorted(value.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                yield self.name, _format_labels(self.labelnames, key), item
+        else:
+            yield self.name, "", value
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -- instruments shared across modules ----------------------------------------
+STAGE_SECONDS = Histogram("quiz_stage_duration_seconds", "Time spent per generation stage.", ["stage"])
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency until the response starts.", ["method", "route", "status"])
+CACHE_LOOKUPS = Counter("quiz_cache_lookups_total", "Quiz requests answered from a stored quiz (hit) or not (miss).", ["endpoint", "result"])
+GENERATIONS = Counter("quiz_generations_total", "Question sets produced, by generator (llm or fallback).", ["generator"])
+
+
+# -- per-request stage timings --------------------------------------------------
+# (stage, seconds or None for a marker) in the order they finished
+_request_stages: ContextVar[Optional[List[Tuple[str, Optional[float]]]]] = ContextVar("request_stages", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+def mark(name: str) -> None:
+    """Note a duration-less event (e.g. ``coalesced``) in the request's timings."""
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, None))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def server_timing(stages: List[Tuple[str, Optional[float]]], total: Optional[float] = None) -> str:
+    """``Server-Timing`` header value: repeated stages are summed, markers are
+    listed without a duration."""
+    durations: Dict[str, Optional[float]] = {}
+    for name, seconds in stages:
+        if seconds is None:
+            durations.setdefault(name, None)
+        else:
+            durations[name] = (durations.get(name) or 0.0) + seconds
+    if total is not None:
+        durations["total"] = total
+    return ", ".join(
+        name if seconds is None else f"{name};dur={seconds * 1000:.1f}"
+        for name, seconds in durations.items()
+    )
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware: observes request latency, adds the request's stage
+    timings as a ``Server-Timing`` header and runs the profiler on request.
+    Streaming responses report the stages finished before their first byte."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: List[Tuple[str, Optional[float]]] = []
+        token = _request_stages.set(stages)
+        start = time.perf_counter()
+        sampler = None
+        if wants_profile(Headers(scope=scope), QueryParams(scope.get("query_string", b""))):
+            sampler = SamplingProfiler(scope["path"]).start()
+        started = False
+
+        def observe(status: int) -> float:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=str(status))
+            return elapsed
+
+        async def send_with_timing(message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start" and not started:
+                started = True
+                value = server_timing(stages, observe(message["status"]))
+                if sampler is not None:
+                    value += f', profile;desc="{sampler.filename}"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            if not started:
+                observe(500)
+            raise
+        finally:
+            _request_stages.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                sampler.save()
@@ -0,0 +1,99 @@
+"""
+Upgrade an existing quiz database to the current schema.
+
+Usage (from backend/):
+    python migrate_db.py [DATABASE_URL | path/to/quiz.db] [--no-backup] [--vacuum] [--reindex]
+
+Runs the same idempotent migrations as API startup (see migrations.py),
+including moving inline quiz JSON and article text into the compressed side
+tables, and reports row counts and file size before and after. A SQLite file
+is first copied to ``<file>.bak`` unless --no-backup is given; --vacuum then
+rewrites it so the space freed by the move is returned to the filesystem.
+The quiz search index is built when it is first created; --reindex drops and
+rebuilds it from the stored quizzes. Defaults to DATABASE_URL from the environment.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import make_url
+
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from database import DATABASE_URL, Base, create_engine_for
+from migrations import run_migrations
+from search_index import TABLE as SEARCH_TABLE, rebuild_search_index
+
+
+def _database_url(target: str) -> str:
+    if "://" in target:
+        return target
+    return f"sqlite+aiosqlite:///{os.path.abspath(target)}"
+
+
+def _sqlite_path(url: str):
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+        return parsed.database
+    return None
+
+
+async def _report(engine, path) -> str:
+    async with engine.connect() as conn:
+        tables = set(await conn.run_sync(lambda c: inspect(c).get_table_names()))
+        counts = []
+        for table in ("quizzes", "quiz_payloads", "article_contents", SEARCH_TABLE):
+            if table in tables:
+                count = (await conn.execute(text(f"SELECT COUNT(*) FROM {table}"))).scalar()
+                counts.append(f"{table}={count}")
+        if "quizzes" in tables:
+            inline = (await conn.execute(text(
+                "SELECT COUNT(*) FROM quizzes WHERE full_quiz_data IS NOT NULL OR scraped_content IS NOT NULL"
+            ))).scalar()
+            counts.append(f"inline blobs={inline}")
+    size = f", {os.path.getsize(path) / 1024:.0f} KB" if path and os.path.exists(path) else ""
+    return ", ".join(counts) + size
+
+
+async def migrate(url: str, backup: bool = True, vacuum: bool = False, reindex: bool = False) -> None:
+    path = _sqlite_path(url)
+    if path and backup and os.path.exists(path):
+        with sqlite3.connect(path) as src, sqlite3.connect(path + ".bak") as dst:
+            src.backup(dst)
+        print(f"Backed up to {path}.bak")
+
+    engine = create_engine_for(url)
+    try:
+        print(f"before: {await _report(engine, path)}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(conn)
+        if reindex:
+            start = time.perf_counter()
+            async with engine.begin() as conn:
+                indexed = await conn.run_sync(rebuild_search_index)
+            print(f"Rebuilt the search index: {indexed} quizzes in {time.perf_counter() - start:.1f}s")
+        if vacuum and path:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text("VACUUM"))
+                await conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        print(f"after:  {await _report(engine, path)}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", nargs="?", default=DATABASE_URL, help="database URL or SQLite file path")
+    parser.add_argument("--no-backup", action="store_true", help="do not copy a SQLite file first")
+    parser.add_argument("--vacuum", action="store_true", help="compact a SQLite file afterwards")
+    parser.add_argument("--reindex", action="store_true", help="rebuild the quiz search index")
+    args = parser.parse_args()
+    asyncio.run(migrate(_database_url(args.target), backup=not args.no_backup, vacuum=args.vacuum, reindex=args.reindex))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Lightweight schema migrations for existing databases.
+
+`Base.metadata.create_all` only creates missing tables, so columns and indexes
+added to existing tables are applied here on startup. Every step is idempotent.
+"""
+import json
+import logging
+from typing import Dict, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from compression import pack_text
+from content_store import content_hash
+from scraper import canonical_article_key
+from search_index import backfill_search_index, create_search_index
+
+logger = logging.getLogger(__name__)
+
+
+def _add_missing_columns(conn: Connection, table: str, columns: Dict[str, str]) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def _question_count(full_quiz_data) -> int:
+    try:
+        return len(json.loads(full_quiz_data).get("questions", []))
+    except Exception:
+        return 0
+
+
+def _backfill_quiz_cache_keys(conn: Connection) -> None:
+    """Populate article_key/question_count on rows written before the cache key
+    existed. When several rows share a key only the newest keeps it; older
+    duplicates stay in history but are no longer cache candidates."""
+    rows = conn.execute(text(
+        "SELECT id, url, full_quiz_data FROM quizzes "
+        "WHERE article_key IS NULL AND question_count IS NULL ORDER BY id DESC"
+    )).fetchall()
+    if not rows:
+        return
+
+    taken = {
+        (r[0], r[1]) for r in conn.execute(text(
+            "SELECT article_key, question_count FROM quizzes WHERE article_key IS NOT NULL"
+        ))
+    }
+    updates: List[Dict] = []
+    counts: List[Dict] = []
+    for quiz_id, url, data in rows:
+        count = _question_count(data)
+        key: Tuple[str, int] = (canonical_article_key(url), count)
+        if count and key not in taken:
+            taken.add(key)
+            updates.append({"id": quiz_id, "key": key[0], "count": count})
+        else:
+            counts.append({"id": quiz_id, "count": count})
+
+    if updates:
+        conn.execute(
+            text("UPDATE quizzes SET article_key = :key, question_count = :count WHERE id = :id"),
+            updates,
+        )
+    if counts:
+        conn.execute(text("UPDATE quizzes SET question_count = :count WHERE id = :id"), counts)
+
+
+def _backfill_article_contents(conn: Connection, batch_size: int = 500) -> None:
+    """Move legacy inline ``scraped_content`` into the deduplicated, compressed
+    content store and point each quiz at it by hash."""
+    known = {r[0] for r in conn.execute(text("SELECT content_hash FROM article_contents"))}
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, article_key, title, date_generated, scraped_content FROM quizzes "
+            "WHERE scraped_content IS NOT NULL AND content_hash IS NULL LIMIT :n"
+        ), {"n": batch_size}).fetchall()
+        if not rows:
+            return
+        contents, links = [], []
+        for quiz_id, article_key, title, date_generated, scraped in rows:
+            digest = content_hash(scraped)
+            if digest not in known:
+                known.add(digest)
+                contents.append({
+                    "hash": digest, "key": article_key, "title": title,
+                    "blob": pack_text(scraped), "fetched": date_generated,
+                })
+            links.append({"id": quiz_id, "hash": digest})
+        if contents:
+            conn.execute(text(
+                "INSERT INTO article_contents (content_hash, article_key, title, text_z, fetched_at) "
+                "VALUES (:hash, :key, :title, :blob, COALESCE(:fetched, CURRENT_TIMESTAMP))"
+            ), contents)
+        conn.execute(text(
+            "UPDATE quizzes SET content_hash = :hash, scraped_content = NULL WHERE id = :id"
+        ), links)
+
+
+def _backfill_quiz_payloads(conn: Connection, batch_size: int = 500) -> None:
+    """Move legacy inline ``full_quiz_data`` into the compressed quiz_payloads
+    side table."""
+    while True:
+        rows = conn.execute(text(
+            "SELECT q.id, q.full_quiz_data, p.quiz_id FROM quizzes q "
+            "LEFT JOIN quiz_payloads p ON p.quiz_id = q.id "
+            "WHERE q.full_quiz_data IS NOT NULL LIMIT :n"
+        ), {"n": batch_size}).fetchall()
+        if not rows:
+            return
+        payloads = [{"id": quiz_id, "blob": pack_text(data)} for quiz_id, data, moved in rows if moved is None]
+        if payloads:
+            conn.execute(text("INSERT INTO quiz_payloads (quiz_id, quiz_data) VALUES (:id, :blob)"), payloads)
+        conn.execute(
+            text("UPDATE quizzes SET full_quiz_data = NULL WHERE id = :id"),
+            [{"id": row[0]} for row in rows],
+        )
+
+
+def _migrate_quizzes(conn: Connection) -> None:
+    _add_missing_columns(conn, "quizzes", {
+        "article_key": "VARCHAR(512)",
+        "question_count": "INTEGER",
+        "content_hash": "VARCHAR(64)",
+        "parent_id": "INTEGER",
+    })
+    _backfill_quiz_cache_keys(conn)
+    _backfill_article_contents(conn)
+    _backfill_quiz_payloads(conn)
+    indexes = {i["name"] for i in inspect(conn).get_indexes("quizzes")}
+    if "ux_quizzes_article_key_count" not in indexes:
+        conn.execute(text(
+            "CREATE UNIQUE INDEX ux_quizzes_article_key_count ON quizzes (article_key, question_count)"
+        ))
+    if "ix_quizzes_date_generated_id" not in indexes:
+        conn.execute(text(
+            "CREATE INDEX ix_quizzes_date_generated_id ON quizzes (date_generated, id)"
+        ))
+
+
+def _seed_history_revision(conn: Connection) -> None:
+    if conn.execute(text("SELECT COUNT(*) FROM history_revision")).scalar() == 0:
+        conn.execute(text("INSERT INTO history_revision (id, revision) VALUES (1, 0)"))
+
+
+def _migrate_generation_jobs(conn: Connection) -> None:
+    _add_missing_columns(conn, "generation_jobs", {
+        "full_article": "BOOLEAN NOT NULL DEFAULT FALSE",
+    })
+
+
+def _migrate_search_index(conn: Connection) -> None:
+    if create_search_index(conn):
+        indexed = backfill_search_index(conn)
+        if indexed:
+            logger.info("Indexed %d existing quizzes for search", indexed)
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    """Bring an existing database up to the current schema."""
+    await conn.run_sync(_migrate_quizzes)
+    await conn.run_sync(_seed_history_revision)
+    await conn.run_sync(_migrate_generation_jobs)
+    await conn.run_sync(_migrate_search_index)
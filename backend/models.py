@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, ForeignKey, Boolean
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from compression import CompressedText
 from database import Base
 
 
@@ -8,17 +10,133 @@ class Quiz(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String(2048), nullable=False)
+    # Canonical article identifier (see scraper.canonical_article_key); together
+    # with question_count this is the cache key for generated quizzes.
+    article_key = Column(String(512), nullable=True)
+    question_count = Column(Integer, nullable=True)
     title = Column(String(512), nullable=True)
     date_generated = Column(DateTime(timezone=True), server_default=func.now())
-    scraped_content = Column(Text, nullable=True)
-    full_quiz_data = Column(Text, nullable=True)  # JSON string
+    scraped_content = Column(Text, nullable=True)  # legacy rows; new rows use content_hash
+    content_hash = Column(String(64), nullable=True)  # ArticleContent.content_hash
+    # Inline quiz JSON of rows from before quiz_payloads; migrated on startup.
+    # Read and write the quiz through the full_quiz_data property below.
+    legacy_quiz_data = Column("full_quiz_data", Text, nullable=True)
+    # For a quiz extended from a smaller cached one: the base quiz it builds on
+    parent_id = Column(Integer, ForeignKey("quizzes.id"), nullable=True)
 
-    def to_dict(self):
+    __table_args__ = (
+        Index("ux_quizzes_article_key_count", "article_key", "question_count", unique=True),
+        Index("ix_quizzes_date_generated_id", "date_generated", "id"),
+    )
+
+    # Loaded with the row (one joined query), so the property works on async sessions
+    payload = relationship("QuizPayload", uselist=False, lazy="joined", cascade="all, delete-orphan")
+
+    @property
+    def full_quiz_data(self):
+        """Quiz JSON string, stored compressed in quiz_payloads."""
+        if self.payload is not None:
+            return self.payload.quiz_data
+        return self.legacy_quiz_data
+
+    @full_quiz_data.setter
+    def full_quiz_data(self, value):
+        self.legacy_quiz_data = None
+        if self.payload is None:
+            self.payload = QuizPayload(quiz_data=value)
+        else:
+            self.payload.quiz_data = value
+
+    def to_dict(self, scraped_content=None):
         return {
             "id": self.id,
             "url": self.url,
             "title": self.title,
             "date_generated": self.date_generated.isoformat() if self.date_generated else None,
-            "scraped_content": self.scraped_content,
+            "scraped_content": scraped_content if scraped_content is not None else self.scraped_content,
             "full_quiz_data": self.full_quiz_data,
-        }
\ No newline at end of file
+        }
+
+
+class HistoryRevision(Base):
+    """Single-row counter raised by every transaction that writes quizzes;
+    /history's ETag is keyed on it. Writers update the same row, so it
+    changes in commit order."""
+    __tablename__ = "history_revision"
+
+    id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+
+
+class QuizPayload(Base):
+    """Large per-quiz data kept out of the quizzes table, so history and
+    cache-key scans only touch the small columns. Compressed transparently
+    (see compression.py)."""
+    __tablename__ = "quiz_payloads"
+
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), primary_key=True)
+    quiz_data = Column(CompressedText(length=2 ** 24), nullable=False)  # JSON string
+
+
+class ArticleContent(Base):
+    """Scraped article text, stored once per distinct text (content hash) and
+    compressed transparently (see compression.py). See content_store.py."""
+    __tablename__ = "article_contents"
+
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False, unique=True)  # sha256 of text
+    article_key = Column(String(512), nullable=True)
+    title = Column(String(512), nullable=True)
+    text = Column("text_z", CompressedText(length=2 ** 24), nullable=False)
+    fetched_at = Column(DateTime, nullable=False)  # naive UTC
+
+    __table_args__ = (
+        Index("ix_article_contents_key_fetched", "article_key", "fetched_at"),
+    )
+
+
+class ArticleAlias(Base):
+    """A requested article key that a fetch showed to be a redirect (e.g.
+    ``en.wikipedia/AI``) and the key of the article it resolves to, so later
+    requests for it hit the resolved article's cache without fetching."""
+    __tablename__ = "article_aliases"
+
+    alias_key = Column(String(512), primary_key=True)
+    article_key = Column(String(512), nullable=False)
+
+
+class GenerationJob(Base):
+    """A queued quiz generation; see jobs.py. Rows survive restarts."""
+    __tablename__ = "generation_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    status = Column(String(16), nullable=False, default="queued")  # queued|running|succeeded|failed
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    url = Column(String(2048), nullable=False)
+    extra_questions = Column(Boolean, nullable=False, default=False)
+    refresh = Column(Boolean, nullable=False, default=False)
+    full_article = Column(Boolean, nullable=False, default=False)
+    quiz_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)  # naive UTC
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_generation_jobs_status_priority", "status", "priority", "created_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "url": self.url,
+            "extra_questions": self.extra_questions,
+            "full_article": self.full_article,
+            "quiz_id": self.quiz_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
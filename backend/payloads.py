@@ -0,0 +1,143 @@
+"""
+Quiz responses built from stored JSON without a parse/serialize round trip.
+
+``Quiz.full_quiz_data`` already holds the quiz as JSON text, so a cache hit
+splices those bytes into the response envelope instead of ``json.loads``-ing
+the row and having the response class re-encode the same structure. Large
+envelopes are compressed once (gzip, plus brotli when installed) and the
+variants kept in a small LRU, so repeat hits on a popular quiz skip
+compression as well. Everything else is encoded with orjson.
+"""
+import gzip
+import os
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESSED_CACHE_SIZE = int(os.getenv("COMPRESSED_CACHE_SIZE", "256"))
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        with metrics.stage("json_encode"):
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def is_servable(quiz_json: Optional[str]) -> bool:
+    """Whether a stored quiz can be served from cache as-is: rows from before
+    study summaries existed are regenerated. A substring test rather than a
+    parse; inside a JSON string value the quotes would be escaped."""
+    return bool(quiz_json) and '"study_summary":' in quiz_json
+
+
+def envelope(quiz_json: Optional[str], **fields: Any) -> bytes:
+    """``{"quiz": <stored JSON>, **fields}`` as bytes, without decoding the quiz."""
+    body = b'{"quiz":' + (quiz_json or "{}").encode()
+    if fields:
+        body += b"," + orjson.dumps(fields)[1:]
+    else:
+        body += b"}"
+    return body
+
+
+def body_key(kind: str, row_id: int, quiz_json: Optional[str]) -> Hashable:
+    """Cache key for a response body; changes whenever the quiz is regenerated."""
+    return kind, row_id, zlib.crc32((quiz_json or "").encode())
+
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            accepted.add(token.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=9)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+class CompressedBodies:
+    """LRU of compressed variants of response bodies, by caller-chosen key."""
+
+    def __init__(self, max_entries: int = COMPRESSED_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Optional[Hashable], body: bytes, encoding: str) -> bytes:
+        if key is None or self.max_entries <= 0:
+            return _compress(body, encoding)
+        variants = self._entries.get(key)
+        if variants is None:
+            variants = self._entries[key] = {}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(key)
+        compressed = variants.get(encoding)
+        if compressed is None:
+            self.misses += 1
+            compressed = variants[encoding] = _compress(body, encoding)
+        else:
+            self.hits += 1
+        return compressed
+
+    def precompress(self, key: Hashable, body: bytes) -> None:
+        """Compress a body ahead of its first request, in every supported encoding."""
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for encoding in ("gzip", "br") if brotli is not None else ("gzip",):
+                self.get(key, body, encoding)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+compressed_bodies = CompressedBodies()
+
+
+def json_bytes_response(request: Request, body: bytes, key: Optional[Hashable] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response for an already-serialized JSON body. Bodies of at least
+    COMPRESS_MIN_BYTES go out compressed when the client accepts it, using the
+    cached variant for ``key``."""
+    headers = dict(headers or {})
+    if len(body) >= COMPRESS_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = _accepted_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            with metrics.stage("compress"):
+                body = compressed_bodies.get(key, body, encoding)
+    return Response(body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,79 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+With PROFILE_REQUESTS=1, a request carrying ``X-Profile: 1`` (or
+``?profile=1``) is profiled: a background thread samples the event-loop
+thread's Python stack every PROFILE_INTERVAL_MS milliseconds until the
+response has been sent, and the samples are written to PROFILE_DIR in the
+collapsed-stack format read by flamegraph.pl and speedscope. The file name is
+returned in the request's ``Server-Timing`` header as ``profile;desc=...``.
+
+The sampler sees the whole event loop, so concurrent requests show up in each
+other's profiles; profile on an otherwise idle server for clean results.
+Sampling costs a stack walk per interval and nothing when no request asks.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") in ("1", "true", "True")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+
+
+def wants_profile(headers, query_params) -> bool:
+    """Whether a request asked to be profiled (and profiling is enabled)."""
+    return PROFILE_REQUESTS and "1" in (headers.get("x-profile"), query_params.get("profile"))
+
+
+class SamplingProfiler:
+    """Samples one thread's stack from a daemon thread."""
+
+    def __init__(self, label: str = "request", interval: float = PROFILE_INTERVAL_MS / 1000, thread_id: Optional[int] = None) -> None:
+        safe = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "request"
+        now = time.time()
+        # Known up front so it can go in the response headers
+        self.filename = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}-{safe}.collapsed"
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self) -> str:
+        """Write the samples to PROFILE_DIR/<filename> and return the path."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, self.filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return path
@@ -0,0 +1,308 @@
+"""
+Read cache in front of the database for quiz payloads.
+
+Caches three kinds of entries, all as bytes:
+ - ``id:<article_key>|<question_count>`` -> quiz id (the generate_quiz lookup)
+ - ``quiz:<id>`` -> history meta and the stored quiz JSON (undecoded)
+ - ``alias:<article_key>`` -> the article key it redirects to (itself if none)
+
+Entries expire after QUIZ_CACHE_TTL seconds and are dropped whenever a new
+version of the quiz is persisted. Quiz and id entries are stored under a
+generation (``<key>@<generation>``, with the current one in ``gen:<key>``):
+a lookup returns the generation it saw, a fill writes under that generation,
+and ``invalidate`` drops the ``gen:`` entry. A reader that missed before an
+invalidation and fills after it therefore writes an entry nobody reads,
+instead of caching the version it read from the database before the change. The store behind it is pluggable:
+:class:`MemoryBackend`, an LRU bounded by QUIZ_CACHE_BYTES, is the default;
+set QUIZ_CACHE_URL=redis://... to share one cache between uvicorn workers
+(needs the optional ``redis`` package). With per-process memory caches, another
+worker may serve the previous version of a regenerated quiz until its TTL
+runs out.
+
+Backend errors are logged and treated as misses: the cache never fails a request.
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import orjson
+
+QUIZ_CACHE_BYTES = int(os.getenv("QUIZ_CACHE_BYTES", str(64 * 1024 * 1024)))
+QUIZ_CACHE_TTL = float(os.getenv("QUIZ_CACHE_TTL", "300"))
+QUIZ_CACHE_URL = os.getenv("QUIZ_CACHE_URL", "")
+
+# Rough per-entry bookkeeping cost (key object, tuple, OrderedDict node)
+ENTRY_OVERHEAD = 120
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Byte-valued key/value store with per-entry TTL. Subclasses implement
+    get/set/add/delete; counters are kept by the backend itself."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set ``key`` unless it holds a live value; returns True if set."""
+        raise NotImplementedError
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU bounded by the total size of keys and values in bytes."""
+
+    def __init__(self, max_bytes: int = QUIZ_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _cost(key: str, value: bytes) -> int:
+        return len(key) + len(value) + ENTRY_OVERHEAD
+
+    def _drop(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size -= self._cost(key, value)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        cost = self._cost(key, value)
+        if key in self._entries:
+            self._drop(key)
+        if cost > self.max_bytes:
+            return  # larger than the whole cache
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += cost
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            if key in self._entries:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisBackend(CacheBackend):
+    """Shared cache for several worker processes; Redis handles TTL and eviction."""
+
+    def __init__(self, url: str, prefix: str = "quizcache:", client: Any = None) -> None:
+        if client is None:
+            import redis.asyncio as redis  # optional dependency
+
+            client = redis.from_url(url)
+        self.prefix = prefix
+        self._redis = client
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._redis.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self._redis.set(self.prefix + key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+class CachedQuiz(NamedTuple):
+    id: int
+    url: str
+    title: Optional[str]
+    date_generated: Optional[str]  # ISO format, as in history items
+    quiz_json: Optional[str]  # Quiz.full_quiz_data, undecoded
+
+
+def _id_key(article_key: str, question_count: int) -> str:
+    return f"id:{article_key}|{question_count}"
+
+
+def _quiz_key(quiz_id: int) -> str:
+    return f"quiz:{quiz_id}"
+
+
+def _alias_key(article_key: str) -> str:
+    return f"alias:{article_key}"
+
+
+def _generation_key(key: str) -> str:
+    return f"gen:{key}"
+
+
+class QuizCache:
+    def __init__(self, backend: CacheBackend, ttl: float = QUIZ_CACHE_TTL) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Quiz cache read failed: %s", e)
+            return None
+
+    async def _set(self, key: str, value: bytes) -> None:
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Quiz cache write failed: %s", e)
+
+    async def _get_current(self, key: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """(value, generation) of a generational entry. The generation is
+        passed back to ``_fill``; None (backend failing) means do not fill."""
+        generation = await self._get(_generation_key(key))
+        if generation is None:
+            generation = os.urandom(6).hex().encode()
+            try:
+                if not await self.backend.add(_generation_key(key), generation, self.ttl):
+                    generation = await self._get(_generation_key(key))  # another reader started one
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Quiz cache write failed: %s", e)
+                generation = None
+            value = None
+        else:
+            value = await self._get(f"{key}@{generation.decode()}")
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value, generation.decode() if generation is not None else None
+
+    async def _fill(self, key: str, generation: Optional[str], value: bytes) -> None:
+        if generation is not None:
+            await self._set(f"{key}@{generation}", value)
+
+    async def get_quiz_id(self, article_key: str, question_count: int) -> Tuple[Optional[int], Optional[str]]:
+        """(quiz id or None, generation to pass to put_quiz_id on a miss)."""
+        value, generation = await self._get_current(_id_key(article_key, question_count))
+        return (int(value) if value is not None else None), generation
+
+    async def put_quiz_id(self, article_key: str, question_count: int, quiz_id: int, generation: Optional[str]) -> None:
+        await self._fill(_id_key(article_key, question_count), generation, str(quiz_id).encode())
+
+    async def get_alias(self, article_key: str) -> Optional[str]:
+        value = await self._get(_alias_key(article_key))
+        return value.decode() if value is not None else None
+
+    async def put_alias(self, article_key: str, target_key: str) -> None:
+        await self._set(_alias_key(article_key), target_key.encode())
+
+    async def get_quiz(self, quiz_id: int) -> Tuple[Optional[CachedQuiz], Optional[str]]:
+        """(cached quiz or None, generation to pass to put_quiz on a miss)."""
+        value, generation = await self._get_current(_quiz_key(quiz_id))
+        if value is None:
+            return None, generation
+        # Meta JSON, newline, quiz JSON: json.dumps output has no raw newlines
+        meta, _, quiz_json = value.partition(b"\n")
+        return CachedQuiz(*orjson.loads(meta), quiz_json.decode() if quiz_json else None), generation
+
+    async def put_quiz(self, quiz: CachedQuiz, generation: Optional[str]) -> None:
+        meta = orjson.dumps([quiz.id, quiz.url, quiz.title, quiz.date_generated])
+        await self._fill(_quiz_key(quiz.id), generation, meta + b"\n" + (quiz.quiz_json or "").encode())
+
+    async def invalidate(self, quiz_id: Optional[int], article_key: Optional[str], question_count: Optional[int]) -> None:
+        """Forget a quiz whose stored version changed: entries filled under the
+        current generations, including fills still in flight, become unreachable."""
+        keys = []
+        if quiz_id is not None:
+            keys.append(_generation_key(_quiz_key(quiz_id)))
+        if article_key is not None and question_count is not None:
+            keys.append(_generation_key(_id_key(article_key, question_count)))
+        try:
+            await self.backend.delete(keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Quiz cache invalidation failed: %s", e)
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        # hits/misses count lookups, not the backend reads behind each one
+        return {**self.backend.stats(), "hits": self.hits, "misses": self.misses, "errors": self.errors, "ttl": self.ttl}
+
+
+def create_quiz_cache(url: str = QUIZ_CACHE_URL) -> QuizCache:
+    """QuizCache on the backend named by ``url`` (empty: in-process memory)."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return QuizCache(RedisBackend(url))
+        except ImportError:
+            logger.warning("QUIZ_CACHE_URL needs the redis package; using the in-process cache")
+    return QuizCache(MemoryBackend())
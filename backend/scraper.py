@@ -2,33 +2,117 @@
 Simple Wikipedia scraper.
 Given a Wikipedia URL, extracts the article title and the main textual content (paragraphs).
 """
-from typing import Tuple
+import asyncio
+import os
+from typing import TYPE_CHECKING, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
 import requests
 from bs4 import BeautifulSoup
 
+import metrics
+from extractor import extract_article_fast
 
-def scrape_wikipedia(url: str) -> Tuple[str, str]:
-    """Return (title, text) for the Wikipedia article.
+if TYPE_CHECKING:
+    from fetcher import WikipediaFetcher
 
-    This is intentionally robust: it looks for common containers and falls back to
-    extracting visible paragraphs. Optimized for speed with shorter timeouts.
+# Text kept in full-article mode (the default mode keeps the first 2000 chars)
+FULL_ARTICLE_MAX_CHARS = int(os.getenv("FULL_ARTICLE_MAX_CHARS", "200000"))
+
+# Appended to an article key for full-article quizzes and their stored text,
+# so they are cached apart from the default (lead-only) ones. Article keys
+# never contain "#": fragments are dropped when canonicalizing.
+FULL_ARTICLE_SUFFIX = "#full"
+
+
+def _normalize_title(title: str) -> str:
+    """Fold a page title the way MediaWiki does: underscores and runs of
+    whitespace become a single underscore and the first letter is uppercased
+    (the rest of a title is case-sensitive on Wikipedia)."""
+    title = " ".join(title.replace("_", " ").split())
+    if title:
+        title = title[0].upper() + title[1:]
+    return title.replace(" ", "_")
+
+
+def _wiki_language(host: str) -> Optional[str]:
+    """Return the language subdomain for a (mobile or desktop) Wikipedia host."""
+    if not host.endswith("wikipedia.org"):
+        return None
+    labels = [l for l in host[: -len("wikipedia.org")].split(".") if l and l not in ("m", "www")]
+    return labels[0] if labels else "en"
+
+
+def canonical_article_key(url: str) -> str:
+    """Return a canonical identifier for the article a URL points at.
+
+    Mobile/desktop hosts, percent-encoding, ``#fragment``, ``?oldid`` and other
+    query parameters and first-letter case are folded together, so
+    ``https://en.m.wikipedia.org/wiki/artificial%20intelligence#History`` and
+    ``https://en.wikipedia.org/wiki/Artificial_intelligence?oldid=1`` share the
+    key ``en.wikipedia/Artificial_intelligence``. Non-Wikipedia URLs fall back
+    to ``host/path?query`` without the fragment.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
-    # Use shorter timeout and connection pooling for speed
-    try:
-        resp = requests.get(url, headers=headers, timeout=(5, 10), stream=False)
-        resp.raise_for_status()
-    except requests.exceptions.Timeout:
-        raise Exception("Wikipedia request timed out. Please try again or use a different article.")
-    except requests.exceptions.ConnectionError:
-        raise Exception("Failed to connect to Wikipedia. Please check your internet connection.")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Error accessing Wikipedia: {str(e)}")
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    lang = _wiki_language(host)
+
+    if lang is not None:
+        title = None
+        if parts.path.startswith("/wiki/"):
+            title = unquote(parts.path[len("/wiki/"):])
+        else:
+            titles = parse_qs(parts.query).get("title")
+            if titles:
+                title = titles[0]
+        if title:
+            return f"{lang}.wikipedia/{_normalize_title(title)}"
+
+    if host.startswith("www."):
+        host = host[len("www."):]
+    key = host + unquote(parts.path).rstrip("/")
+    if parts.query:
+        key += "?" + parts.query
+    return key
+
+
+def resolved_article_key(url: str, title: str) -> str:
+    """Return the article key for the page title a URL actually resolved to.
+
+    Wikipedia serves redirect targets in place, so the scraped heading (not the
+    requested URL) identifies the article; this folds redirects such as
+    ``/wiki/AI`` onto ``en.wikipedia/Artificial_intelligence``.
+    """
+    parts = urlsplit(url.strip() if "://" in url else "https://" + url.strip())
+    lang = _wiki_language((parts.hostname or "").lower())
+    if lang is None or not title:
+        return canonical_article_key(url)
+    return f"{lang}.wikipedia/{_normalize_title(title)}"
+
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+def quiz_key(article_key: str, full_article: bool = False) -> str:
+    """Cache key for a quiz (and its stored text) on ``article_key``."""
+    return article_key + FULL_ARTICLE_SUFFIX if full_article else article_key
+
+
+def extract_article(html: str, url: str, full: bool = False) -> Tuple[str, str]:
+    """Return (title, text) parsed from a Wikipedia article's HTML.
+
+    Uses the streaming extractor, which stops parsing once the text budget is
+    filled and drops references/infobox noise. ``full`` keeps the whole article
+    (up to FULL_ARTICLE_MAX_CHARS) with its section headings.
+    """
+    if full:
+        return extract_article_fast(html, url, budget=FULL_ARTICLE_MAX_CHARS, sections=True)
+    return extract_article_fast(html, url)
+
+
+def extract_article_soup(html: str, url: str) -> Tuple[str, str]:
+    """Original full-tree BeautifulSoup extractor, kept as a reference for the
+    extractor benchmark (benchmarks/bench_extractor.py)."""
+    soup = BeautifulSoup(html, "html.parser")
 
     # Title
     title_tag = soup.find(id="firstHeading")
@@ -59,4 +143,49 @@ def scrape_wikipedia(url: str) -> Tuple[str, str]:
         # fallback to all text but still limit length
         content = soup.get_text(separator="\n\n")[:2000]
 
-    return title, content
\ No newline at end of file
+    return title, content
+
+
+def scrape_wikipedia(url: str) -> Tuple[str, str]:
+    """Return (title, text) for the Wikipedia article.
+
+    This is intentionally robust: it looks for common containers and falls back to
+    extracting visible paragraphs. Optimized for speed with shorter timeouts.
+    Blocking; the API uses :func:`scrape_wikipedia_async` instead.
+    """
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+    
+    try:
+        resp = requests.get(url, headers=headers, timeout=(5, 10), stream=False)
+        resp.raise_for_status()
+    except requests.exceptions.Timeout:
+        raise Exception("Wikipedia request timed out. Please try again or use a different article.")
+    except requests.exceptions.ConnectionError:
+        raise Exception("Failed to connect to Wikipedia. Please check your internet connection.")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Error accessing Wikipedia: {str(e)}")
+
+    return extract_article(resp.text, url)
+
+
+def fetch_key(url: str, full: bool = False) -> str:
+    """Key under which the fetcher revalidates ``url`` for one extraction mode
+    (the lead and full-article texts of a page are stored separately)."""
+    return quiz_key(url, full)
+
+
+async def scrape_wikipedia_async(url: str, fetcher: "WikipediaFetcher", full: bool = False) -> Tuple[str, str]:
+    """Async variant of :func:`scrape_wikipedia` using a shared fetcher's
+    keep-alive connection pool. The default parse stops after the lead, so it
+    runs inline; a ``full`` parse reads the whole page (~50 ms on a long
+    article) and runs in a worker thread. Raises fetcher.NotModified when the
+    page is unchanged since the text recorded under ``fetch_key(url, full)``
+    was stored."""
+    with metrics.stage("fetch"):
+        html = await fetcher.fetch(url, fetch_key(url, full))
+    with metrics.stage("parse"):
+        if full:
+            return await asyncio.to_thread(extract_article, html, url, full)
+        return extract_article(html, url, full)
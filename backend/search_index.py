@@ -0,0 +1,295 @@
+"""
+Full-text search over stored quizzes.
+
+``quiz_search`` holds each quiz's title, summary and question text under the
+quiz id and is written in the same transaction as the quiz (see
+``index_quizzes``). Its form depends on the database:
+
+ - SQLite: an FTS5 virtual table with prefix indexes, ranked by bm25 with
+   title matches weighted above summary and question matches
+ - MySQL/MariaDB: an InnoDB table with FULLTEXT indexes, queried in boolean
+   mode; title relevance counts three times
+ - anything else (or SQLite built without FTS5): a plain table matched with
+   LIKE, newest first and paged by id -- correct, but a scan
+
+All query terms must match; the last one also matches as a prefix, so
+results follow a query as it is typed. Ranking every match is too slow for a
+word most quizzes share, so with FTS5 a query matching more than
+SEARCH_CANDIDATES quizzes ranks only the newest SEARCH_CANDIDATES quizzes
+whose title matches (by bm25) and lists every other match after them, older
+title matches included, newest first. MySQL ranks the newest
+SEARCH_CANDIDATES matches together with the newest SEARCH_CANDIDATES title
+matches, so an older quiz titled with the query is still found. Results page
+by keyset on (score, id) via an opaque cursor.
+Migrations create the index and fill it for existing quizzes;
+``python migrate_db.py --reindex`` rebuilds it.
+"""
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from compression import unpack_text
+
+logger = logging.getLogger(__name__)
+
+TABLE = "quiz_search"
+MAX_TERMS = 8
+SNIPPET_CHARS = 160
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "1000"))
+
+# bm25 column weights: title, summary, questions
+FTS5_WEIGHTS = "10.0, 4.0, 1.0"
+
+_CREATE = {
+    "fts5": (
+        f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+        "title, summary, questions, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    ),
+    "mysql": (
+        f"CREATE TABLE {TABLE} (quiz_id INTEGER PRIMARY KEY, title VARCHAR(512), summary TEXT, questions MEDIUMTEXT, "
+        "FULLTEXT KEY ft_quiz_search (title, summary, questions), FULLTEXT KEY ft_quiz_search_title (title)) "
+        "ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    ),
+    "like": f"CREATE TABLE {TABLE} (quiz_id INTEGER PRIMARY KEY, title VARCHAR(512), summary TEXT, questions TEXT)",
+}
+
+# engine URL -> index kind ("fts5", "mysql" or "like"), once the table exists
+_kinds: Dict[str, str] = {}
+
+
+def search_document(quiz: Dict[str, Any]) -> Dict[str, str]:
+    """The indexed fields of a quiz dict."""
+    questions = quiz.get("questions") or []
+    return {
+        "title": str(quiz.get("title") or ""),
+        "summary": str(quiz.get("summary") or ""),
+        "questions": "\n".join(str(q.get("question", "")) for q in questions if isinstance(q, dict)),
+    }
+
+
+def query_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+# -- schema ------------------------------------------------------------------
+def _detect(conn: Connection) -> Optional[str]:
+    key = str(conn.engine.url)
+    if key not in _kinds:
+        if not inspect(conn).has_table(TABLE):
+            return None
+        if conn.dialect.name == "sqlite":
+            sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = :t"), {"t": TABLE}).scalar() or ""
+            _kinds[key] = "fts5" if "fts5" in sql.lower() else "like"
+        else:
+            _kinds[key] = "mysql" if conn.dialect.name in ("mysql", "mariadb") else "like"
+    return _kinds[key]
+
+
+def create_search_index(conn: Connection) -> bool:
+    """Create the index table if missing; returns True if it was created."""
+    if _detect(conn) is not None:
+        return False
+    if conn.dialect.name == "sqlite":
+        kind = "fts5" if conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar() else "like"
+        if kind == "like":
+            logger.warning("SQLite was built without FTS5; quiz search falls back to LIKE scans")
+    else:
+        kind = "mysql" if conn.dialect.name in ("mysql", "mariadb") else "like"
+    conn.execute(text(_CREATE[kind]))
+    _kinds[str(conn.engine.url)] = kind
+    return True
+
+
+def _write_statements(kind: str) -> Tuple[Any, Any]:
+    if kind == "fts5":
+        return (
+            text(f"DELETE FROM {TABLE} WHERE rowid = :id"),
+            text(f"INSERT INTO {TABLE} (rowid, title, summary, questions) VALUES (:id, :title, :summary, :questions)"),
+        )
+    return (
+        text(f"DELETE FROM {TABLE} WHERE quiz_id = :id"),
+        text(f"INSERT INTO {TABLE} (quiz_id, title, summary, questions) VALUES (:id, :title, :summary, :questions)"),
+    )
+
+
+def _backfill(conn: Connection, kind: str, batch_size: int) -> int:
+    _, insert = _write_statements(kind)
+    last_id, count = 0, 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT q.id, q.title, q.full_quiz_data, p.quiz_data FROM quizzes q "
+            "LEFT JOIN quiz_payloads p ON p.quiz_id = q.id WHERE q.id > :last ORDER BY q.id LIMIT :n"
+        ), {"last": last_id, "n": batch_size}).fetchall()
+        if not rows:
+            return count
+        docs = []
+        for quiz_id, title, inline, packed in rows:
+            try:
+                quiz = json.loads(unpack_text(packed) if packed is not None else inline or "{}")
+            except Exception:
+                quiz = {}
+            docs.append({"id": quiz_id, **search_document({"title": title, **quiz})})
+        conn.execute(insert, docs)
+        last_id, count = rows[-1][0], count + len(rows)
+
+
+def backfill_search_index(conn: Connection, batch_size: int = 1000) -> int:
+    """Index every stored quiz into a freshly created (empty) index."""
+    return _backfill(conn, _detect(conn), batch_size)
+
+
+def rebuild_search_index(conn: Connection, batch_size: int = 1000) -> int:
+    """Drop, recreate and refill the index; returns the number of quizzes indexed."""
+    if _detect(conn) is not None:
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+    _kinds.pop(str(conn.engine.url), None)
+    create_search_index(conn)
+    return backfill_search_index(conn, batch_size)
+
+
+# -- writes and queries ------------------------------------------------------
+async def _kind(session: AsyncSession) -> Optional[str]:
+    return await session.run_sync(lambda s: _detect(s.connection()))
+
+
+async def index_quizzes(session: AsyncSession, quizzes: Sequence[Tuple[int, Dict[str, Any]]]) -> None:
+    """(Re)index ``(quiz_id, quiz dict)`` pairs in the session's transaction."""
+    kind = await _kind(session)
+    if kind is None or not quizzes:
+        return
+    delete, insert = _write_statements(kind)
+    docs = [{"id": quiz_id, **search_document(quiz)} for quiz_id, quiz in quizzes]
+    await session.execute(delete, [{"id": doc["id"]} for doc in docs])
+    await session.execute(insert, docs)
+
+
+def _parse_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        score, quiz_id = cursor.rsplit(":", 1)
+        return float(score), int(quiz_id)
+    except ValueError:
+        raise ValueError("Invalid search cursor")
+
+
+def _match_query(kind: str, terms: List[str]) -> str:
+    *words, last = terms
+    if kind == "fts5":
+        return " ".join([f'"{term}"' for term in words] + [f'"{last}"*'])
+    return " ".join([f"+{term}" for term in words] + [f"+{last}*"])
+
+
+def _unranked_before(params: Dict[str, Any]) -> int:
+    """Upper id bound for the unranked (0.0) hits: the cursor id once paging
+    has passed every ranked hit (those score at least 1), otherwise none."""
+    if "score" in params and params["score"] < 1.0:
+        return params["id"]
+    return 2 ** 63 - 1
+
+
+def _hits_query(kind: str, terms: List[str], params: Dict[str, Any], broad: bool = False) -> str:
+    if kind == "fts5":
+        params["q"] = _match_query(kind, terms)
+        if broad:
+            # The newest title matches ranked (scores above 1), then every
+            # other match -- older title matches included -- unranked (0.0)
+            # in rowid order, so paging reaches every match
+            params["title_q"] = f"title : ({params['q']})"
+            title_tier = f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :title_q ORDER BY rowid DESC LIMIT :candidates"
+            params["before"] = _unranked_before(params)
+            return (
+                f"SELECT * FROM (SELECT rowid AS id, 1.0 - bm25({TABLE}, {FTS5_WEIGHTS}) AS score "
+                f"FROM {TABLE} WHERE {TABLE} MATCH :title_q ORDER BY rowid DESC LIMIT :candidates) "
+                f"UNION ALL SELECT * FROM (SELECT rowid AS id, 0.0 AS score FROM {TABLE} "
+                f"WHERE {TABLE} MATCH :q AND rowid < :before AND rowid NOT IN ({title_tier}) "
+                "ORDER BY rowid DESC LIMIT :n)"
+            )
+        return (
+            f"SELECT rowid AS id, -bm25({TABLE}, {FTS5_WEIGHTS}) AS score "
+            f"FROM {TABLE} WHERE {TABLE} MATCH :q ORDER BY rowid DESC LIMIT :candidates"
+        )
+    if kind == "mysql":
+        params["q"] = _match_query(kind, terms)
+        score = (
+            "MATCH(title) AGAINST (:q IN BOOLEAN MODE) * 3 "
+            "+ MATCH(title, summary, questions) AGAINST (:q IN BOOLEAN MODE)"
+        )
+        # The newest title matches join the newest matches, so a quiz titled
+        # with the query is ranked however old it is
+        return (
+            f"(SELECT quiz_id AS id, {score} AS score FROM {TABLE} "
+            "WHERE MATCH(title) AGAINST (:q IN BOOLEAN MODE) ORDER BY quiz_id DESC LIMIT :candidates) "
+            f"UNION (SELECT quiz_id AS id, {score} AS score FROM {TABLE} "
+            "WHERE MATCH(title, summary, questions) AGAINST (:q IN BOOLEAN MODE) "
+            "ORDER BY quiz_id DESC LIMIT :candidates)"
+        )
+    conditions = []
+    for i, term in enumerate(terms):
+        params[f"t{i}"] = f"%{term}%"
+        conditions.append(f"(LOWER(title) LIKE :t{i} OR LOWER(summary) LIKE :t{i} OR LOWER(questions) LIKE :t{i})")
+    # Every match scores 0.0, so the keyset is the id alone
+    params["before"] = _unranked_before(params)
+    conditions.append("quiz_id < :before")
+    return (
+        f"SELECT quiz_id AS id, 0.0 AS score FROM {TABLE} WHERE " + " AND ".join(conditions)
+        + " ORDER BY quiz_id DESC LIMIT :n"
+    )
+
+
+def _snippet(body: str, terms: List[str]) -> str:
+    """SNIPPET_CHARS of ``body`` around the first query term, whitespace collapsed."""
+    body = " ".join(body.split())
+    hit = re.search(r"\b(?:%s)" % "|".join(map(re.escape, terms)), body, re.IGNORECASE)
+    start = max(0, hit.start() - SNIPPET_CHARS // 4) if hit else 0
+    end = start + SNIPPET_CHARS
+    return ("..." if start else "") + body[start:end] + ("..." if end < len(body) else "")
+
+
+async def _is_broad(session: AsyncSession, query: str) -> bool:
+    """Whether an FTS5 query matches more than SEARCH_CANDIDATES quizzes, found
+    without reading past the first SEARCH_CANDIDATES + 1."""
+    matches = await session.execute(text(
+        f"SELECT COUNT(*) FROM (SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :q LIMIT :probe) AS m"
+    ), {"q": query, "probe": SEARCH_CANDIDATES + 1})
+    return matches.scalar() > SEARCH_CANDIDATES
+
+
+async def search_quizzes(
+    session: AsyncSession, query: str, limit: int = 20, cursor: Optional[str] = None,
+) -> Tuple[List[Tuple[int, float, str]], Optional[str]]:
+    """Return ([(quiz_id, score, snippet)], next_cursor) for ``query``, best
+    match first. Raises ValueError for a query without words or a bad cursor."""
+    terms = query_terms(query)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    kind = await _kind(session)
+    if kind is None:
+        return [], None
+
+    params: Dict[str, Any] = {"n": limit + 1, "candidates": SEARCH_CANDIDATES}
+    where = ""
+    if cursor:
+        params["score"], params["id"] = _parse_cursor(cursor)
+        where = "WHERE score < :score OR (score = :score AND id < :id)"
+    broad = kind == "fts5" and await _is_broad(session, _match_query(kind, terms))
+    hits = (await session.execute(text(
+        f"SELECT id, score FROM ({_hits_query(kind, terms, params, broad)}) AS hits {where} "
+        "ORDER BY score DESC, id DESC LIMIT :n"
+    ), params)).all()
+    page = hits[:limit]
+    next_cursor = f"{page[-1].score!r}:{page[-1].id}" if len(hits) > limit else None
+    if not page:
+        return [], next_cursor
+
+    # Snippets only for the page, not for every match
+    id_column = "rowid" if kind == "fts5" else "quiz_id"
+    docs = await session.execute(text(
+        f"SELECT {id_column}, summary, questions FROM {TABLE} WHERE {id_column} IN :ids"
+    ).bindparams(bindparam("ids", expanding=True)), {"ids": [hit.id for hit in page]})
+    by_id = {quiz_id: _snippet(f"{summary or ''} {questions or ''}", terms) for quiz_id, summary, questions in docs.all()}
+    return [(hit.id, float(hit.score), by_id.get(hit.id, "")) for hit in page], next_cursor
@@ -0,0 +1,101 @@
+"""
+Single-flight coalescing of concurrent identical work.
+
+The first caller for a key (the leader) starts the work in its own task; callers
+arriving while it runs (followers) await the same result instead of repeating it.
+
+Behavior:
+ - The shared task is independent of any one request: if the leader's client
+   disconnects (its handler is cancelled), followers still get the result and
+   the work still completes, so the quiz is persisted for the next request.
+ - A cancelled waiter never cancels the shared task.
+ - If the work raises, every waiter of that flight receives the exception and
+   the key is released, so the next request starts a fresh attempt (failures are
+   not cached).
+
+Work that produces events along the way (streamed generation) can publish them
+to a :class:`ReplayBuffer`, so a follower sees them live from the start instead
+of only the final result.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` once per key at a time and return its result to every caller."""
+        return await asyncio.shield(self.start(key, fn))
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """The shared task for ``key``, starting ``fn()`` as the leader if none
+        is in flight. Await it through ``asyncio.shield``."""
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            self.coalesced += 1
+        return task
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # Retrieving the exception also marks it handled when nobody waits.
+            self.failures += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
+
+
+class ReplayBuffer:
+    """Events of one in-flight piece of work: every reader gets all events
+    from the first, then follows new ones until the buffer is closed."""
+
+    def __init__(self) -> None:
+        self.events: List[Any] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def append(self, event: Any) -> None:
+        self.events.append(event)
+        self._wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.closed:
+                return
+            await self._changed.wait()
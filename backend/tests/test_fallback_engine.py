@@ -0,0 +1,44 @@
+"""Offline quiz engine: short articles and answer blanking."""
+import pytest
+
+from fallback_engine import BLANK, _blank_out, generate_quiz
+
+SHORT = (
+    "Alpha is a small village in the north of Beta Province. It has a long history "
+    "of farming and trade with Gamma City. Many people visit Alpha every summer for "
+    "the Delta Festival."
+)
+
+
+@pytest.mark.parametrize("count", [10, 15, 25])
+def test_short_article_questions_are_unique(count):
+    questions = generate_quiz("Alpha", SHORT, count)["questions"]
+    assert len(questions) == count
+    assert len({q["question"] for q in questions}) == count
+    for q in questions:
+        assert q["answer"] in q["options"]
+
+
+def test_no_text_still_gives_unique_questions():
+    questions = generate_quiz("Alpha", "", 15)["questions"]
+    assert len({q["question"] for q in questions}) == 15
+
+
+def test_blank_out_matches_whole_words():
+    assert _blank_out("A category of cats named cat.", "cat") == f"A category of cats named {BLANK}."
+    assert _blank_out("Named after Cat Stevens.", "cat") == f"Named after {BLANK} Stevens."
+
+
+def test_blank_out_falls_back_to_a_substring():
+    assert _blank_out("In the 1990s it grew.", "1990") == f"In the {BLANK}s it grew."
+
+
+def test_blanks_never_split_a_word():
+    text = "\n\n".join(
+        f"The category {i} of catalogs listed Catherine and the cat named Felix {i} times in Paris."
+        for i in range(8)
+    )
+    for q in generate_quiz("Catalogs", text, 10)["questions"]:
+        if BLANK in q["question"]:
+            before, _, after = q["question"].partition(BLANK)
+            assert not before[-1:].isalnum() and not after[:1].isalpha()
@@ -0,0 +1,147 @@
+"""WikipediaFetcher against a local stub server (uvicorn on a free port)."""
+import asyncio
+import socket
+import time
+
+import pytest
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, Response
+from starlette.routing import Route
+
+from fetcher import NotModified, WikipediaFetcher
+
+PAGE = "<html><body><h1 id='firstHeading'>Stub</h1><p>Body</p></body></html>"
+ETAG = '"v1"'
+
+
+class Stub:
+    """Counts requests per path; /flaky fails ``failures`` times first."""
+
+    def __init__(self, failures: int = 1, retry_after: str = "1") -> None:
+        self.failures = failures
+        self.retry_after = retry_after
+        self.hits = {}
+        self.app = Starlette(routes=[Route("/wiki/{name}", self.page)])
+
+    async def page(self, request: Request) -> Response:
+        name = request.path_params["name"]
+        self.hits[name] = self.hits.get(name, 0) + 1
+        if name == "Flaky" and self.hits[name] <= self.failures:
+            return Response(status_code=503, headers={"Retry-After": self.retry_after})
+        if name == "Missing":
+            return Response(status_code=404)
+        if request.headers.get("if-none-match") == ETAG:
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return HTMLResponse(PAGE, headers={"ETag": ETAG})
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(stub: Stub, test, **fetcher_kwargs):
+    """Serve ``stub`` and call ``test(fetcher, base_url)`` inside one event loop."""
+
+    async def main():
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(stub.app, host="127.0.0.1", port=port, log_level="error", lifespan="off"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        fetcher = WikipediaFetcher(**{"backoff": 0.01, **fetcher_kwargs})
+        try:
+            return await test(fetcher, f"http://127.0.0.1:{port}/wiki/")
+        finally:
+            await fetcher.aclose()
+            server.should_exit = True
+            await serving
+
+    return asyncio.run(main())
+
+
+def test_fetch_returns_page():
+    stub = Stub()
+
+    async def test(fetcher, base):
+        return await fetcher.fetch(base + "Stub")
+
+    assert run(stub, test) == PAGE
+
+
+def test_retry_after_is_capped():
+    stub = Stub(failures=1, retry_after="3600")
+
+    async def test(fetcher, base):
+        start = time.monotonic()
+        html = await fetcher.fetch(base + "Flaky")
+        return html, time.monotonic() - start
+
+    html, elapsed = run(stub, test, max_delay=0.2)
+    assert html == PAGE
+    assert stub.hits["Flaky"] == 2
+    assert elapsed < 2
+
+
+def test_host_slot_released_while_backing_off():
+    stub = Stub(failures=1, retry_after="1")
+    finished = []
+
+    async def fetch(fetcher, url, name):
+        await fetcher.fetch(url)
+        finished.append(name)
+
+    async def test(fetcher, base):
+        flaky = asyncio.create_task(fetch(fetcher, base + "Flaky", "flaky"))
+        await asyncio.sleep(0.1)  # the first attempt has failed and is backing off
+        await asyncio.wait_for(fetch(fetcher, base + "Stub", "stub"), 0.5)
+        await flaky
+
+    run(stub, test, max_per_host=1, max_delay=1)
+    assert finished == ["stub", "flaky"]
+
+
+def test_not_modified_carries_remembered_digest():
+    stub = Stub()
+
+    async def test(fetcher, base):
+        url = base + "Stub"
+        await fetcher.fetch(url)
+        # Nothing stored yet: the refetch is unconditional
+        assert await fetcher.fetch(url) == PAGE
+        fetcher.remember(url, "abc123")
+        with pytest.raises(NotModified) as exc:
+            await fetcher.fetch(url)
+        # Another key for the same page (e.g. full-article mode) is not affected
+        assert await fetcher.fetch(url, url + "#full") == PAGE
+        return exc.value.digest, fetcher.not_modified
+
+    assert run(stub, test) == ("abc123", 1)
+    assert stub.hits["Stub"] == 4
+
+
+@pytest.mark.parametrize("url", ["ftp://127.0.0.1/wiki/Stub", "http://[bad/wiki/Stub"])
+def test_invalid_url_fails_fast(url):
+    stub = Stub()
+
+    async def test(fetcher, base):
+        start = time.monotonic()
+        with pytest.raises(Exception, match="Invalid article URL"):
+            await fetcher.fetch(url)
+        return time.monotonic() - start
+
+    assert run(stub, test, backoff=5) < 1
+
+
+def test_http_error_is_not_retried():
+    stub = Stub()
+
+    async def test(fetcher, base):
+        with pytest.raises(Exception, match="Error accessing Wikipedia"):
+            await fetcher.fetch(base + "Missing")
+
+    run(stub, test)
+    assert stub.hits["Missing"] == 1
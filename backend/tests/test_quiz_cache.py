@@ -0,0 +1,219 @@
+"""QuizCache on the memory backend and on RedisBackend (with an in-test
+client; set QUIZ_CACHE_TEST_REDIS_URL to also run against a real server)."""
+import asyncio
+import os
+import time
+
+import pytest
+
+from quiz_cache import CachedQuiz, MemoryBackend, QuizCache, RedisBackend, create_quiz_cache
+
+QUIZ = CachedQuiz(7, "https://en.wikipedia.org/wiki/Python", "Python", "2024-01-01T00:00:00", '{"title": "Python"}')
+
+
+class FakeRedis:
+    """The subset of redis.asyncio.Redis that RedisBackend uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self.data[key]
+            entry = None
+        return entry
+
+    async def get(self, key):
+        entry = self._live(key)
+        return entry[1] if entry else None
+
+    async def set(self, key, value, px=None, nx=False):
+        if nx and self._live(key):
+            return None
+        self.data[key] = (time.monotonic() + px / 1000, value)
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+class BrokenBackend(MemoryBackend):
+    async def get(self, key):
+        raise ConnectionError("down")
+
+    async def add(self, key, value, ttl):
+        raise ConnectionError("down")
+
+
+def backends():
+    yield "memory", MemoryBackend
+    yield "redis-fake", lambda: RedisBackend("", client=FakeRedis())
+    url = os.getenv("QUIZ_CACHE_TEST_REDIS_URL")
+    if url:
+        yield "redis", lambda: RedisBackend(url, prefix=f"quizcache-test-{os.getpid()}:")
+
+
+@pytest.fixture(params=[factory for _, factory in backends()], ids=[name for name, _ in backends()])
+def make_backend(request):
+    return request.param
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# -- backends -----------------------------------------------------------------
+
+def test_backend_set_get_delete(make_backend):
+    async def main():
+        backend = make_backend()
+        await backend.set("a", b"1", 60)
+        assert await backend.get("a") == b"1"
+        await backend.delete(["a", "missing"])
+        assert await backend.get("a") is None
+        await backend.aclose()
+
+    run(main())
+
+
+def test_backend_add_only_sets_absent_keys(make_backend):
+    async def main():
+        backend = make_backend()
+        assert await backend.add("a", b"1", 60)
+        assert not await backend.add("a", b"2", 60)
+        assert await backend.get("a") == b"1"
+        await backend.aclose()
+
+    run(main())
+
+
+def test_backend_entries_expire(make_backend):
+    async def main():
+        backend = make_backend()
+        await backend.set("a", b"1", 0.05)
+        await asyncio.sleep(0.1)
+        assert await backend.get("a") is None
+        assert await backend.add("a", b"2", 60)
+        await backend.aclose()
+
+    run(main())
+
+
+def test_memory_backend_evicts_least_recently_used():
+    async def main():
+        backend = MemoryBackend(max_bytes=3 * MemoryBackend._cost("k0", b"x" * 10))
+        for i in range(3):
+            await backend.set(f"k{i}", b"x" * 10, 60)
+        await backend.get("k0")  # now most recently used
+        await backend.set("k3", b"x" * 10, 60)
+        return backend
+
+    backend = run(main())
+    assert list(backend._entries) == ["k2", "k0", "k3"]
+    assert backend.evictions == 1
+    assert backend.size <= backend.max_bytes
+
+
+def test_memory_backend_skips_values_larger_than_the_cache():
+    async def main():
+        backend = MemoryBackend(max_bytes=100)
+        await backend.set("big", b"x" * 200, 60)
+        return await backend.get("big"), backend.size
+
+    assert run(main()) == (None, 0)
+
+
+# -- QuizCache ------------------------------------------------------------------
+
+def test_quiz_round_trip(make_backend):
+    async def main():
+        cache = QuizCache(make_backend())
+        cached, generation = await cache.get_quiz(QUIZ.id)
+        assert cached is None
+        await cache.put_quiz(QUIZ, generation)
+        cached, _ = await cache.get_quiz(QUIZ.id)
+        quiz_id, generation = await cache.get_quiz_id("en.wikipedia/Python", 10)
+        assert quiz_id is None
+        await cache.put_quiz_id("en.wikipedia/Python", 10, QUIZ.id, generation)
+        quiz_id, _ = await cache.get_quiz_id("en.wikipedia/Python", 10)
+        await cache.aclose()
+        return cached, quiz_id, cache.stats()
+
+    cached, quiz_id, stats = run(main())
+    assert cached == QUIZ
+    assert quiz_id == QUIZ.id
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+
+def test_invalidate_drops_quiz_and_id(make_backend):
+    async def main():
+        cache = QuizCache(make_backend())
+        _, generation = await cache.get_quiz(QUIZ.id)
+        await cache.put_quiz(QUIZ, generation)
+        _, generation = await cache.get_quiz_id("en.wikipedia/Python", 10)
+        await cache.put_quiz_id("en.wikipedia/Python", 10, QUIZ.id, generation)
+        await cache.invalidate(QUIZ.id, "en.wikipedia/Python", 10)
+        return (await cache.get_quiz(QUIZ.id))[0], (await cache.get_quiz_id("en.wikipedia/Python", 10))[0]
+
+    assert run(main()) == (None, None)
+
+
+def test_fill_started_before_invalidate_is_not_served(make_backend):
+    async def main():
+        cache = QuizCache(make_backend())
+        # Reader misses and reads the old version from the database...
+        _, stale_generation = await cache.get_quiz(QUIZ.id)
+        # ...meanwhile a writer persists a new version and invalidates...
+        await cache.invalidate(QUIZ.id, None, None)
+        # ...and the reader fills afterwards
+        await cache.put_quiz(QUIZ, stale_generation)
+        cached, generation = await cache.get_quiz(QUIZ.id)
+        assert cached is None
+        assert generation != stale_generation
+        fresh = QUIZ._replace(quiz_json='{"title": "Python 2"}')
+        await cache.put_quiz(fresh, generation)
+        return (await cache.get_quiz(QUIZ.id))[0]
+
+    assert run(main()).quiz_json == '{"title": "Python 2"}'
+
+
+def test_concurrent_misses_share_a_generation(make_backend):
+    async def main():
+        cache = QuizCache(make_backend())
+        (_, first), (_, second) = await asyncio.gather(cache.get_quiz(QUIZ.id), cache.get_quiz(QUIZ.id))
+        return first, second
+
+    first, second = run(main())
+    assert first is not None and first == second
+
+
+def test_alias_round_trip(make_backend):
+    async def main():
+        cache = QuizCache(make_backend())
+        assert await cache.get_alias("en.wikipedia/AI") is None
+        await cache.put_alias("en.wikipedia/AI", "en.wikipedia/Artificial_intelligence")
+        return await cache.get_alias("en.wikipedia/AI")
+
+    assert run(main()) == "en.wikipedia/Artificial_intelligence"
+
+
+def test_backend_errors_are_misses_and_skip_fills():
+    async def main():
+        backend = BrokenBackend()
+        cache = QuizCache(backend)
+        cached, generation = await cache.get_quiz(QUIZ.id)
+        await cache.put_quiz(QUIZ, generation)
+        return cached, generation, len(backend._entries), cache.errors
+
+    cached, generation, entries, errors = run(main())
+    assert (cached, generation, entries) == (None, None, 0)
+    assert errors == 2
+
+
+def test_create_quiz_cache_defaults_to_memory():
+    assert isinstance(create_quiz_cache("").backend, MemoryBackend)
@@ -0,0 +1,69 @@
+"""search_quizzes paging on the SQLite backends (FTS5 and the LIKE fallback)."""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import search_index
+from database import create_engine_for
+from search_index import create_search_index, index_quizzes, search_quizzes
+
+# Quizzes 1-6 are titled "Python", 7-10 only mention it
+DOCS = [
+    (i, {"title": "Python" if i <= 6 else f"Topic {i}", "summary": f"python notes {i}", "questions": []})
+    for i in range(1, 11)
+]
+
+
+def _search_all(db_path, create, query, page_size):
+    async def run():
+        engine = create_engine_for(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(create)
+            Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            async with Session() as session:
+                await index_quizzes(session, DOCS)
+                await session.commit()
+            pages, cursor = [], None
+            async with Session() as session:
+                while True:
+                    hits, cursor = await search_quizzes(session, query, page_size, cursor)
+                    pages.append([quiz_id for quiz_id, _, _ in hits])
+                    if cursor is None:
+                        return pages
+        finally:
+            await engine.dispose()
+            search_index._kinds.clear()
+
+    return asyncio.run(run())
+
+
+def _create_like(conn):
+    conn.execute(text(search_index._CREATE["like"]))
+
+
+def test_broad_fts5_query_pages_through_old_title_matches(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_CANDIDATES", 3)
+    pages = _search_all(tmp_path / "fts.db", create_search_index, "python", 2)
+    seen = [quiz_id for page in pages for quiz_id in page]
+    # The newest three title matches are ranked first, then every other match
+    assert sorted(seen[:3]) == [4, 5, 6]
+    assert seen[3:] == [10, 9, 8, 7, 3, 2, 1]
+
+
+def test_narrow_fts5_query_ranks_title_matches_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_CANDIDATES", 50)
+    pages = _search_all(tmp_path / "fts.db", create_search_index, "python", 4)
+    seen = [quiz_id for page in pages for quiz_id in page]
+    assert sorted(seen[:6]) == [1, 2, 3, 4, 5, 6]
+    assert sorted(seen) == list(range(1, 11))
+
+
+@pytest.mark.parametrize("candidates", [3, 1000])
+def test_like_fallback_pages_by_id(tmp_path, monkeypatch, candidates):
+    monkeypatch.setattr(search_index, "SEARCH_CANDIDATES", candidates)
+    pages = _search_all(tmp_path / "like.db", _create_like, "python", 3)
+    assert pages == [[10, 9, 8], [7, 6, 5], [4, 3, 2], [1]]
@@ -10,11 +10,79 @@ export async function generateQuiz(url, extraQuestions = false) {
   return resp.data;
 }
 
-export async function getHistory() {
-  const resp = await axios.get(`${API_BASE}/history`);
+// Streaming generation: calls onEvent for every NDJSON event
+// (meta, question, study_summary, done, error) as the server produces it.
+// Resolves with the final "done" event.
+export async function generateQuizStream(url, extraQuestions = false, onEvent = () => {}) {
+  const resp = await fetch(`${API_BASE}/generate_quiz/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ url, extra_questions: extraQuestions }),
+  });
+  if (!resp.ok) {
+    const body = await resp.json().catch(() => ({}));
+    const error = new Error(body.detail || `Request failed with status ${resp.status}`);
+    error.response = { status: resp.status, data: body };
+    throw error;
+  }
+
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let done = null;
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const event = JSON.parse(line);
+    if (event.type === 'error') {
+      const error = new Error(event.detail);
+      error.response = { status: 500, data: event };
+      throw error;
+    }
+    if (event.type === 'done') done = event;
+    onEvent(event);
+  };
+  for (;;) {
+    const { value, done: finished } = await reader.read();
+    if (finished) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer);
+  return done;
+}
+
+export async function getHistory(cursor = null) {
+  // Slim projection: only the columns the history table shows. The server sends
+  // an ETag, so unchanged polls are revalidated by the browser with a 304.
+  const params = { view: 'slim' };
+  if (cursor !== null) params.cursor = cursor;
+  const resp = await axios.get(`${API_BASE}/history`, { params });
   return resp.data;
 }
 
+// Set VITE_HISTORY_STREAM=false to fall back to polling /history.
+export const HISTORY_STREAM_ENABLED =
+  typeof EventSource !== 'undefined' && import.meta.env.VITE_HISTORY_STREAM !== 'false';
+
+// Subscribe to newly persisted quizzes via server-sent events. EventSource
+// reconnects on its own and resumes from the last received id (Last-Event-ID).
+// Returns an unsubscribe function.
+export function subscribeHistory(onQuiz, cursor = null) {
+  const url = new URL(`${API_BASE}/history/stream`);
+  if (cursor !== null) url.searchParams.set('cursor', cursor);
+  const source = new EventSource(url.toString());
+  source.addEventListener('quiz', (event) => {
+    try {
+      onQuiz(JSON.parse(event.data));
+    } catch (error) {
+      console.error('Invalid history event:', error);
+    }
+  });
+  return () => source.close();
+}
+
 export async function getQuizById(id) {
   const resp = await axios.get(`${API_BASE}/quiz/${id}`);
   return resp.data;
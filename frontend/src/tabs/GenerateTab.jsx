@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { Loader2, Zap, BookOpen } from 'lucide-react';
 import QuizDisplay from '../components/QuizDisplay';
-import { generateQuiz } from '../services/api';
+import { generateQuizStream } from '../services/api';
 
 export default function GenerateTab() {
   const [url, setUrl] = useState('');
@@ -26,11 +26,16 @@ export default function GenerateTab() {
     setQuiz(null);
     
     try {
-      const res = await generateQuiz(url, extraQuestions);
-      console.log('API Response:', res);
-      console.log('Quiz data:', res.quiz);
-      console.log('Questions count:', res.quiz?.questions?.length);
-      setQuiz(res.quiz);
+      // Show the title and each question as soon as the server streams it
+      await generateQuizStream(url, extraQuestions, (event) => {
+        if (event.type === 'meta') {
+          setQuiz({ title: event.title, summary: event.summary, questions: [] });
+        } else if (event.type === 'question') {
+          setQuiz(prev => ({ ...prev, questions: [...(prev?.questions || []), event.question] }));
+        } else if (event.type === 'study_summary') {
+          setQuiz(prev => ({ ...prev, study_summary: event.study_summary }));
+        }
+      });
     } catch (e) {
       if (e.response?.status === 400) {
         setError(e.response.data.detail || 'Failed to access Wikipedia. Please check the URL and your internet connection.');
@@ -119,7 +124,7 @@ export default function GenerateTab() {
       </div>
 
       <div>
-        {loading && (
+        {loading && !quiz && (
           <div className="card">
             <div className="animate-pulse space-y-4">
               <div className="h-4 bg-gray-200 rounded w-1/3" />
@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import HistoryTable from '../components/HistoryTable';
 import Modal from '../components/Modal';
 import QuizDisplay from '../components/QuizDisplay';
-import { getHistory, getQuizById } from '../services/api';
+import { getHistory, getQuizById, subscribeHistory, HISTORY_STREAM_ENABLED } from '../services/api';
 
 export default function HistoryTab() {
   const [quizzes, setQuizzes] = useState([]);
@@ -14,16 +14,38 @@ export default function HistoryTab() {
     try {
       const res = await getHistory();
       setQuizzes(res.quizzes || []);
+      return res.quizzes || [];
     } catch (error) {
       console.error('Failed to fetch history:', error);
+      return null;
     }
   };
 
+  // Insert a streamed quiz at the top, replacing an older copy of the same id
+  const upsertQuiz = (quiz) => {
+    setQuizzes(prev => [quiz, ...prev.filter(q => q.id !== quiz.id)]);
+  };
+
   useEffect(() => {
-    fetchHistory();
-    // Auto-refresh every 10 seconds to reflect new quizzes
-    const intervalId = setInterval(fetchHistory, 10000);
-    return () => clearInterval(intervalId);
+    if (!HISTORY_STREAM_ENABLED) {
+      fetchHistory();
+      // Auto-refresh every 10 seconds to reflect new quizzes
+      const intervalId = setInterval(fetchHistory, 10000);
+      return () => clearInterval(intervalId);
+    }
+
+    // Load the current page once, then receive new quizzes as they are saved
+    let unsubscribe = null;
+    let cancelled = false;
+    fetchHistory().then(initial => {
+      if (cancelled) return;
+      const cursor = initial ? initial.reduce((max, q) => Math.max(max, q.id), 0) : null;
+      unsubscribe = subscribeHistory(upsertQuiz, cursor);
+    });
+    return () => {
+      cancelled = true;
+      if (unsubscribe) unsubscribe();
+    };
   }, []);
 
   const handleView = async (id) => {